@@ -6,13 +6,31 @@ app = marimo.App(width="medium")
 
 @app.cell
 def _():
+    import datetime as dt
+
     import altair as alt
     import great_tables as gt
     import marimo as mo
     import polars as pl
-    import sf_quant.data as sfd
 
-    return alt, gt, mo, pl, sfd
+    from research.data import load_forward_returns
+    from research.performance import (
+        portfolio_analytics,
+        scan_weights,
+        summarize_portfolios,
+    )
+
+    return (
+        alt,
+        dt,
+        gt,
+        load_forward_returns,
+        mo,
+        pl,
+        portfolio_analytics,
+        scan_weights,
+        summarize_portfolios,
+    )
 
 
 @app.cell
@@ -58,7 +76,7 @@ def _(mo):
 
 
 @app.cell
-def _(end, pl, signal_names, start):
+def _(end, scan_weights, signal_names, start):
     gammas = [
         {
             "reversal": 160,
@@ -70,68 +88,31 @@ def _(end, pl, signal_names, start):
         for signal_name in signal_names.value
     ]
 
-    weights_list = []
-    for signal, gamma in zip(signal_names.value, gammas):
-        signal_weights = (
-            pl.read_parquet(f"weights/{signal}/{gamma}/*.parquet")
-            .filter(pl.col("date").is_between(start.value, end.value))
-            .with_columns(pl.lit(signal).alias("signal"))
-        )
-        weights_list.append(signal_weights)
-
-    weights = pl.concat(weights_list)
+    # Lazily scan only the selected signals' weights and years
+    weights = scan_weights(
+        list(zip(signal_names.value, gammas)), start=start.value, end=end.value
+    )
     return (weights,)
 
 
 @app.cell
-def _(end, pl, sfd, start):
-    # Get returns
-    returns = (
-        sfd.load_assets(
-            start=start.value,
-            end=end.value,
-            columns=["date", "barrid", "return"],
-            in_universe=True,
-        )
-        .sort("date", "barrid")
-        .select(
-            "date",
-            "barrid",
-            pl.col("return")
-            .truediv(100)
-            .shift(-1)
-            .over("barrid")
-            .alias("forward_return"),
-        )
-    )
+def _(dt, load_forward_returns):
+    # Get returns, cached over the full sample so the date pickers only filter
+    returns = load_forward_returns(start=dt.date(1996, 1, 1), end=dt.date(2024, 12, 31))
     return (returns,)
 
 
 @app.cell
-def _(pl, returns, weights):
-    # Compute portfolio returns
-    portfolio_returns = (
-        weights.join(other=returns, on=["date", "barrid"], how="left")
-        .group_by("date", "signal")
-        .agg(pl.col("forward_return").mul(pl.col("weight")).sum().alias("return"))
-        .sort("date", "signal")
-    )
-    return (portfolio_returns,)
+def _(portfolio_analytics, returns, weights):
+    # Compute daily returns, drawdowns, turnover and holdings of every signal
+    analytics = portfolio_analytics(weights, returns)
+    return (analytics,)
 
 
 @app.cell
-def _(pl, portfolio_returns):
-    # Compute cumulative log returns
-    cumulative_returns = portfolio_returns.select(
-        "date",
-        "signal",
-        pl.col("return")
-        .log1p()
-        .cum_sum()
-        .mul(100)
-        .over("signal")
-        .alias("cumulative_return"),
-    )
+def _(analytics):
+    # Cumulative log returns
+    cumulative_returns = analytics.select("date", "signal", "cumulative_return")
     return (cumulative_returns,)
 
 
@@ -153,18 +134,9 @@ def _(alt, cumulative_returns):
 
 
 @app.cell
-def _(gt, pl, portfolio_returns):
+def _(analytics, gt, summarize_portfolios):
     # Create summary table
-    summary = (
-        portfolio_returns.group_by("signal")
-        .agg(
-            pl.col("return").mean().mul(252).alias("mean_return"),
-            pl.col("return").std().mul(pl.lit(252).sqrt()).alias("volatility"),
-        )
-        .with_columns(
-            pl.col("mean_return").truediv(pl.col("volatility")).alias("sharpe")
-        )
-    )
+    summary = summarize_portfolios(analytics).drop("gamma", "n_dates")
 
     table = (
         gt.GT(summary.sort("signal"))
@@ -174,9 +146,13 @@ def _(gt, pl, portfolio_returns):
             mean_return="Mean Return",
             volatility="Volatility",
             sharpe="Sharpe",
+            max_drawdown="Max Drawdown",
+            mean_turnover="Mean Turnover",
+            mean_holdings="Mean Holdings",
         )
-        .fmt_percent(["mean_return", "volatility"], decimals=2)
-        .fmt_number("sharpe", decimals=2)
+        .fmt_percent(["mean_return", "volatility", "max_drawdown"], decimals=2)
+        .fmt_number(["sharpe", "mean_turnover"], decimals=2)
+        .fmt_number("mean_holdings", decimals=0)
         .opt_stylize(style=4, color="gray")
     )
 
@@ -185,19 +161,11 @@ def _(gt, pl, portfolio_returns):
 
 
 @app.cell
-def _(pl, weights):
-    turnover = (
-        weights.sort("date", "barrid", "signal")
-        .with_columns(
-            pl.col("weight")
-            .sub(pl.col("weight").shift(1))
-            .over("barrid", "signal")
-            .alias("diff")
-        )
-        .group_by("date", "signal")
-        .agg(pl.col("diff").abs().sum().alias("two_sided_turnover"))
-        .sort("date", "signal")
-        .with_columns(pl.col("two_sided_turnover").rolling_mean(252).over("signal"))
+def _(analytics, pl):
+    turnover = analytics.select(
+        "date",
+        "signal",
+        pl.col("turnover").rolling_mean(252).over("signal").alias("two_sided_turnover"),
     )
     return (turnover,)
 
@@ -0,0 +1,19 @@
+from .assets import (
+    PERCENT_COLUMNS,
+    data_version,
+    load_assets,
+    refresh_assets,
+    scan_assets,
+)
+from .returns import HORIZONS, forward_return_exprs, load_forward_returns
+
+__all__ = [
+    "HORIZONS",
+    "PERCENT_COLUMNS",
+    "data_version",
+    "forward_return_exprs",
+    "load_assets",
+    "load_forward_returns",
+    "refresh_assets",
+    "scan_assets",
+]
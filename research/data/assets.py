@@ -0,0 +1,358 @@
+import argparse
+import datetime as dt
+import hashlib
+import json
+import os
+from pathlib import Path
+
+import polars as pl
+import sf_quant.data as sfd
+from dotenv import load_dotenv
+
+load_dotenv()
+
+# Columns stored in percent by sf_quant
+PERCENT_COLUMNS = ["return", "specific_return", "specific_risk"]
+
+
+def get_cache_dir() -> Path:
+    """Root directory of the local asset cache."""
+    project_root = os.getenv("PROJECT_ROOT") or "."
+    return Path(project_root) / "cache" / "assets"
+
+
+def _cache_key(columns: list[str], in_universe: bool) -> str:
+    key = json.dumps({"columns": sorted(columns), "in_universe": in_universe})
+    return hashlib.sha1(key.encode()).hexdigest()[:16]
+
+
+def _read_manifest(entry_dir: Path) -> dict | None:
+    manifest_path = entry_dir / "manifest.json"
+    if not manifest_path.exists():
+        return None
+    with open(manifest_path) as f:
+        return json.load(f)
+
+
+def _write_manifest(entry_dir: Path, manifest: dict) -> None:
+    # Write to a temporary file and rename so readers never see a partial manifest
+    temp_path = entry_dir / "manifest.json.tmp"
+    with open(temp_path, "w") as f:
+        json.dump(manifest, f, indent=2)
+    os.replace(temp_path, entry_dir / "manifest.json")
+
+
+def _year_window(year: int, start: dt.date, end: dt.date) -> tuple[dt.date, dt.date]:
+    return max(start, dt.date(year, 1, 1)), min(end, dt.date(year, 12, 31))
+
+
+def _is_covered(partition: dict | None, start: dt.date, end: dt.date) -> bool:
+    """Whether ``partition`` serves ``[start, end]``.
+
+    A partition fetched up to the last published date is fresh for the rest of
+    the day it was checked, since later dates cannot be fetched before then.
+    """
+    if partition is None or dt.date.fromisoformat(partition["start"]) > start:
+        return False
+    return (
+        dt.date.fromisoformat(partition["end"]) >= end
+        or partition.get("checked") == dt.date.today().isoformat()
+    )
+
+
+def _find_entry(
+    cache_dir: Path, columns: list[str], in_universe: bool, years: list[int], start, end
+) -> tuple[Path, dict]:
+    """Pick the cache entry that can serve the most requested years.
+
+    Any entry whose column set is a superset of the requested columns can serve
+    the request, so a narrow load can reuse a wider panel cached by another
+    experiment. An entry that serves none of the years is never preferred to
+    the entry of the requested columns.
+    """
+    best_dir = cache_dir / _cache_key(columns, in_universe)
+    best_manifest = _read_manifest(best_dir) or {
+        "columns": sorted(columns),
+        "in_universe": in_universe,
+        "partitions": {},
+    }
+    # A superset entry must serve some years to be reused, otherwise its
+    # columns would be fetched for years it has never held
+    best_hits = 0
+
+    entry_dirs = sorted(cache_dir.iterdir()) if cache_dir.exists() else []
+    for entry_dir in entry_dirs:
+        manifest = _read_manifest(entry_dir)
+        if manifest is None or manifest["in_universe"] != in_universe:
+            continue
+        if not set(columns) <= set(manifest["columns"]):
+            continue
+
+        hits = sum(
+            _is_covered(
+                manifest["partitions"].get(str(year)), *_year_window(year, start, end)
+            )
+            for year in years
+        )
+        # Prefer more hits, then the narrowest column set
+        if hits > best_hits or (
+            hits == best_hits
+            and len(manifest["columns"]) < len(best_manifest["columns"])
+        ):
+            best_dir, best_manifest, best_hits = entry_dir, manifest, hits
+
+    return best_dir, best_manifest
+
+
+def _fetch(entry_dir: Path, manifest: dict, start: dt.date, end: dt.date) -> int:
+    """Fetch ``[start, end]`` from the database and append it to the year partitions.
+
+    Each year touched by the window gets a new ``part-{n}.parquet`` file and its
+    covered date range is extended. A partition that the window does not extend
+    contiguously is rebuilt from scratch. An empty ``_schema.parquet`` keeps the
+    columns' types for loads that match no rows. Returns the number of rows
+    fetched.
+    """
+    data = sfd.load_assets(
+        start=start,
+        end=end,
+        columns=manifest["columns"],
+        in_universe=manifest["in_universe"],
+    )
+
+    entry_dir.mkdir(parents=True, exist_ok=True)
+    data.head(0).write_parquet(entry_dir / "_schema.parquet")
+
+    # Dates that have not been published yet are not covered
+    today = dt.date.today()
+    requested_end = end
+    if end >= today:
+        end = data["date"].max() if not data.is_empty() else start - dt.timedelta(1)
+
+    for year in range(start.year, requested_end.year + 1):
+        # Empty (year_end before year_start) when nothing is published yet
+        year_start, year_end = _year_window(year, start, end)
+        partition_dir = entry_dir / f"year={year}"
+        partition_dir.mkdir(parents=True, exist_ok=True)
+
+        partition = manifest["partitions"].get(str(year))
+        if (
+            partition is None
+            or dt.date.fromisoformat(partition["end"]) + dt.timedelta(1) < year_start
+        ):
+            for file_name in partition["files"] if partition else []:
+                (partition_dir / file_name).unlink(missing_ok=True)
+            partition = {"start": year_start.isoformat(), "files": []}
+        else:
+            # Skip dates the partition already covers
+            year_start = max(
+                year_start, dt.date.fromisoformat(partition["end"]) + dt.timedelta(1)
+            )
+
+        year_data = data.filter(pl.col("date").is_between(year_start, year_end))
+        if not year_data.is_empty():
+            file_name = f"part-{len(partition['files'])}.parquet"
+            temp_path = partition_dir / f"{file_name}.tmp"
+            year_data.sort("barrid", "date").write_parquet(temp_path)
+            os.replace(temp_path, partition_dir / file_name)
+            partition["files"].append(file_name)
+
+        partition["end"] = max(year_end, year_start - dt.timedelta(1)).isoformat()
+        # Nothing later is published yet, so the year is fresh until tomorrow
+        if _year_window(year, start, requested_end)[1] >= today:
+            partition["checked"] = today.isoformat()
+        manifest["partitions"][str(year)] = partition
+
+    return data.height
+
+
+def scan_assets(
+    start: dt.date,
+    end: dt.date,
+    columns: list[str],
+    in_universe: bool = True,
+    cache_dir: Path | None = None,
+    verbose: bool = True,
+) -> pl.LazyFrame:
+    """Lazily scan the asset panel through the local parquet cache.
+
+    Years missing from the cache are fetched with ``sf_quant.data.load_assets``
+    and written as year partitions. The returned frame only reads the requested
+    columns and dates from disk.
+    """
+    cache_dir = cache_dir or get_cache_dir()
+    fetch_columns = list(dict.fromkeys(["date", "barrid", *columns]))
+    years = list(range(start.year, end.year + 1))
+
+    entry_dir, manifest = _find_entry(
+        cache_dir, fetch_columns, in_universe, years, start, end
+    )
+
+    misses = [
+        year
+        for year in years
+        if not _is_covered(
+            manifest["partitions"].get(str(year)), *_year_window(year, start, end)
+        )
+    ]
+
+    if misses:
+        entry_dir.mkdir(parents=True, exist_ok=True)
+
+        # Fetch consecutive missing years in one query, starting after the
+        # last cached date of a partially cached year
+        windows = []
+        for year in misses:
+            partition = manifest["partitions"].get(str(year))
+            fetch_start = (
+                dt.date.fromisoformat(partition["end"]) + dt.timedelta(1)
+                if partition is not None
+                else dt.date(year, 1, 1)
+            )
+            if windows and windows[-1][1].year == year - 1:
+                windows[-1][1] = dt.date(year, 12, 31)
+            else:
+                windows.append([fetch_start, dt.date(year, 12, 31)])
+
+        for fetch_start, fetch_end in windows:
+            _fetch(entry_dir, manifest, fetch_start, fetch_end)
+        _write_manifest(entry_dir, manifest)
+
+    if verbose:
+        print(
+            f"Asset cache {entry_dir.name}: "
+            f"{len(years) - len(misses)} hits, {len(misses)} misses"
+            + (f" (fetched {', '.join(map(str, misses))})" if misses else "")
+        )
+
+    files = [
+        str(entry_dir / f"year={year}" / file_name)
+        for year in years
+        for file_name in manifest["partitions"].get(str(year), {"files": []})["files"]
+    ]
+
+    if not files:
+        # No rows in the window, but the cached schema still types the columns
+        files = [str(entry_dir / "_schema.parquet")]
+
+    return (
+        pl.scan_parquet(files)
+        .filter(pl.col("date").is_between(start, end))
+        .select(columns)
+    )
+
+
+def data_version(
+    start: dt.date,
+    end: dt.date,
+    columns: list[str],
+    in_universe: bool = True,
+    cache_dir: Path | None = None,
+) -> str:
+    """Hash identifying the cached data that serves a load.
+
+    The hash changes whenever a partition in ``[start, end]`` is fetched,
+    refreshed or rebuilt, so it can be used to key anything derived from it.
+    """
+    cache_dir = cache_dir or get_cache_dir()
+    fetch_columns = list(dict.fromkeys(["date", "barrid", *columns]))
+    years = list(range(start.year, end.year + 1))
+
+    entry_dir, manifest = _find_entry(
+        cache_dir, fetch_columns, in_universe, years, start, end
+    )
+
+    key = json.dumps(
+        {
+            "entry": entry_dir.name,
+            "start": start.isoformat(),
+            "end": end.isoformat(),
+            # A freshness check alone does not change the data
+            "partitions": [
+                {
+                    key: value
+                    for key, value in manifest["partitions"].get(str(year), {}).items()
+                    if key != "checked"
+                }
+                for year in years
+            ],
+        }
+    )
+    return hashlib.sha1(key.encode()).hexdigest()[:16]
+
+
+def load_assets(
+    start: dt.date,
+    end: dt.date,
+    columns: list[str],
+    in_universe: bool = True,
+    cache_dir: Path | None = None,
+    verbose: bool = True,
+) -> pl.DataFrame:
+    """Drop-in replacement for ``sf_quant.data.load_assets`` backed by the cache."""
+    return (
+        scan_assets(
+            start=start,
+            end=end,
+            columns=list(dict.fromkeys(["date", "barrid", *columns])),
+            in_universe=in_universe,
+            cache_dir=cache_dir,
+            verbose=verbose,
+        )
+        .sort("barrid", "date")
+        .select(columns)
+        .collect()
+    )
+
+
+def refresh_assets(
+    end: dt.date | None = None,
+    cache_dir: Path | None = None,
+    verbose: bool = True,
+) -> None:
+    """Append dates after the last cached date to every cache entry.
+
+    Only the new dates are fetched, so a daily refresh costs O(new days) rather
+    than O(history).
+    """
+    cache_dir = cache_dir or get_cache_dir()
+    end = end or dt.date.today()
+
+    entry_dirs = sorted(cache_dir.iterdir()) if cache_dir.exists() else []
+    for entry_dir in entry_dirs:
+        manifest = _read_manifest(entry_dir)
+        if manifest is None or not manifest["partitions"]:
+            continue
+
+        last_date = max(
+            dt.date.fromisoformat(partition["end"])
+            for partition in manifest["partitions"].values()
+        )
+        if last_date >= end:
+            continue
+
+        n_rows = _fetch(entry_dir, manifest, last_date + dt.timedelta(1), end)
+        _write_manifest(entry_dir, manifest)
+
+        if verbose:
+            print(
+                f"Asset cache {entry_dir.name}: appended {n_rows} rows "
+                f"from {last_date + dt.timedelta(1)} to {end}"
+            )
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(
+        description="Append new dates to the local asset cache."
+    )
+
+    parser.add_argument(
+        "--end",
+        type=dt.date.fromisoformat,
+        help="Last date to fetch (YYYY-MM-DD), defaults to today",
+    )
+    parser.add_argument("--cache_dir", type=Path, help="Asset cache directory")
+
+    args = parser.parse_args()
+
+    refresh_assets(end=args.end, cache_dir=args.cache_dir)
@@ -3,10 +3,11 @@ from pathlib import Path
 
 import altair as alt
 import polars as pl
-import sf_quant.data as sfd
-import statsmodels.formula.api as smf
 from dotenv import load_dotenv
 
+from research.data import load_assets, load_forward_returns
+from research.performance import grouped_regressions
+
 # Load environment variables
 load_dotenv()
 
@@ -22,7 +23,7 @@ results_folder = Path("results/experiment_11")
 results_folder.mkdir(parents=True, exist_ok=True)
 
 # Get data
-data = sfd.load_assets(
+data = load_assets(
     start=start,
     end=end,
     columns=[
@@ -78,11 +79,10 @@ alphas = (
 
 # Get forward returns
 forward_returns = (
-    data.sort("date", "barrid")
-    .select(
-        "date", "barrid", pl.col("return").shift(-1).over("barrid").alias("fwd_return")
-    )
+    load_forward_returns(start=start, end=end)
+    .select("date", "barrid", pl.col("fwd_return_1").alias("fwd_return"))
     .drop_nulls("fwd_return")
+    .collect()
 )
 
 n_quantiles = 10
@@ -93,32 +93,15 @@ regression_data = alphas.join(
     pl.col("alpha").qcut(n_quantiles, labels=quantiles).over("date").alias("quantile")
 )
 
-
-def fit_quantile_regression(regression_data: pl.DataFrame, quantiles: list[str]):
-    results_list = []
-
-    for quantile in quantiles:
-        subset = regression_data.filter(pl.col("quantile").eq(quantile))
-
-        model = smf.ols("fwd_return ~ alpha", subset).fit()
-        conf_int = model.conf_int()
-
-        results_list.append(
-            pl.DataFrame(
-                {
-                    "quantile": quantile,
-                    "coefficient": model.params["alpha"],
-                    "ci_lower": conf_int.loc["alpha", 0],
-                    "ci_upper": conf_int.loc["alpha", 1],
-                }
-            )
-        )
-
-    return pl.concat(results_list)
-
-
-# Execute and visualize
-results = fit_quantile_regression(regression_data, quantiles)
+# Fit every quantile in one group-by
+results = grouped_regressions(
+    regression_data, y="fwd_return", x="alpha", by=["quantile"]
+).select(
+    pl.col("quantile").cast(pl.String),
+    pl.col("slope").alias("coefficient"),
+    "ci_lower",
+    "ci_upper",
+)
 
 # Add error bars to show confidence intervals
 chart = (
@@ -141,3 +124,26 @@ error_bars = (
 # Save chart
 chart_path = results_folder / "quantile_chart.png"
 (error_bars + chart).save(chart_path, scale_factor=3)
+
+# Fit every year x quantile
+yearly_results = grouped_regressions(
+    regression_data.with_columns(pl.col("date").dt.year().alias("year")),
+    y="fwd_return",
+    x="alpha",
+    by=["year", "quantile"],
+).with_columns(pl.col("quantile").cast(pl.String))
+
+yearly_chart = (
+    alt.Chart(yearly_results)
+    .mark_rect()
+    .encode(
+        x=alt.X("quantile", title="Quantile", sort=quantiles),
+        y=alt.Y("year:O", title=""),
+        color=alt.Color("slope", title="Alpha Coefficient"),
+    )
+    .properties(width=800, height=400)
+)
+
+# Save chart
+chart_path = results_folder / "quantile_year_chart.png"
+yearly_chart.save(chart_path, scale_factor=3)
@@ -6,7 +6,14 @@ import great_tables as gt
 import polars as pl
 import seaborn as sns
 import sf_quant.data as sfd
-import statsmodels.formula.api as smf
+
+from research.data import load_assets
+from research.performance import (
+    cumulative_quantile_returns,
+    factor_regressions,
+    quantile_returns,
+    summarize_quantile_returns,
+)
 
 # Parameters
 start = dt.date(1996, 1, 1)
@@ -20,7 +27,7 @@ results_folder = Path("results/experiment_2")
 results_folder.mkdir(parents=True, exist_ok=True)
 
 # Get data
-data = sfd.load_assets(
+data = load_assets(
     start=start,
     end=end,
     columns=[
@@ -49,40 +56,17 @@ filtered = signals.filter(
     pl.col(signal_name).is_not_null(),
 )
 
-# Create portfolios
-labels = [str(i) for i in range(num_bins)]
-portfolios = filtered.with_columns(
-    pl.col(signal_name).qcut(num_bins, labels=labels).over("date").alias("bin")
-)
-
-# Compute portfolio returns
-returns = (
-    portfolios.group_by("date", "bin")
-    .agg(pl.col("specific_return").mean())
-    .with_columns(
-        pl.col("specific_return")
-        .truediv(
-            pl.col("specific_return").std().mul(317)
-        )  # Scale volatility to 5%: sqrt(252) / 5 = 3.17
-        .over("bin")
-    )
-    .pivot(on="bin", index="date", values="specific_return")
-    .with_columns(pl.col(str(num_bins - 1)).sub(pl.col("0")).alias("spread"))
-    .unpivot(index="date", variable_name="bin", value_name="specific_return")
-    .sort("date", "bin")
+# Compute portfolio returns, scaled to 5% volatility
+returns = quantile_returns(
+    filtered,
+    signals=[signal_name],
+    num_bins=[num_bins],
+    returns="specific_return",
+    target_volatility=0.05,
 )
 
 # Compute cumulative returns
-cumulative_returns = returns.sort("date", "bin").select(
-    "date",
-    "bin",
-    pl.col("specific_return")
-    .log1p()
-    .cum_sum()
-    .mul(100)
-    .over("bin")
-    .alias("cumulative_return"),
-)
+cumulative_returns = cumulative_quantile_returns(returns)
 
 # Plot cumulative log returns
 colors = sns.color_palette("coolwarm", num_bins).as_hex()
@@ -107,15 +91,7 @@ chart_path = results_folder / "cumulative_returns.png"
 chart.save(chart_path, scale_factor=3)
 
 # Create summary table
-summary = (
-    returns.group_by("bin")
-    .agg(
-        pl.col("specific_return").mean().mul(252).alias("mean_return"),
-        pl.col("specific_return").std().mul(pl.lit(252).sqrt()).alias("volatility"),
-    )
-    .with_columns(pl.col("mean_return").truediv(pl.col("volatility")).alias("sharpe"))
-    .sort("bin", descending=True)
-)
+summary = summarize_quantile_returns(returns).drop("signal", "num_bins")
 
 table = (
     gt.GT(summary)
@@ -142,32 +118,15 @@ ff5 = (
 )
 
 regression_data = (
-    returns.join(other=ff5, on="date", how="left")
+    returns.select("date", "bin", pl.col("return").alias("specific_return"))
+    .join(other=ff5, on="date", how="left")
     .drop_nulls("specific_return")
     .with_columns(pl.col("specific_return").sub("rf").alias("specific_return_rf"))
     .with_columns(pl.exclude("date", "bin").mul(100))
 )
 
-bins = labels + ["spread"]
-regression_summary_list = []
-for bin in bins:
-    regression_data_slice = regression_data.filter(pl.col("bin").eq(bin))
-    formula = "specific_return_rf ~ mkt_rf + smb + hml + rmw + cma"
-    model = smf.ols(formula, regression_data_slice)
-    results = model.fit()
-
-    regression_summary = pl.DataFrame(
-        {
-            "variable": results.params.index,
-            "coefficient": results.params.values,
-            "tstat": results.tvalues.values,
-        }
-    ).with_columns(pl.lit(bin).alias("bin"))
-
-    regression_summary_list.append(regression_summary)
-
 regression_summary = (
-    pl.concat(regression_summary_list)
+    factor_regressions(regression_data, returns="specific_return_rf", by=["bin"])
     .sort("bin")
     .pivot(index="bin", on="variable", values=["coefficient", "tstat"])
 )
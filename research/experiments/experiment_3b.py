@@ -5,7 +5,15 @@ import altair as alt
 import great_tables as gt
 import polars as pl
 import sf_quant.data as sfd
-import statsmodels.formula.api as smf
+
+from research.data import load_forward_returns
+from research.performance import (
+    factor_regressions,
+    portfolio_analytics,
+    rolling_factor_regressions,
+    scan_weights,
+    summarize_portfolios,
+)
 
 # Parameters
 start = dt.date(1996, 1, 1)
@@ -17,34 +25,15 @@ results_folder = Path("results/experiment_3")
 # Create results folder
 results_folder.mkdir(parents=True, exist_ok=True)
 
-# Load MVO weights
-weights = pl.read_parquet(f"weights/{signal_name}/{gamma}/*.parquet")
-
-# Get returns
-returns = (
-    sfd.load_assets(
-        start=start, end=end, columns=["date", "barrid", "return"], in_universe=True
-    )
-    .sort("date", "barrid")
-    .select(
-        "date",
-        "barrid",
-        pl.col("return").truediv(100).shift(-1).over("barrid").alias("forward_return"),
-    )
-)
-
-# Compute portfolio returns
-portfolio_returns = (
-    weights.join(other=returns, on=["date", "barrid"], how="left")
-    .group_by("date")
-    .agg(pl.col("forward_return").mul(pl.col("weight")).sum().alias("return"))
-    .sort("date")
+# Compute daily analytics of the MVO weights
+analytics = portfolio_analytics(
+    scan_weights([(signal_name, gamma)], start=start, end=end),
+    load_forward_returns(start=start, end=end),
 )
 
-# Compute cumulative log returns
-cumulative_returns = portfolio_returns.select(
-    "date", pl.col("return").log1p().cum_sum().mul(100).alias("cumulative_return")
-)
+# Portfolio returns and cumulative log returns
+portfolio_returns = analytics.select("date", "return")
+cumulative_returns = analytics.select("date", "cumulative_return")
 
 # Plot cumulative log returns
 chart = (
@@ -62,10 +51,7 @@ chart_path = results_folder / "cumulative_returns.png"
 chart.save(chart_path, scale_factor=3)
 
 # Create summary table
-summary = portfolio_returns.select(
-    pl.col("return").mean().mul(252).alias("mean_return"),
-    pl.col("return").std().mul(pl.lit(252).sqrt()).alias("volatility"),
-).with_columns(pl.col("mean_return").truediv(pl.col("volatility")).alias("sharpe"))
+summary = summarize_portfolios(analytics).select("mean_return", "volatility", "sharpe")
 
 table = (
     gt.GT(summary)
@@ -97,16 +83,8 @@ regression_data = (
     .with_columns(pl.exclude("date").mul(100))
 )
 
-formula = "return_rf ~ mkt_rf + smb + hml + rmw + cma"
-model = smf.ols(formula, regression_data)
-results = model.fit()
-
-regression_summary = pl.DataFrame(
-    {
-        "variable": results.params.index,
-        "coefficient": results.params.values,
-        "tstat": results.tvalues.values,
-    }
+regression_summary = factor_regressions(regression_data, returns="return_rf").select(
+    "variable", "coefficient", "tstat"
 )
 
 regression_table = (
@@ -123,3 +101,21 @@ regression_table = (
 
 table_path = results_folder / "regression_table.png"
 regression_table.save(table_path, scale=3)
+
+# Rolling 252-day fama french alpha
+rolling_alphas = rolling_factor_regressions(
+    regression_data, returns="return_rf", window=252
+).filter(pl.col("variable").eq("Intercept"))
+
+rolling_chart = (
+    alt.Chart(rolling_alphas, title="MVO Backtest Rolling Alpha (Active) (Daily %)")
+    .mark_line()
+    .encode(
+        x=alt.X("date", title=""),
+        y=alt.Y("coefficient", title="252-Day FF5 Alpha (Daily %)"),
+    )
+    .properties(width=800, height=400)
+)
+
+chart_path = results_folder / "rolling_alpha.png"
+rolling_chart.save(chart_path, scale_factor=3)
@@ -2,12 +2,14 @@ import datetime as dt
 from pathlib import Path
 
 import great_tables as gt
-import numpy as np
 import polars as pl
 import sf_quant.data as sfd
 import sf_quant.optimizer as sfo
 from dotenv import load_dotenv
 
+from research.data import load_assets
+from research.utils import FactorCovariance, factor_mve_optimizer
+
 # Load environment variables
 load_dotenv()
 
@@ -31,7 +33,7 @@ constraints = [
 results_folder.mkdir(parents=True, exist_ok=True)
 
 # Get data
-data = sfd.load_assets(
+data = load_assets(
     start=start,
     end=end,
     columns=[
@@ -95,15 +97,14 @@ alphas_np = alphas["alpha"].to_numpy()
 betas_np = alphas["predicted_beta"].to_numpy()
 barrids = alphas["barrid"].to_list()
 
-# Get covariance matrix
-covariance_matrix = sfd.construct_covariance_matrix(date_=end, barrids=barrids)
-covariance_matrix_np = covariance_matrix.drop("barrid").to_numpy()
+# Get factor covariance
+covariance = FactorCovariance.load(date_=end, barrids=barrids)
 
 # Get optimal weights
-weights = sfo.mve_optimizer(
+weights = factor_mve_optimizer(
     ids=barrids,
     alphas=alphas_np,
-    covariance_matrix=covariance_matrix_np,
+    covariance=covariance,
     constraints=constraints,
     gamma=gamma,
     betas=betas_np,
@@ -142,11 +143,10 @@ all_weights = (
 active_weights_np = all_weights.sort("barrid")["active_weight"].to_numpy()
 barrids = all_weights.sort("barrid")["barrid"].to_list()
 
-# Get covariance matrix
-covariance_matrix = sfd.construct_covariance_matrix(date_=end, barrids=barrids)
-covariance_matrix_np = covariance_matrix.drop("barrid").to_numpy()
+# Get factor covariance
+covariance = FactorCovariance.load(date_=end, barrids=barrids)
 
-active_risk = np.sqrt(active_weights_np @ covariance_matrix_np @ active_weights_np.T)
+active_risk = covariance.active_risk(active_weights_np)
 print(f"Active Risk: {active_risk * 100:.2}%")
 
 # Create summary table
@@ -8,6 +8,8 @@ import sf_quant.data as sfd
 import sf_quant.optimizer as sfo
 from dotenv import load_dotenv
 
+from research.data import load_assets
+
 # Load environment variables
 load_dotenv()
 
@@ -31,7 +33,7 @@ constraints = [
 results_folder.mkdir(parents=True, exist_ok=True)
 
 # Get data
-data = sfd.load_assets(
+data = load_assets(
     start=start,
     end=end,
     columns=[
@@ -3,13 +3,16 @@ from pathlib import Path
 
 import great_tables as gt
 import matplotlib.pyplot as plt
-import numpy as np
 import polars as pl
 import seaborn as sns
 import sf_quant.data as sfd
 import sf_quant.optimizer as sfo
 from dotenv import load_dotenv
 
+from research.data import load_assets
+from research.signals import dollar_volume, dollar_volume_score
+from research.utils import FactorCovariance, factor_mve_optimizer
+
 # Load environment variables
 load_dotenv()
 
@@ -33,7 +36,7 @@ constraints = [
 results_folder.mkdir(parents=True, exist_ok=True)
 
 # Get data
-data = sfd.load_assets(
+data = load_assets(
     start=start,
     end=end,
     columns=[
@@ -90,28 +93,9 @@ scores = filtered.select(
 
 volume_scores = (
     scores.sort(["barrid", "date"])
-    .with_columns(dollar_volume=pl.col("daily_volume").mul(pl.col("price")).log1p())
-    .with_columns(
-        # Mean can be calculated on Day 1
-        dollar_volume_mean=pl.col("dollar_volume")
-        .rolling_mean(window_size=252, min_samples=1)
-        .over("barrid"),
-        # Std Dev requires min_samples=2.
-        # It will still produce a null on Day 1.
-        dollar_volume_std=pl.col("dollar_volume")
-        .rolling_std(window_size=252, min_samples=2)
-        .over("barrid"),
-    )
-    .with_columns(
-        volume_score=(
-            (pl.col("dollar_volume") - pl.col("dollar_volume_mean"))
-            /
-            # fill the Day 1 null std with 1.0 (or any non-zero) to avoid division by null
-            pl.col("dollar_volume_std").fill_null(1.0).clip(lower_bound=0.0001)
-        )
-        .fill_null(0.0)  # Catch any remaining edge cases
-        .alias("volume_score")
-    )
+    # Same dollar volume z-score as the registered signal
+    .with_columns(dollar_volume())
+    .with_columns(dollar_volume_score().alias("volume_score"))
 )
 
 # Convert just the score column to Pandas/Numpy for plotting
@@ -151,15 +135,14 @@ alphas_np = alphas["alpha"].to_numpy()
 betas_np = alphas["predicted_beta"].to_numpy()
 barrids = alphas["barrid"].to_list()
 
-# Get covariance matrix
-covariance_matrix = sfd.construct_covariance_matrix(date_=end, barrids=barrids)
-covariance_matrix_np = covariance_matrix.drop("barrid").to_numpy()
+# Get factor covariance
+covariance = FactorCovariance.load(date_=end, barrids=barrids)
 
 # Get optimal weights
-weights = sfo.mve_optimizer(
+weights = factor_mve_optimizer(
     ids=barrids,
     alphas=alphas_np,
-    covariance_matrix=covariance_matrix_np,
+    covariance=covariance,
     constraints=constraints,
     gamma=gamma,
     betas=betas_np,
@@ -198,11 +181,10 @@ all_weights = (
 active_weights_np = all_weights.sort("barrid")["active_weight"].to_numpy()
 barrids = all_weights.sort("barrid")["barrid"].to_list()
 
-# Get covariance matrix
-covariance_matrix = sfd.construct_covariance_matrix(date_=end, barrids=barrids)
-covariance_matrix_np = covariance_matrix.drop("barrid").to_numpy()
+# Get factor covariance
+covariance = FactorCovariance.load(date_=end, barrids=barrids)
 
-active_risk = np.sqrt(active_weights_np @ covariance_matrix_np @ active_weights_np.T)
+active_risk = covariance.active_risk(active_weights_np)
 print(f"Active Risk: {active_risk * 100:.2}%")
 
 # Create summary table
@@ -2,10 +2,11 @@ import datetime as dt
 from pathlib import Path
 
 import polars as pl
-import sf_quant.data as sfd
 import sf_quant.performance as sfp
 from dotenv import load_dotenv
 
+from research.performance import compute_ics
+from research.pipelines import collect, scan_alphas
 from research.utils import run_backtest_parallel
 
 # Load environment variables
@@ -25,90 +26,37 @@ results_folder = Path("results/experiment_9")
 # Create results folder
 results_folder.mkdir(parents=True, exist_ok=True)
 
-# Get data
-data = sfd.load_assets(
-    start=start,
-    end=end,
-    columns=[
-        "date",
-        "barrid",
-        "ticker",
-        "price",
-        "return",
-        "specific_risk",
-        "predicted_beta",
-    ],
-    in_universe=True,
-).with_columns(
-    pl.col("return").truediv(100),
-    pl.col("specific_risk").truediv(100),
-)
-
-# Compute signal
-signals = data.sort("barrid", "date").with_columns(
-    pl.col("return").log1p().rolling_sum(21).mul(-1).over("barrid").alias(signal_name)
-)
-
-# Filter universe
-filtered = signals.filter(
-    pl.col("price").shift(1).over("barrid").gt(price_filter),
-    pl.col(signal_name).is_not_null(),
-    pl.col("predicted_beta").is_not_null(),
-    pl.col("specific_risk").is_not_null(),
-)
-
-# Compute scores
-scores = filtered.select(
-    "date",
-    "barrid",
-    "predicted_beta",
-    "specific_risk",
-    pl.col(signal_name)
-    .sub(pl.col(signal_name).mean())
-    .truediv(pl.col(signal_name).std())
-    .over("date")
-    .alias("score"),
-)
-
-# Compute alphas
-alphas = (
-    scores.with_columns(pl.col("score").mul(IC).mul("specific_risk").alias("alpha"))
-    .select("date", "barrid", "alpha", "predicted_beta")
-    .sort("date", "barrid")
-)
-
-# Get forward returns
-forward_returns = (
-    data.sort("date", "barrid")
-    .select(
-        "date", "barrid", pl.col("return").shift(-1).over("barrid").alias("fwd_return")
+# Build alphas and forward returns in one lazy pass
+alphas, forward_returns = collect(
+    *scan_alphas(
+        start=start,
+        end=end,
+        signal="reversal",
+        columns=["specific_risk", "predicted_beta"],
+        price_filter=price_filter,
+        IC=IC,
+        horizons=[22],
     )
-    .drop_nulls("fwd_return")
 )
 
-# Merge alphas and forward returns
-merged = alphas.join(other=forward_returns, on=["date", "barrid"], how="inner")
-
-# Get merged alphas and forward returns (inner join)
-merged_alphas = merged.select("date", "barrid", "alpha")
-merged_forward_returns = merged.select("date", "barrid", "fwd_return")
-
 # Get ics
-ics = sfp.generate_alpha_ics(
-    alphas=alphas, rets=forward_returns, method="rank", window=22
+ics = compute_ics(
+    alphas.join(forward_returns, on=["date", "barrid"]),
+    signals=["alpha"],
+    horizons=[22],
 )
 
 # Save ic chart
 rank_chart_path = results_folder / "rank_ic_chart.png"
 pearson_chart_path = results_folder / "pearson_ic_chart.png"
 sfp.generate_ic_chart(
-    ics=ics,
+    ics=ics.select("date", pl.col("rank_ic").alias("ic")),
     title="Standard Reversal Cumulative IC",
     ic_type="Rank",
     file_name=rank_chart_path,
 )
 sfp.generate_ic_chart(
-    ics=ics,
+    ics=ics.select("date", pl.col("pearson_ic").alias("ic")),
     title="Standard Reversal Cumulative IC",
     ic_type="Pearson",
     file_name=pearson_chart_path,
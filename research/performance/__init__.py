@@ -0,0 +1,25 @@
+from .factors import FF5_FACTORS, factor_regressions, rolling_factor_regressions
+from .ics import compute_ics, rolling_ics, summarize_ics
+from .portfolios import portfolio_analytics, scan_weights, summarize_portfolios
+from .quantiles import (
+    cumulative_quantile_returns,
+    quantile_returns,
+    summarize_quantile_returns,
+)
+from .regressions import grouped_regressions
+
+__all__ = [
+    "FF5_FACTORS",
+    "compute_ics",
+    "cumulative_quantile_returns",
+    "factor_regressions",
+    "grouped_regressions",
+    "portfolio_analytics",
+    "quantile_returns",
+    "rolling_factor_regressions",
+    "rolling_ics",
+    "scan_weights",
+    "summarize_ics",
+    "summarize_portfolios",
+    "summarize_quantile_returns",
+]
@@ -0,0 +1,311 @@
+import argparse
+import datetime as dt
+import time
+
+import numpy as np
+import polars as pl
+
+from research.performance.ics import REVERSAL_SIGNALS
+
+# Fama-French five factor model, as named by sf_quant.data.load_fama_french
+FF5_FACTORS = ["mkt_rf", "smb", "hml", "rmw", "cma"]
+
+
+def _ols(
+    X: np.ndarray, Y: np.ndarray, maxlags: int | None = None
+) -> tuple[np.ndarray, np.ndarray]:
+    """Coefficients and standard errors of every column of ``Y`` regressed on ``X``.
+
+    One QR decomposition of ``X`` solves all columns. Standard errors are the
+    classical OLS ones, or Newey-West (Bartlett kernel, no small sample
+    correction) with ``maxlags``, as in statsmodels' ``cov_type="HAC"``.
+    """
+    n, k = X.shape
+    Q, R = np.linalg.qr(X)
+    coefficients = np.linalg.solve(R, Q.T @ Y)
+    residuals = Y - X @ coefficients
+    R_inv = np.linalg.inv(R)
+    XtX_inv = R_inv @ R_inv.T
+
+    if maxlags is None:
+        variances = np.outer(np.diag(XtX_inv), (residuals**2).sum(axis=0) / (n - k))
+        return coefficients, np.sqrt(variances)
+
+    # Scores of every regression, (n, k, m)
+    scores = X[:, :, None] * residuals[:, None, :]
+    S = np.einsum("tim,tjm->mij", scores, scores)
+    for lag in range(1, maxlags + 1):
+        weight = 1 - lag / (maxlags + 1)
+        gamma = np.einsum("tim,tjm->mij", scores[lag:], scores[:-lag])
+        S += weight * (gamma + gamma.transpose(0, 2, 1))
+
+    covariances = XtX_inv @ S @ XtX_inv
+    variances = np.diagonal(covariances, axis1=1, axis2=2).T
+    return coefficients, np.sqrt(variances)
+
+
+def _stack(
+    data: pl.DataFrame, returns: str, factors: list[str], by: list[str]
+) -> tuple[pl.DataFrame, pl.Series, np.ndarray, np.ndarray]:
+    """Portfolio keys, dates, factor design matrix and dates × portfolios returns."""
+    data = data.drop_nulls([returns, *factors])
+
+    portfolios = (
+        data.select(by).unique(maintain_order=True).with_row_index("portfolio")
+        if by
+        else pl.DataFrame({"portfolio": [0]}, schema={"portfolio": pl.UInt32})
+    )
+    data = (
+        data.join(portfolios, on=by)
+        if by
+        else data.with_columns(pl.lit(0, pl.UInt32).alias("portfolio"))
+    )
+
+    wide = (
+        data.pivot(on="portfolio", index="date", values=returns)
+        .join(data.group_by("date").agg(pl.col(factors).first()), on="date")
+        .sort("date")
+    )
+    X = np.column_stack([np.ones(len(wide)), wide.select(factors).to_numpy()])
+    Y = wide.select(str(i) for i in portfolios["portfolio"]).to_numpy().astype(float)
+
+    return portfolios, wide["date"], X, Y
+
+
+def _patterns(Y: np.ndarray):
+    """Rows and columns of each group of portfolios with the same missing dates."""
+    patterns, pattern_of = np.unique(~np.isnan(Y), axis=1, return_inverse=True)
+    for pattern in range(patterns.shape[1]):
+        yield patterns[:, pattern], pattern_of.ravel() == pattern
+
+
+def _running_sum(terms: np.ndarray) -> np.ndarray:
+    """Cumulative sums with a leading zero, so a window sum is one difference."""
+    return np.concatenate([np.zeros((1, *terms.shape[1:])), terms.cumsum(axis=0)])
+
+
+def factor_regressions(
+    data: pl.DataFrame,
+    returns: str = "return",
+    factors: list[str] = FF5_FACTORS,
+    by: list[str] | None = None,
+    maxlags: int | None = None,
+) -> pl.DataFrame:
+    """Regress the returns of every portfolio on shared factors with one OLS solve.
+
+    ``data`` is long, with ``date``, the ``by`` columns identifying each
+    portfolio (e.g. ``["bin"]``), ``returns`` and the ``factors`` of each date,
+    e.g. portfolio returns joined to ``sf_quant.data.load_fama_french``. The
+    returns are pivoted to a dates × portfolios matrix and all portfolios are
+    solved against one factor design matrix. Portfolios with different missing
+    dates are grouped by their missing pattern, so each group is one solve and
+    every regression uses its own complete rows, as statsmodels does.
+
+    Pass ``maxlags`` for Newey-West standard errors, matching
+    ``.fit(cov_type="HAC", cov_kwds={"maxlags": maxlags})``.
+
+    Returns
+    -------
+    pl.DataFrame
+        The ``by`` columns, ``variable`` (``Intercept`` and the factors),
+        ``coefficient``, ``std_error`` and ``tstat``.
+    """
+    # Dates × portfolios returns against one factor design matrix
+    portfolios, _, X, Y = _stack(data, returns, factors, by or [])
+
+    # One solve per pattern of missing dates
+    coefficients = np.empty((X.shape[1], Y.shape[1]))
+    std_errors = np.empty((X.shape[1], Y.shape[1]))
+    for rows, columns in _patterns(Y):
+        coefficients[:, columns], std_errors[:, columns] = _ols(
+            X[rows], Y[rows][:, columns], maxlags=maxlags
+        )
+
+    variables = ["Intercept", *factors]
+    results = pl.DataFrame(
+        {
+            "portfolio": np.repeat(portfolios["portfolio"].to_numpy(), len(variables)),
+            "variable": variables * len(portfolios),
+            "coefficient": coefficients.T.ravel(),
+            "std_error": std_errors.T.ravel(),
+        }
+    ).with_columns(pl.col("coefficient").truediv(pl.col("std_error")).alias("tstat"))
+
+    return portfolios.join(results, on="portfolio").drop("portfolio")
+
+
+def rolling_factor_regressions(
+    data: pl.DataFrame,
+    returns: str = "return",
+    factors: list[str] = FF5_FACTORS,
+    by: list[str] | None = None,
+    window: int | None = 252,
+    min_periods: int | None = None,
+) -> pl.DataFrame:
+    """Rolling (or, with ``window=None``, expanding) factor regressions of every portfolio.
+
+    Takes the same ``data`` as :func:`factor_regressions` and fits each
+    portfolio on its last ``window`` observations at every date. The window
+    sums of X'X, X'y and y'y are differences of running sums, so each date
+    costs one k × k solve instead of a refit. Dates with fewer than
+    ``min_periods`` observations (default ``window``, or 252 when expanding)
+    are skipped, and ``min_periods`` must cover the intercept and factors.
+    Standard errors are the classical OLS ones.
+
+    Returns
+    -------
+    pl.DataFrame
+        The ``by`` columns, ``date`` (the last date of the window), ``n``,
+        ``variable``, ``coefficient``, ``std_error`` and ``tstat``.
+    """
+    min_periods = min_periods or window or 252
+    variables = ["Intercept", *factors]
+    k = len(variables)
+    if min_periods < k:
+        raise ValueError(
+            f"min_periods ({min_periods}) must be at least the number of "
+            f"regressors ({k})"
+        )
+    portfolios, dates, X, Y = _stack(data, returns, factors, by or [])
+
+    results = []
+    for rows, columns in _patterns(Y):
+        X_rows, Y_rows = X[rows], Y[rows][:, columns]
+        XtX = _running_sum(X_rows[:, :, None] * X_rows[:, None, :])
+        XtY = _running_sum(X_rows[:, :, None] * Y_rows[:, None, :])
+        YtY = _running_sum(Y_rows**2)
+
+        ends = np.arange(1, len(X_rows) + 1)
+        starts = (
+            np.maximum(ends - window, 0) if window is not None else np.zeros_like(ends)
+        )
+        kept = ends - starts >= min_periods
+        ends, starts = ends[kept], starts[kept]
+        n = ends - starts
+        if len(n) == 0:
+            continue
+
+        XtX_window = XtX[ends] - XtX[starts]
+        XtY_window = XtY[ends] - XtY[starts]
+        YtY_window = YtY[ends] - YtY[starts]
+
+        coefficients = np.linalg.solve(XtX_window, XtY_window)
+        XtX_inv = np.linalg.solve(
+            XtX_window, np.broadcast_to(np.eye(k), XtX_window.shape)
+        )
+        residual_variance = (
+            YtY_window - np.einsum("tkm,tkm->tm", coefficients, XtY_window)
+        ) / (n - k)[:, None]
+        std_errors = np.sqrt(
+            np.diagonal(XtX_inv, axis1=1, axis2=2)[:, :, None]
+            * residual_variance[:, None, :]
+        )
+
+        # (dates, portfolios, variables) in row order
+        n_dates, n_portfolios = len(n), columns.sum()
+        results.append(
+            pl.DataFrame(
+                {
+                    "portfolio": np.tile(
+                        np.repeat(portfolios["portfolio"].to_numpy()[columns], k),
+                        n_dates,
+                    ),
+                    "date": np.repeat(
+                        dates.to_numpy()[rows][ends - 1], n_portfolios * k
+                    ),
+                    "n": np.repeat(n, n_portfolios * k),
+                    "variable": variables * (n_dates * n_portfolios),
+                    "coefficient": coefficients.transpose(0, 2, 1).ravel(),
+                    "std_error": std_errors.transpose(0, 2, 1).ravel(),
+                }
+            )
+        )
+
+    if not results:
+        return pl.DataFrame()
+
+    return (
+        portfolios.join(pl.concat(results), on="portfolio")
+        .drop("portfolio")
+        .with_columns(pl.col("coefficient").truediv(pl.col("std_error")).alias("tstat"))
+        .sort(*(by or []), "date", maintain_order=True)
+    )
+
+
+if __name__ == "__main__":
+    import sf_quant.data as sfd
+    import statsmodels.formula.api as smf
+
+    from research.data import load_forward_returns
+    from research.performance.quantiles import quantile_returns
+    from research.signals import load_signals
+
+    parser = argparse.ArgumentParser(
+        description="Benchmark batched FF5 regressions of quantile portfolios against statsmodels."
+    )
+
+    parser.add_argument("--start", type=dt.date.fromisoformat, default="1996-01-01")
+    parser.add_argument("--end", type=dt.date.fromisoformat, default="2024-12-31")
+    parser.add_argument("--num_bins", nargs="+", type=int, default=[5, 10])
+    parser.add_argument("--maxlags", type=int, default=None)
+
+    args = parser.parse_args()
+
+    returns = quantile_returns(
+        load_signals(start=args.start, end=args.end, names=REVERSAL_SIGNALS).join(
+            load_forward_returns(start=args.start, end=args.end, horizons=[1]),
+            on=["date", "barrid"],
+        ),
+        signals=REVERSAL_SIGNALS,
+        num_bins=args.num_bins,
+        returns="fwd_return_1",
+    )
+    ff5 = (
+        sfd.load_fama_french(start=args.start, end=args.end)
+        .sort("date")
+        .with_columns(pl.exclude("date").shift(-1))
+    )
+    regression_data = (
+        returns.join(other=ff5, on="date", how="left")
+        .with_columns(pl.col("return").sub("rf").alias("return_rf"))
+        .with_columns(pl.col("return_rf", *FF5_FACTORS).mul(100))
+    )
+    by = ["signal", "num_bins", "bin"]
+
+    start_time = time.perf_counter()
+    batched = factor_regressions(
+        regression_data, returns="return_rf", by=by, maxlags=args.maxlags
+    )
+    print(f"factor_regressions: {time.perf_counter() - start_time:.3f}s")
+
+    # Current approach: one formula fit per portfolio
+    start_time = time.perf_counter()
+    fits = []
+    for (signal, num_bins, bin), portfolio in regression_data.partition_by(
+        by, as_dict=True
+    ).items():
+        model = smf.ols(f"return_rf ~ {' + '.join(FF5_FACTORS)}", portfolio)
+        fit = (
+            model.fit()
+            if args.maxlags is None
+            else model.fit(cov_type="HAC", cov_kwds={"maxlags": args.maxlags})
+        )
+        fits.append(
+            pl.DataFrame(
+                {
+                    "signal": signal,
+                    "num_bins": num_bins,
+                    "bin": bin,
+                    "variable": fit.params.index,
+                    "statsmodels_tstat": fit.tvalues.values,
+                }
+            )
+        )
+    print(f"statsmodels: {time.perf_counter() - start_time:.3f}s")
+
+    max_difference = (
+        batched.join(pl.concat(fits), on=[*by, "variable"])
+        .select((pl.col("tstat") - pl.col("statsmodels_tstat")).abs().max())
+        .item()
+    )
+    print(f"Max t-stat difference: {max_difference:.2e}")
@@ -0,0 +1,164 @@
+import argparse
+import datetime as dt
+import time
+from itertools import product
+
+import polars as pl
+
+from research.data import HORIZONS
+
+# Reversal signals in research.signals.SIGNALS compared by default
+REVERSAL_SIGNALS = [
+    "reversal",
+    "barra_reversal",
+    "winsorized_barra_reversal",
+    "volume_adjusted_barra_reversal",
+    "winsorized_volume_adjusted_barra_reversal",
+]
+
+
+def compute_ics(
+    data: pl.DataFrame | pl.LazyFrame,
+    signals: list[str],
+    horizons: list[int] = HORIZONS,
+) -> pl.DataFrame:
+    """Per-date Pearson and rank ICs of every signal at every horizon.
+
+    ``data`` has ``date``, one column per signal and one ``fwd_return_{h}``
+    column per horizon, as returned by ``research.data.load_forward_returns``.
+    Null and non-finite values are dropped pairwise, as in
+    ``sfp.generate_alpha_ics``: each signal/horizon pair is masked to the rows
+    where both the signal and the return are present before it is ranked, so
+    both ranks come from the same sample. All pairs are then correlated in a
+    single group-by over dates.
+
+    ``fwd_return_{h}`` is the return over the ``h`` days after ``date``, so
+    ``horizons=[22]`` matches ``sfp.generate_alpha_ics(..., window=22)``.
+
+    Returns
+    -------
+    pl.DataFrame
+        ``date``, ``signal``, ``horizon``, ``n``, ``pearson_ic`` and ``rank_ic``.
+    """
+    returns = [f"fwd_return_{horizon}" for horizon in horizons]
+    columns = list(dict.fromkeys([*signals, *returns]))
+    pairs = pl.DataFrame(
+        [
+            {"pair": str(i), "signal": signal, "horizon": horizon}
+            for i, (signal, horizon) in enumerate(product(signals, horizons))
+        ]
+    )
+
+    # Signal and return of every pair, on the rows where both are present
+    finite = data.lazy().select(
+        "date",
+        *(
+            pl.when(pl.col(column).is_finite()).then(pl.col(column)).alias(column)
+            for column in columns
+        ),
+    )
+    masked = []
+    for pair, signal, horizon in pairs.iter_rows():
+        forward_return = f"fwd_return_{horizon}"
+        complete = pl.col(signal).is_not_null() & pl.col(forward_return).is_not_null()
+        masked += [
+            pl.when(complete).then(pl.col(signal)).alias(f"{pair}_signal"),
+            pl.when(complete).then(pl.col(forward_return)).alias(f"{pair}_return"),
+        ]
+    pair_columns = [
+        f"{pair}_{side}" for pair in pairs["pair"] for side in ["signal", "return"]
+    ]
+
+    # Ranks of every pair's columns, computed once per date
+    ranked = finite.select("date", *masked).with_columns(
+        pl.col(pair_columns).rank(method="average").over("date").name.suffix("_rank")
+    )
+
+    # Every pair's count and correlations in one pass over dates
+    aggregations = [
+        pl.struct(
+            pl.col(f"{pair}_signal").count().alias("n"),
+            pl.corr(f"{pair}_signal", f"{pair}_return").alias("pearson_ic"),
+            pl.corr(f"{pair}_signal_rank", f"{pair}_return_rank").alias("rank_ic"),
+        ).alias(pair)
+        for pair in pairs["pair"]
+    ]
+
+    return (
+        ranked.group_by("date")
+        .agg(aggregations)
+        .collect()
+        .unpivot(index="date", variable_name="pair")
+        .unnest("value")
+        .join(pairs, on="pair")
+        .select("date", "signal", "horizon", "n", "pearson_ic", "rank_ic")
+        .sort("signal", "horizon", "date")
+    )
+
+
+def rolling_ics(
+    ics: pl.DataFrame, windows: tuple[int, ...] = (22, 63, 252)
+) -> pl.DataFrame:
+    """Add trailing ``window``-date means of the Pearson and rank ICs.
+
+    Each mean is a running sum over the dates of a signal and horizon, so it
+    costs O(1) per date for any window length. Adds ``pearson_ic_{window}``
+    and ``rank_ic_{window}``.
+    """
+    return ics.sort("signal", "horizon", "date").with_columns(
+        pl.col(method)
+        .rolling_mean(window_size=window)
+        .over("signal", "horizon")
+        .alias(f"{method}_{window}")
+        for method in ["pearson_ic", "rank_ic"]
+        for window in windows
+    )
+
+
+def summarize_ics(ics: pl.DataFrame) -> pl.DataFrame:
+    """IC decay table: mean, IR and t-stat of each signal at each horizon.
+
+    The t-stats ignore the overlap of multi-day forward returns and are
+    overstated for ``horizon > 1``.
+    """
+    return (
+        ics.group_by("signal", "horizon")
+        .agg(
+            pl.col("rank_ic").count().alias("n_dates"),
+            pl.col("pearson_ic").mean().alias("mean_pearson_ic"),
+            pl.col("rank_ic").mean().alias("mean_rank_ic"),
+            pl.col("rank_ic").mean().truediv(pl.col("rank_ic").std()).alias("rank_ir"),
+        )
+        .with_columns(
+            pl.col("rank_ir").mul(pl.col("n_dates").sqrt()).alias("rank_t_stat")
+        )
+        .sort("signal", "horizon")
+    )
+
+
+if __name__ == "__main__":
+    from research.data import load_forward_returns
+    from research.signals import load_signals
+
+    parser = argparse.ArgumentParser(
+        description="IC decay of the reversal signals at several horizons."
+    )
+
+    parser.add_argument("--start", type=dt.date.fromisoformat, default="1996-01-01")
+    parser.add_argument("--end", type=dt.date.fromisoformat, default="2024-12-31")
+    parser.add_argument("--signals", nargs="+", default=REVERSAL_SIGNALS)
+    parser.add_argument("--horizons", nargs="+", type=int, default=HORIZONS)
+
+    args = parser.parse_args()
+
+    data = load_signals(start=args.start, end=args.end, names=args.signals).join(
+        load_forward_returns(start=args.start, end=args.end, horizons=args.horizons),
+        on=["date", "barrid"],
+    )
+
+    start_time = time.perf_counter()
+    ics = compute_ics(data, signals=args.signals, horizons=args.horizons)
+    print(f"compute_ics: {time.perf_counter() - start_time:.2f}s")
+
+    with pl.Config(tbl_rows=-1):
+        print(summarize_ics(ics))
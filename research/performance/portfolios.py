@@ -0,0 +1,217 @@
+import argparse
+import datetime as dt
+import glob
+import os
+
+import polars as pl
+
+
+def scan_weights(
+    portfolios: list[tuple[str, float | str]],
+    start: dt.date | None = None,
+    end: dt.date | None = None,
+    weights_dir: str | None = None,
+) -> pl.LazyFrame:
+    """Lazily scan the MVO weights of several signal/gamma pairs.
+
+    ``portfolios`` lists ``(signal, gamma)`` pairs, where ``gamma`` names the
+    directory under ``weights/{signal}`` (e.g. ``160`` or ``"risk_0.05"``).
+    Only the ``{year}.parquet`` files of those directories and of the years in
+    ``[start, end]`` are scanned, and the date filter is pushed into the scan.
+
+    Returns
+    -------
+    pl.LazyFrame
+        ``signal``, ``gamma`` (as a string), ``date``, ``barrid`` and ``weight``.
+    """
+    project_root = os.getenv("PROJECT_ROOT") or os.getcwd()
+    weights_dir = weights_dir or f"{project_root}/weights"
+
+    first_year = start.year if start is not None else dt.MINYEAR
+    last_year = end.year if end is not None else dt.MAXYEAR
+
+    scans = []
+    for signal, gamma in portfolios:
+        paths = [
+            path
+            for path in sorted(glob.glob(f"{weights_dir}/{signal}/{gamma}/*.parquet"))
+            if first_year
+            <= int(os.path.basename(path).removesuffix(".parquet"))
+            <= last_year
+        ]
+        if not paths:
+            raise FileNotFoundError(
+                f"No weights for {signal}/{gamma} in {weights_dir} between {start} and {end}"
+            )
+
+        scans.append(
+            pl.scan_parquet(paths)
+            .select("date", "barrid", "weight")
+            .filter(pl.col("date").is_between(start or dt.date.min, end or dt.date.max))
+            .select(
+                pl.lit(signal).alias("signal"),
+                pl.lit(str(gamma)).alias("gamma"),
+                "date",
+                "barrid",
+                "weight",
+            )
+        )
+
+    return pl.concat(scans)
+
+
+def portfolio_analytics(
+    weights: pl.LazyFrame,
+    forward_returns: pl.LazyFrame | pl.DataFrame,
+    returns: str = "fwd_return_1",
+    min_weight: float = 1e-6,
+) -> pl.DataFrame:
+    """Daily return, drawdown, turnover and holdings of every portfolio in one pass.
+
+    ``weights`` is :func:`scan_weights` output and ``forward_returns`` has
+    ``date``, ``barrid`` and ``returns`` (the next day's return). Each
+    portfolio's weights are aligned with its previous date's weights by a join
+    on the date's position, so assets that enter or leave count toward
+    turnover. All metrics are then aggregated in one group-by over
+    signal, gamma and date. Holdings count weights above ``min_weight`` in
+    absolute value.
+
+    Returns
+    -------
+    pl.DataFrame
+        ``signal``, ``gamma``, ``date``, ``return``, ``cumulative_return``
+        (log, %), ``drawdown``, ``turnover`` (two-sided, null on the first
+        date) and ``holdings``.
+    """
+    # Position of each date within its portfolio
+    positioned = weights.with_columns(
+        pl.col("date").rank(method="dense").over("signal", "gamma").alias("position")
+    )
+    previous = positioned.select(
+        "signal",
+        "gamma",
+        "barrid",
+        pl.col("position").add(1),
+        pl.col("weight").alias("previous_weight"),
+    )
+
+    return (
+        positioned.join(
+            previous,
+            on=["signal", "gamma", "barrid", "position"],
+            how="full",
+            coalesce=True,
+        )
+        .join(
+            forward_returns.lazy().select("date", "barrid", returns),
+            on=["date", "barrid"],
+            how="left",
+        )
+        .group_by("signal", "gamma", "position")
+        .agg(
+            pl.col("date").drop_nulls().first(),
+            pl.col("weight").mul(pl.col(returns)).sum().alias("return"),
+            pl.col("weight")
+            .fill_null(0)
+            .sub(pl.col("previous_weight").fill_null(0))
+            .abs()
+            .sum()
+            .alias("turnover"),
+            pl.col("weight").abs().gt(min_weight).sum().alias("holdings"),
+        )
+        # Drop the step after each portfolio's last date
+        .drop_nulls("date")
+        .sort("signal", "gamma", "date")
+        .with_columns(
+            pl.when(pl.col("position").gt(1)).then(pl.col("turnover")),
+            pl.col("return")
+            .log1p()
+            .cum_sum()
+            .over("signal", "gamma")
+            .alias("log_wealth"),
+        )
+        .with_columns(
+            pl.col("log_wealth").mul(100).alias("cumulative_return"),
+            pl.col("log_wealth")
+            .sub(pl.col("log_wealth").cum_max().over("signal", "gamma"))
+            .exp()
+            .sub(1)
+            .alias("drawdown"),
+        )
+        .select(
+            "signal",
+            "gamma",
+            "date",
+            "return",
+            "cumulative_return",
+            "drawdown",
+            "turnover",
+            "holdings",
+        )
+        .collect()
+    )
+
+
+def summarize_portfolios(daily: pl.DataFrame) -> pl.DataFrame:
+    """Annualized return, volatility and Sharpe, max drawdown, turnover and holdings.
+
+    The MVO weights are active, so ``volatility`` is the realized active risk
+    and ``sharpe`` the information ratio.
+    """
+    return (
+        daily.group_by("signal", "gamma")
+        .agg(
+            pl.len().alias("n_dates"),
+            pl.col("return").mean().mul(252).alias("mean_return"),
+            pl.col("return").std().mul(pl.lit(252).sqrt()).alias("volatility"),
+            pl.col("drawdown").min().alias("max_drawdown"),
+            pl.col("turnover").mean().alias("mean_turnover"),
+            pl.col("holdings").mean().alias("mean_holdings"),
+        )
+        .with_columns(
+            pl.col("mean_return").truediv(pl.col("volatility")).alias("sharpe")
+        )
+        .select(
+            "signal",
+            "gamma",
+            "n_dates",
+            "mean_return",
+            "volatility",
+            "sharpe",
+            "max_drawdown",
+            "mean_turnover",
+            "mean_holdings",
+        )
+        .sort("signal", "gamma")
+    )
+
+
+if __name__ == "__main__":
+    from research.data import load_forward_returns
+
+    parser = argparse.ArgumentParser(
+        description="Summarize the MVO backtests of several signal/gamma pairs."
+    )
+
+    parser.add_argument(
+        "--portfolios",
+        nargs="+",
+        required=True,
+        help="Weights directories as signal/gamma, e.g. barra_reversal/160",
+    )
+    parser.add_argument("--start", type=dt.date.fromisoformat, default="1996-01-01")
+    parser.add_argument("--end", type=dt.date.fromisoformat, default="2024-12-31")
+
+    args = parser.parse_args()
+
+    analytics = portfolio_analytics(
+        scan_weights(
+            [tuple(portfolio.split("/")) for portfolio in args.portfolios],
+            start=args.start,
+            end=args.end,
+        ),
+        load_forward_returns(start=args.start, end=args.end),
+    )
+
+    with pl.Config(tbl_rows=-1, tbl_cols=-1):
+        print(summarize_portfolios(analytics))
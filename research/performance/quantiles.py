@@ -0,0 +1,196 @@
+import argparse
+import datetime as dt
+import time
+from itertools import product
+
+import polars as pl
+
+from research.performance.ics import REVERSAL_SIGNALS
+
+
+def quantile_returns(
+    data: pl.DataFrame | pl.LazyFrame,
+    signals: list[str],
+    num_bins: list[int] | None = None,
+    returns: str = "return",
+    weight: str | None = None,
+    target_volatility: float | None = None,
+) -> pl.DataFrame:
+    """Daily quantile portfolio returns of every signal at every bin count.
+
+    Each signal is ranked once per date. An asset's bin out of ``k`` is the
+    number of interpolated quantile breaks below its rank, so the bins match
+    ``qcut(k).over("date")`` and tied assets share a bin. The bins of all
+    signals and bin counts are then averaged in a single group-by,
+    equal-weighted or weighted by ``weight``.
+
+    ``returns`` must be realized after the signal is known, e.g. a lagged
+    signal with same-day returns or a signal with ``fwd_return_1``. With
+    ``target_volatility`` (annualized), each portfolio is scaled to that full
+    sample volatility before the spread is taken. ``num_bins`` defaults to
+    quintiles.
+
+    Returns
+    -------
+    pl.DataFrame
+        ``date``, ``signal``, ``num_bins``, ``bin`` and ``return``, where
+        ``bin`` is ``"0"`` to ``str(k - 1)`` or ``"spread"`` (top minus bottom).
+    """
+    num_bins = num_bins or [5]
+    weights = [weight] if weight is not None else []
+    portfolios = pl.DataFrame(
+        [
+            {"portfolio": str(i), "signal": signal, "num_bins": k}
+            for i, (signal, k) in enumerate(product(signals, num_bins))
+        ]
+    )
+
+    # Ranks and counts of every signal, computed once per date
+    ranked = (
+        data.lazy()
+        .select(
+            "date",
+            returns,
+            *weights,
+            *(
+                pl.when(pl.col(signal).is_finite()).then(pl.col(signal)).alias(signal)
+                for signal in signals
+            ),
+        )
+        .with_columns(
+            pl.col(signals).rank(method="min").over("date").name.suffix("_rank"),
+            pl.col(signals).count().over("date").name.suffix("_count"),
+        )
+    )
+
+    # Bin of every asset in every portfolio, stacked for one group-by
+    binned = ranked.select(
+        "date",
+        returns,
+        *weights,
+        *(
+            pl.col(f"{signal}_rank")
+            .cast(pl.Int64)
+            .sub(1)
+            .mul(k)
+            .sub(1)
+            .floordiv(pl.col(f"{signal}_count").sub(1).clip(lower_bound=1))
+            .clip(lower_bound=0)
+            .cast(pl.Int32)
+            .alias(portfolio)
+            for portfolio, signal, k in portfolios.iter_rows()
+        ),
+    ).unpivot(
+        index=["date", returns, *weights], variable_name="portfolio", value_name="bin"
+    )
+
+    if weight is None:
+        bin_return = pl.col(returns).mean()
+    else:
+        held = pl.col(returns).is_not_null() & pl.col(weight).is_not_null()
+        bin_return = (
+            pl.col(returns)
+            .mul(pl.col(weight))
+            .sum()
+            .truediv(pl.col(weight).filter(held).sum())
+        )
+
+    bin_returns = (
+        binned.drop_nulls("bin")
+        .group_by("date", "portfolio", "bin")
+        .agg(bin_return.alias("return"))
+        .collect()
+        .join(portfolios, on="portfolio")
+    )
+
+    if target_volatility is not None:
+        bin_returns = bin_returns.with_columns(
+            pl.col("return")
+            .truediv(pl.col("return").std().mul(252**0.5 / target_volatility))
+            .over("signal", "num_bins", "bin")
+        )
+
+    spreads = (
+        bin_returns.group_by("date", "signal", "num_bins")
+        .agg(
+            pl.col("return").filter(pl.col("bin").eq(pl.col("num_bins") - 1)).first()
+            - pl.col("return").filter(pl.col("bin").eq(0)).first()
+        )
+        .drop_nulls("return")
+        .with_columns(pl.lit("spread").alias("bin"))
+    )
+
+    return (
+        pl.concat(
+            [
+                bin_returns.with_columns(pl.col("bin").cast(pl.String)),
+                spreads,
+            ],
+            how="diagonal",
+        )
+        .select(
+            "date",
+            "signal",
+            "num_bins",
+            "bin",
+            "return",
+        )
+        .sort("signal", "num_bins", "bin", "date")
+    )
+
+
+def cumulative_quantile_returns(returns: pl.DataFrame) -> pl.DataFrame:
+    """Add the cumulative log return (%) of each portfolio for charting."""
+    return returns.sort("signal", "num_bins", "bin", "date").with_columns(
+        pl.col("return")
+        .log1p()
+        .cum_sum()
+        .mul(100)
+        .over("signal", "num_bins", "bin")
+        .alias("cumulative_return")
+    )
+
+
+def summarize_quantile_returns(returns: pl.DataFrame) -> pl.DataFrame:
+    """Annualized mean return, volatility and Sharpe of each portfolio."""
+    return (
+        returns.group_by("signal", "num_bins", "bin")
+        .agg(
+            pl.col("return").mean().mul(252).alias("mean_return"),
+            pl.col("return").std().mul(pl.lit(252).sqrt()).alias("volatility"),
+        )
+        .with_columns(
+            pl.col("mean_return").truediv(pl.col("volatility")).alias("sharpe")
+        )
+        .sort("signal", "num_bins", "bin", descending=[False, False, True])
+    )
+
+
+if __name__ == "__main__":
+    from research.data import load_forward_returns
+    from research.signals import load_signals
+
+    parser = argparse.ArgumentParser(
+        description="Quantile backtests of the reversal signals at several bin counts."
+    )
+
+    parser.add_argument("--start", type=dt.date.fromisoformat, default="1996-01-01")
+    parser.add_argument("--end", type=dt.date.fromisoformat, default="2024-12-31")
+    parser.add_argument("--signals", nargs="+", default=REVERSAL_SIGNALS)
+    parser.add_argument("--num_bins", nargs="+", type=int, default=[5, 10])
+
+    args = parser.parse_args()
+
+    data = load_signals(start=args.start, end=args.end, names=args.signals).join(
+        load_forward_returns(start=args.start, end=args.end, horizons=[1]),
+        on=["date", "barrid"],
+    )
+
+    start_time = time.perf_counter()
+    returns = quantile_returns(
+        data, signals=args.signals, num_bins=args.num_bins, returns="fwd_return_1"
+    )
+    print(f"quantile_returns: {time.perf_counter() - start_time:.2f}s")
+
+    with pl.Config(tbl_rows=-1):
+        print(summarize_quantile_returns(returns))
@@ -0,0 +1,88 @@
+import polars as pl
+from scipy import stats
+
+
+def grouped_regressions(
+    data: pl.DataFrame | pl.LazyFrame,
+    y: str,
+    x: str,
+    by: list[str],
+    confidence: float = 0.95,
+) -> pl.DataFrame:
+    """Simple regression of ``y`` on ``x`` within every ``by`` group, in one group-by.
+
+    Each group is reduced to its count, means, variances and covariance, from
+    which the OLS intercept, slope, standard errors and the slope's confidence
+    interval follow in closed form. Rows with a null ``x`` or ``y`` are
+    dropped, as in ``smf.ols(f"{y} ~ {x}", group).fit()``, whose estimates and
+    ``conf_int(alpha=1 - confidence)`` this matches.
+
+    Returns
+    -------
+    pl.DataFrame
+        The ``by`` columns, ``n``, ``intercept``, ``intercept_std_error``,
+        ``slope``, ``slope_std_error``, ``slope_tstat``, ``ci_lower`` and
+        ``ci_upper``, sorted by ``by``.
+    """
+    moments = (
+        data.lazy()
+        .drop_nulls([x, y])
+        .group_by(by)
+        .agg(
+            pl.len().cast(pl.Int64).alias("n"),
+            pl.col(x).mean().alias("mean_x"),
+            pl.col(y).mean().alias("mean_y"),
+            pl.col(x).var().alias("var_x"),
+            pl.col(y).var().alias("var_y"),
+            pl.cov(x, y).alias("cov_xy"),
+        )
+    )
+
+    # Residual variance from the sums of squares, (n - 1) * (var_y - cov² / var_x)
+    sum_xx = pl.col("var_x").mul(pl.col("n") - 1)
+    residual_variance = (
+        pl.col("var_y")
+        .sub(pl.col("cov_xy").pow(2).truediv(pl.col("var_x")))
+        .mul(pl.col("n") - 1)
+        .truediv(pl.col("n") - 2)
+    )
+
+    results = (
+        moments.with_columns(pl.col("cov_xy").truediv(pl.col("var_x")).alias("slope"))
+        .with_columns(
+            pl.col("mean_y")
+            .sub(pl.col("slope").mul(pl.col("mean_x")))
+            .alias("intercept"),
+            residual_variance.truediv(sum_xx).sqrt().alias("slope_std_error"),
+            residual_variance.mul(
+                pl.col("n").cast(pl.Float64).pow(-1)
+                + pl.col("mean_x").pow(2).truediv(sum_xx)
+            )
+            .sqrt()
+            .alias("intercept_std_error"),
+        )
+        .with_columns(
+            pl.col("slope").truediv(pl.col("slope_std_error")).alias("slope_tstat")
+        )
+        .sort(by)
+        .collect()
+    )
+
+    # Two-sided t critical value with n - 2 degrees of freedom
+    critical = stats.t.ppf(0.5 + confidence / 2, results["n"].to_numpy() - 2)
+    margin = results["slope_std_error"] * critical
+
+    return results.with_columns(
+        (pl.col("slope") - margin).alias("ci_lower"),
+        (pl.col("slope") + margin).alias("ci_upper"),
+    ).select(
+        *by,
+        "n",
+        "intercept",
+        "intercept_std_error",
+        "slope",
+        "slope_std_error",
+        "slope_tstat",
+        "ci_lower",
+        "ci_upper",
+    )
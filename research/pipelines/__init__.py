@@ -1 +1,4 @@
 # Each file is for downloading a dataset used in research
+from .alphas import collect, scan_alphas
+
+__all__ = ["collect", "scan_alphas"]
@@ -0,0 +1,133 @@
+import datetime as dt
+
+import polars as pl
+
+from research.data import PERCENT_COLUMNS, forward_return_exprs, scan_assets
+from research.signals import compute_signals, required_columns
+
+
+def scan_alphas(
+    start: dt.date,
+    end: dt.date,
+    signal: pl.Expr | str,
+    columns: list[str],
+    price_filter: float = 5,
+    IC: float = 0.05,
+    filters: list[pl.Expr] | None = None,
+    transforms: list[pl.Expr] | None = None,
+    alpha: pl.Expr | None = None,
+    horizons: list[int] | None = None,
+) -> tuple[pl.LazyFrame, pl.LazyFrame]:
+    """Build the load -> signal -> filter -> score -> alpha graph lazily.
+
+    The asset panel is sorted by barrid and date once. The signal and the
+    forward returns are both computed on that sorted panel, so the two returned
+    frames share one scan and should be collected together with :func:`collect`.
+
+    Parameters
+    ----------
+    signal : pl.Expr or str
+        Signal expression evaluated on the barrid-sorted panel, or the name of
+        a signal in ``research.signals.SIGNALS``. The output name is used as
+        the signal column.
+    columns : list of str
+        Asset columns to scan. ``date``, ``barrid``, ``price`` and ``return``
+        are always included.
+    filters : list of pl.Expr, optional
+        Extra universe filters applied with the price and null filters.
+    transforms : list of pl.Expr, optional
+        Expressions applied in order after the ``score`` column is computed,
+        e.g. clipping the score or adding volume features.
+    alpha : pl.Expr, optional
+        Alpha expression. Defaults to ``score * IC * specific_risk``.
+    horizons : list of int, optional
+        Extra forward return horizons, added to the forward returns as
+        ``fwd_return_{h}`` (see ``research.data.forward_return_exprs``).
+
+    Returns
+    -------
+    tuple of pl.LazyFrame
+        Alphas (``date``, ``barrid``, ``alpha`` and ``predicted_beta`` when
+        scanned) and forward returns (``date``, ``barrid``, ``fwd_return`` and
+        ``fwd_return_{h}`` for each horizon).
+    """
+    if isinstance(signal, str):
+        signal_name = signal
+        columns = [*columns, *required_columns([signal])]
+    else:
+        signal_name = signal.meta.output_name()
+    columns = list(dict.fromkeys(["date", "barrid", "price", "return", *columns]))
+
+    # Load and sort once, everything downstream is evaluated per barrid
+    panel = (
+        scan_assets(start=start, end=end, columns=columns, in_universe=True)
+        .with_columns(
+            pl.col(col).truediv(100) for col in PERCENT_COLUMNS if col in columns
+        )
+        .sort("barrid", "date")
+        .with_columns(
+            pl.col("price").shift(1).over("barrid").alias("lagged_price"),
+            forward_return_exprs([1])[0].alias("fwd_return"),
+            *forward_return_exprs(horizons or []),
+        )
+    )
+    panel = (
+        compute_signals(panel, [signal])
+        if isinstance(signal, str)
+        else panel.with_columns(signal)
+    )
+
+    # Filter universe
+    filtered = panel.filter(
+        pl.col("lagged_price").gt(price_filter),
+        pl.col(signal_name).is_not_null(),
+        *[
+            pl.col(col).is_not_null()
+            for col in ["predicted_beta", "specific_risk"]
+            if col in columns
+        ],
+        *(filters or []),
+    )
+
+    # Compute scores
+    scores = filtered.with_columns(
+        pl.col(signal_name)
+        .sub(pl.col(signal_name).mean())
+        .truediv(pl.col(signal_name).std())
+        .over("date")
+        .alias("score")
+    )
+    for transform in transforms or []:
+        scores = scores.with_columns(transform)
+
+    # Compute alphas
+    alpha = alpha if alpha is not None else pl.col("score").mul(IC).mul("specific_risk")
+    alphas = (
+        scores.with_columns(alpha.alias("alpha"))
+        .select(
+            "date",
+            "barrid",
+            "alpha",
+            *(["predicted_beta"] if "predicted_beta" in columns else []),
+        )
+        .sort("date", "barrid")
+    )
+
+    # Get forward returns
+    forward_returns = panel.select(
+        "date",
+        "barrid",
+        "fwd_return",
+        *[f"fwd_return_{horizon}" for horizon in horizons or []],
+    ).drop_nulls("fwd_return")
+
+    return alphas, forward_returns
+
+
+def collect(*frames: pl.LazyFrame, streaming: bool = False) -> list[pl.DataFrame]:
+    """Collect lazy frames in one pass so shared subplans are evaluated once.
+
+    ``streaming=True`` runs the query on the streaming engine, which processes
+    the panel in batches instead of materializing it.
+    """
+    return pl.collect_all(frames, engine="streaming" if streaming else "auto")
@@ -0,0 +1,42 @@
+from .barra_reversal import barra_reversal
+from .cross_section import chain, clip, cross_sectional, rank, winsorize, zscore
+from .incremental import IncrementalSignals
+from .registry import SIGNALS, Signal, compute_signals, required_columns
+from .reversal import reversal
+from .store import definition_hash, evict, invalidate, load_signals
+from .volume_adjusted_barra_reversal import (
+    barra_reversal_score,
+    dollar_volume,
+    dollar_volume_score,
+    volume_adjusted_barra_reversal,
+)
+from .winsorized_barra_reversal import winsorized_barra_reversal
+from .winsorized_volume_adjusted_barra_reversal import (
+    winsorized_volume_adjusted_barra_reversal,
+)
+
+__all__ = [
+    "SIGNALS",
+    "Signal",
+    "compute_signals",
+    "required_columns",
+    "definition_hash",
+    "evict",
+    "invalidate",
+    "load_signals",
+    "IncrementalSignals",
+    "cross_sectional",
+    "chain",
+    "zscore",
+    "clip",
+    "winsorize",
+    "rank",
+    "reversal",
+    "barra_reversal",
+    "winsorized_barra_reversal",
+    "barra_reversal_score",
+    "dollar_volume",
+    "dollar_volume_score",
+    "volume_adjusted_barra_reversal",
+    "winsorized_volume_adjusted_barra_reversal",
+]
@@ -0,0 +1,113 @@
+from dataclasses import dataclass
+from typing import Callable, TypeVar
+
+import polars as pl
+
+from .barra_reversal import barra_reversal
+from .reversal import reversal
+from .volume_adjusted_barra_reversal import (
+    barra_reversal_score,
+    dollar_volume,
+    dollar_volume_score,
+    volume_adjusted_barra_reversal,
+)
+from .winsorized_barra_reversal import winsorized_barra_reversal
+from .winsorized_volume_adjusted_barra_reversal import (
+    winsorized_volume_adjusted_barra_reversal,
+)
+
+Frame = TypeVar("Frame", pl.DataFrame, pl.LazyFrame)
+
+
+@dataclass(frozen=True)
+class Signal:
+    """A registered signal expression and what it is computed from.
+
+    ``dependencies`` are other registered signals that must exist as columns
+    before ``expr`` is evaluated, ``columns`` are the asset columns it reads.
+    """
+
+    expr: Callable[[], pl.Expr]
+    dependencies: tuple[str, ...] = ()
+    columns: tuple[str, ...] = ()
+
+
+SIGNALS: dict[str, Signal] = {
+    "reversal": Signal(reversal, columns=("return",)),
+    "barra_reversal": Signal(barra_reversal, columns=("specific_return",)),
+    "winsorized_barra_reversal": Signal(
+        winsorized_barra_reversal, dependencies=("barra_reversal",)
+    ),
+    "barra_reversal_score": Signal(
+        barra_reversal_score, dependencies=("barra_reversal",)
+    ),
+    "dollar_volume": Signal(dollar_volume, columns=("daily_volume", "price")),
+    "dollar_volume_score": Signal(dollar_volume_score, dependencies=("dollar_volume",)),
+    "volume_adjusted_barra_reversal": Signal(
+        volume_adjusted_barra_reversal,
+        dependencies=("barra_reversal", "barra_reversal_score", "dollar_volume_score"),
+    ),
+    "winsorized_volume_adjusted_barra_reversal": Signal(
+        winsorized_volume_adjusted_barra_reversal,
+        dependencies=("volume_adjusted_barra_reversal",),
+    ),
+}
+
+
+def _levels(names: list[str]) -> list[list[str]]:
+    """Group the requested signals and their dependencies by dependency depth."""
+    depths: dict[str, int] = {}
+
+    def depth(name: str, path: tuple[str, ...] = ()) -> int:
+        if name in path:
+            raise ValueError(
+                f"Circular signal dependency: {' -> '.join(path + (name,))}"
+            )
+        if name not in SIGNALS:
+            raise ValueError(f"Unknown signal: {name}")
+        if name not in depths:
+            depths[name] = 1 + max(
+                (depth(dep, path + (name,)) for dep in SIGNALS[name].dependencies),
+                default=-1,
+            )
+        return depths[name]
+
+    for name in names:
+        depth(name)
+
+    levels = [[] for _ in range(max(depths.values(), default=-1) + 1)]
+    for name, level in depths.items():
+        levels[level].append(name)
+
+    return levels
+
+
+def required_columns(names: list[str]) -> list[str]:
+    """Asset columns needed to compute the given signals."""
+    columns = ["date", "barrid"]
+    for level in _levels(names):
+        for name in level:
+            columns.extend(SIGNALS[name].columns)
+
+    return list(dict.fromkeys(columns))
+
+
+def compute_signals(
+    data: Frame, names: list[str], keep_dependencies: bool = False
+) -> Frame:
+    """Compute a set of registered signals in one fused pass.
+
+    Each dependency is evaluated once no matter how many requested signals use
+    it, and all signals at the same dependency depth are evaluated in a single
+    ``with_columns`` so Polars can share their window groups. ``data`` must be
+    sorted by date within barrid.
+    """
+    levels = _levels(names)
+
+    for level in levels:
+        data = data.with_columns(SIGNALS[name].expr() for name in level)
+
+    if keep_dependencies:
+        return data
+
+    return data.drop(name for level in levels for name in level if name not in names)
@@ -0,0 +1,245 @@
+import argparse
+import datetime as dt
+import hashlib
+import json
+import os
+import shutil
+import time
+from pathlib import Path
+
+import polars as pl
+from dotenv import load_dotenv
+
+from research.data import PERCENT_COLUMNS, data_version, scan_assets
+from research.signals.registry import SIGNALS, compute_signals, required_columns
+
+load_dotenv()
+
+# Default size limit of the store before least recently used entries are evicted
+MAX_STORE_BYTES = 20 * 1024**3
+
+# Bumped when stored values change without a signal definition changing
+STORE_VERSION = 2
+
+
+def get_store_dir() -> Path:
+    """Root directory of the materialized signal store."""
+    project_root = os.getenv("PROJECT_ROOT") or "."
+    return Path(project_root) / "cache" / "signals"
+
+
+def definition_hash(name: str) -> str:
+    """Hash of a signal's expression and the expressions it depends on.
+
+    Changing a parameter such as ``ewm_mean(span=5)`` changes the hash of that
+    signal and of every signal built on it, and nothing else.
+    """
+    signal = SIGNALS[name]
+    key = json.dumps(
+        {
+            "expr": signal.expr().meta.serialize(format="json"),
+            "dependencies": {dep: definition_hash(dep) for dep in signal.dependencies},
+        }
+    )
+    return hashlib.sha1(key.encode()).hexdigest()[:16]
+
+
+def _entry_dir(store_dir: Path, name: str, version: str) -> Path:
+    key = hashlib.sha1(
+        f"{STORE_VERSION}-{definition_hash(name)}-{version}".encode()
+    ).hexdigest()[:16]
+    return store_dir / name / key
+
+
+def _read_meta(entry_dir: Path) -> dict | None:
+    meta_path = entry_dir / "meta.json"
+    if not meta_path.exists():
+        return None
+    with open(meta_path) as f:
+        return json.load(f)
+
+
+def _write_meta(entry_dir: Path, meta: dict) -> None:
+    temp_path = entry_dir / "meta.json.tmp"
+    with open(temp_path, "w") as f:
+        json.dump(meta, f, indent=2)
+    os.replace(temp_path, entry_dir / "meta.json")
+
+
+def _write_entry(entry_dir: Path, signals: pl.DataFrame, name: str) -> None:
+    """Write one signal as ``date, barrid, value`` partitioned by year."""
+    entry_dir.mkdir(parents=True, exist_ok=True)
+    values = signals.select(
+        "date",
+        "barrid",
+        pl.col(name).alias("value"),
+        pl.col("date").dt.year().alias("year"),
+    )
+
+    size = 0
+    for (year,), partition in values.partition_by(
+        "year", as_dict=True, include_key=False
+    ).items():
+        partition_dir = entry_dir / f"year={year}"
+        partition_dir.mkdir(exist_ok=True)
+        partition.write_parquet(partition_dir / "part-0.parquet")
+        size += (partition_dir / "part-0.parquet").stat().st_size
+
+    _write_meta(
+        entry_dir,
+        {
+            "signal": name,
+            "definition": definition_hash(name),
+            "size": size,
+            "last_access": time.time(),
+        },
+    )
+
+
+def evict(
+    store_dir: Path | None = None,
+    max_bytes: int = MAX_STORE_BYTES,
+    keep: list[Path] | None = None,
+) -> None:
+    """Remove least recently used entries until the store fits in ``max_bytes``.
+
+    Entries in ``keep`` are never removed.
+    """
+    store_dir = store_dir or get_store_dir()
+    entries = [
+        (entry_dir, meta)
+        for entry_dir in store_dir.glob("*/*")
+        if (meta := _read_meta(entry_dir)) is not None
+    ]
+    entries.sort(key=lambda entry: entry[1]["last_access"])
+
+    total = sum(meta["size"] for _, meta in entries)
+    for entry_dir, meta in entries:
+        if total <= max_bytes:
+            break
+        if entry_dir in (keep or []):
+            continue
+        shutil.rmtree(entry_dir)
+        total -= meta["size"]
+
+
+def invalidate(names: list[str] | None = None, store_dir: Path | None = None) -> None:
+    """Delete every stored entry of the given signals, or of all signals."""
+    store_dir = store_dir or get_store_dir()
+    signal_dirs = (
+        [store_dir / name for name in names]
+        if names is not None
+        else [path for path in store_dir.glob("*") if path.is_dir()]
+    )
+    for signal_dir in signal_dirs:
+        if signal_dir.exists():
+            shutil.rmtree(signal_dir)
+
+
+def load_signals(
+    start: dt.date,
+    end: dt.date,
+    names: list[str],
+    in_universe: bool = True,
+    store_dir: Path | None = None,
+    max_bytes: int = MAX_STORE_BYTES,
+    verbose: bool = True,
+) -> pl.LazyFrame:
+    """Load registered signals from the store, computing and storing misses.
+
+    Entries are keyed by the signal's definition hash and the version of the
+    cached asset columns it is computed from, so stale entries are never read
+    and a signal's entry is shared by every request that includes it. Misses
+    are computed together in one fused pass.
+
+    Returns
+    -------
+    pl.LazyFrame
+        ``date``, ``barrid`` and one column per requested signal.
+    """
+    store_dir = store_dir or get_store_dir()
+    columns = required_columns(names)
+
+    # Signals are computed in decimal units, as in research.pipelines
+    panel = scan_assets(
+        start=start,
+        end=end,
+        columns=columns,
+        in_universe=in_universe,
+        verbose=verbose,
+    ).with_columns(
+        pl.col(col).truediv(100) for col in PERCENT_COLUMNS if col in columns
+    )
+
+    # Each signal is keyed by the version of its own columns, so its entry does
+    # not depend on which other signals are requested with it
+    entry_dirs = {
+        name: _entry_dir(
+            store_dir,
+            name,
+            data_version(
+                start=start,
+                end=end,
+                columns=required_columns([name]),
+                in_universe=in_universe,
+            ),
+        )
+        for name in names
+    }
+    misses = [
+        name for name, entry_dir in entry_dirs.items() if _read_meta(entry_dir) is None
+    ]
+
+    if misses:
+        signals = compute_signals(panel.sort("barrid", "date"), misses).collect()
+        for name in misses:
+            _write_entry(entry_dirs[name], signals, name)
+        evict(store_dir, max_bytes, keep=list(entry_dirs.values()))
+
+    if verbose:
+        print(
+            f"Signal store: {len(names) - len(misses)} hits, {len(misses)} misses"
+            + (f" (computed {', '.join(misses)})" if misses else "")
+        )
+
+    frames = []
+    for name, entry_dir in entry_dirs.items():
+        meta = _read_meta(entry_dir)
+        meta["last_access"] = time.time()
+        _write_meta(entry_dir, meta)
+
+        frames.append(
+            pl.scan_parquet(
+                str(entry_dir / "year=*" / "*.parquet"), hive_partitioning=False
+            )
+            .filter(pl.col("date").is_between(start, end))
+            .rename({"value": name})
+        )
+
+    signals = frames[0]
+    for frame in frames[1:]:
+        signals = signals.join(frame, on=["date", "barrid"], how="left")
+
+    return signals
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(
+        description="Manage the materialized signal store."
+    )
+
+    parser.add_argument(
+        "--invalidate",
+        nargs="*",
+        help="Signal names to delete from the store (all signals if none are given)",
+    )
+    parser.add_argument(
+        "--max_gb", type=float, help="Evict least recently used entries above this size"
+    )
+
+    args = parser.parse_args()
+
+    if args.invalidate is not None:
+        invalidate(args.invalidate or None)
+    if args.max_gb is not None:
+        evict(max_bytes=int(args.max_gb * 1024**3))
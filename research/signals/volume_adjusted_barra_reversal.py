@@ -1,22 +1,13 @@
 import polars as pl
 
 
-def barra_reversal() -> pl.Expr:
-    return (
-        pl.col("specific_return")
-        .ewm_mean(span=5, min_samples=5)
-        .mul(-1)
-        .shift(1)
-        .over("barrid")
-        .alias("barra_reversal")
-    )
-
-
 def barra_reversal_score() -> pl.Expr:
+    # Cross-sectional z-score within each date, as the experiments score signals
     return (
         pl.col("barra_reversal")
         .sub(pl.col("barra_reversal").mean())
         .truediv(pl.col("barra_reversal").std())
+        .over("date")
         .alias("barra_reversal_score")
     )
 
@@ -26,11 +17,18 @@ def dollar_volume() -> pl.Expr:
 
 
 def dollar_volume_score() -> pl.Expr:
+    # Z-score of each barrid's dollar volume against its own trailing 252 days.
+    # The std is null on a barrid's first day, so it is filled with 1.0 and
+    # floored to avoid dividing by null or zero.
+    mean = pl.col("dollar_volume").rolling_mean(window_size=252, min_samples=1)
+    std = pl.col("dollar_volume").rolling_std(window_size=252, min_samples=2)
     return (
         pl.col("dollar_volume")
-        .rolling_mean(window_size=252, min_samples=1)
-        .truediv(pl.col("dollar_volume").rolling_std(window_size=252, min_samples=2))
-        .alias("dolar_volume_score")
+        .sub(mean)
+        .truediv(std.fill_null(1.0).clip(lower_bound=0.0001))
+        .over("barrid")
+        .fill_null(0.0)
+        .alias("dollar_volume_score")
     )
 
 
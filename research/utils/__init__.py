@@ -1,3 +1,14 @@
-from .backtest import run_backtest_parallel
+from .backtest import combine_alphas, run_backtest_parallel, summarize_gamma_sweep
+from .covariance import FactorCovariance
+from .metrics import summarize_metrics
+from .mvo import calibrate_gamma, factor_mve_optimizer
 
-__all__ = ["run_backtest_parallel"]
+__all__ = [
+    "FactorCovariance",
+    "calibrate_gamma",
+    "combine_alphas",
+    "factor_mve_optimizer",
+    "run_backtest_parallel",
+    "summarize_gamma_sweep",
+    "summarize_metrics",
+]
@@ -1,48 +1,84 @@
+import datetime as dt
 import os
+import queue
+import shutil
 import subprocess
+import sys
 import tempfile
+from concurrent.futures import ThreadPoolExecutor, as_completed
 
 import polars as pl
 from dotenv import load_dotenv
 
+from research.performance import portfolio_analytics, scan_weights, summarize_portfolios
+from research.utils.metrics import run_dir, task_key, write_manifest
+from research.utils.mvo import completed_dates, consolidate_checkpoints
+
 load_dotenv()
 
+# Directory containing the research package, where mvo.py runs as a module
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
-def run_backtest_parallel(
-    data: pl.DataFrame,
-    signal_name: str,
+
+def _gamma_args(
+    gamma: float | list[float], signal_name: str | list[str] | None = None
+) -> list[str]:
+    """mvo.py arguments for a single gamma, a sweep, or one gamma per signal."""
+    if isinstance(signal_name, list):
+        return [
+            "--gammas",
+            *(str(g) for g in gamma),
+            "--signals",
+            *signal_name,
+        ]
+    if isinstance(gamma, list):
+        return ["--gammas", *(str(g) for g in gamma)]
+    return ["--gamma", str(gamma)]
+
+
+def _logs_dir(signal_name: str | list[str], gamma: float | list[float]) -> str:
+    if isinstance(signal_name, list):
+        return "logs/signals"
+    return f"logs/{signal_name}/{'sweep' if isinstance(gamma, list) else gamma}"
+
+
+def _submit_slurm(
+    data_path: str,
+    output_dir: str,
+    tasks: list[list[str]],
+    signal_name: str | list[str],
     constraints: list[str],
-    gamma: float,
+    gamma: float | list[float],
     n_cpus: int,
-):
-    # Get unique years from the alphas data
-    years = sorted(data.select(pl.col("date").dt.year()).unique().to_series().to_list())
-    num_years = len(years)
+    consolidate: bool = False,
+    **kwargs,
+) -> None:
+    """Submit one SLURM array task per year or date chunk.
+
+    With ``consolidate=True`` a dependent job combines the chunk outputs into
+    yearly files once every array task has succeeded. Another dependent job
+    deletes the run's input at ``data_path`` once every array task has ended,
+    whether it succeeded or not, since a resumed run writes a new input.
+    """
+    num_tasks = len(tasks)
 
     # Get super computer job variables
     byu_email = os.getenv("BYU_EMAIL")
     project_root = os.getenv("PROJECT_ROOT")
-    years_str = " ".join(str(y) for y in years)
+    tasks_str = " ".join(f'"{" ".join(task)}"' for task in tasks)
     constraints_str = " ".join(constraints)
-    temp_dir = f"{project_root}/temp"
-    data_path = f"{temp_dir}/alphas.parquet"
-    output_dir = f"{project_root}/weights/{signal_name}/{gamma}"
-    logs_dir = f"logs/{signal_name}/{gamma}"
+    gamma_args_str = " ".join(_gamma_args(gamma, signal_name))
+    logs_dir = _logs_dir(signal_name, gamma)
 
     # Create directories
-    os.makedirs(temp_dir, exist_ok=True)
-    os.makedirs(output_dir, exist_ok=True)
     os.makedirs(logs_dir, exist_ok=True)
 
-    # Save alphas to temporary directory
-    data.write_parquet(data_path)
-
     # Format sbatch_script
     sbatch_script = f"""#!/bin/bash
 #SBATCH --job-name=reversal_backtest
-#SBATCH --output=logs/{signal_name}/{gamma}/backtest_%A_%a.out
-#SBATCH --error=logs/{signal_name}/{gamma}/backtest_%A_%a.err
-#SBATCH --array=0-{num_years - 1}%31
+#SBATCH --output={logs_dir}/backtest_%A_%a.out
+#SBATCH --error={logs_dir}/backtest_%A_%a.err
+#SBATCH --array=0-{num_tasks - 1}%31
 #SBATCH --cpus-per-task={n_cpus}
 #SBATCH --mem=32G
 #SBATCH --time=06:00:00
@@ -53,25 +89,26 @@ export RAY_ACCEL_ENV_VAR_OVERRIDE_ON_ZERO=0
 
 DATA_PATH="{data_path}"
 OUTPUT_DIR="{output_dir}"
-GAMMA="{gamma}"
+GAMMA_ARGS="{gamma_args_str}"
 N_CPUS="{n_cpus}"
 CONSTRAINTS="{constraints_str}"
 
-# Years to process
-years=({years_str})
+# Years or date chunks to process
+tasks=({tasks_str})
 
-num_years=${{#years[@]}}
+num_tasks=${{#tasks[@]}}
 
-if [ $SLURM_ARRAY_TASK_ID -ge $num_years ]; then
-echo "Task ID $SLURM_ARRAY_TASK_ID is out of range (max $((num_years-1)))."
+if [ $SLURM_ARRAY_TASK_ID -ge $num_tasks ]; then
+echo "Task ID $SLURM_ARRAY_TASK_ID is out of range (max $((num_tasks-1)))."
 exit 1
 fi
 
-year=${{years[$SLURM_ARRAY_TASK_ID]}}
+task=${{tasks[$SLURM_ARRAY_TASK_ID]}}
 
+cd {project_root}
 source {project_root}/.venv/bin/activate
-echo "Running year=$year"
-srun python research/utils/mvo.py --data_path "$DATA_PATH" --gamma "$GAMMA" --year "$year" --output_dir "$OUTPUT_DIR" --n_cpus "$N_CPUS" --constraints $CONSTRAINTS
+echo "Running $task"
+srun python -m research.utils.mvo --data_path "$DATA_PATH" $GAMMA_ARGS $task --output_dir "$OUTPUT_DIR" --n_cpus "$N_CPUS" --constraints $CONSTRAINTS
     """
 
     # Write the script to a temporary file and submit it
@@ -82,12 +119,55 @@ srun python research/utils/mvo.py --data_path "$DATA_PATH" --gamma "$GAMMA" --ye
     try:
         # Submit the job using sbatch
         result = subprocess.run(
-            ["sbatch", script_path], capture_output=True, text=True, check=True
+            ["sbatch", "--parsable", script_path],
+            capture_output=True,
+            text=True,
+            check=True,
         )
         print(f"Job submitted successfully!")
         print(f"sbatch output: {result.stdout}")
         if result.stderr:
             print(f"sbatch stderr: {result.stderr}")
+
+        job_id = result.stdout.strip().split(";")[0]
+        if consolidate:
+            result = subprocess.run(
+                [
+                    "sbatch",
+                    "--parsable",
+                    "--job-name=reversal_consolidate",
+                    f"--dependency=afterok:{job_id}",
+                    f"--output={logs_dir}/consolidate_%j.out",
+                    f"--error={logs_dir}/consolidate_%j.err",
+                    "--mem=32G",
+                    "--time=01:00:00",
+                    f"--wrap=cd {project_root} && "
+                    f"source {project_root}/.venv/bin/activate && "
+                    f'python -m research.utils.mvo --consolidate --output_dir "{output_dir}" '
+                    f"{gamma_args_str}",
+                ],
+                capture_output=True,
+                text=True,
+                check=True,
+            )
+            print(f"Consolidation job submitted: {result.stdout}")
+
+        result = subprocess.run(
+            [
+                "sbatch",
+                "--parsable",
+                "--job-name=reversal_cleanup",
+                f"--dependency=afterany:{job_id}",
+                f"--output={logs_dir}/cleanup_%j.out",
+                f"--error={logs_dir}/cleanup_%j.err",
+                "--time=00:10:00",
+                f'--wrap=rm -rf "{data_path}"',
+            ],
+            capture_output=True,
+            text=True,
+            check=True,
+        )
+        print(f"Cleanup job submitted: {result.stdout}")
     except subprocess.CalledProcessError as e:
         print(f"Error submitting job: {e}")
         print(f"stdout: {e.stdout}")
@@ -100,3 +180,393 @@ srun python research/utils/mvo.py --data_path "$DATA_PATH" --gamma "$GAMMA" --ye
         # Clean up the temporary file
         if os.path.exists(script_path):
             os.unlink(script_path)
+
+
+def _run_task(
+    data_path: str,
+    gamma_args: list[str],
+    task: list[str],
+    output_dir: str,
+    n_cpus: int,
+    constraints: list[str],
+    cpus: set[int],
+) -> list[str]:
+    """Run one year or date chunk through the mvo.py entry point, pinned to ``cpus``."""
+    # Keep numerical libraries within the pinned cpus
+    env = {
+        **os.environ,
+        "OMP_NUM_THREADS": str(len(cpus)),
+        "OPENBLAS_NUM_THREADS": str(len(cpus)),
+        "MKL_NUM_THREADS": str(len(cpus)),
+        "POLARS_MAX_THREADS": str(len(cpus)),
+    }
+
+    # Pin the child with taskset before it starts, so every thread it
+    # starts (e.g. thread pools created at import) inherits the cpus.
+    # Popen's preexec_fn is not safe here, since the tasks are launched from
+    # worker threads.
+    pin = (
+        ["taskset", "-c", ",".join(map(str, sorted(cpus)))]
+        if shutil.which("taskset")
+        else []
+    )
+
+    process = subprocess.Popen(
+        [
+            *pin,
+            sys.executable,
+            "-m",
+            "research.utils.mvo",
+            "--data_path",
+            data_path,
+            *gamma_args,
+            *task,
+            "--output_dir",
+            output_dir,
+            "--n_cpus",
+            str(n_cpus),
+            "--constraints",
+            *constraints,
+        ],
+        env=env,
+        cwd=REPO_ROOT,
+    )
+
+    if process.wait() != 0:
+        raise RuntimeError(f"Backtest for {' '.join(task)} failed")
+
+    return task
+
+
+def _run_local(
+    data_path: str,
+    output_dir: str,
+    output_dirs: list[str],
+    tasks: list[list[str]],
+    signal_name: str | list[str],
+    constraints: list[str],
+    gamma: float | list[float],
+    n_cpus: int,
+    n_workers: int | None = None,
+    consolidate: bool = False,
+    **kwargs,
+) -> None:
+    """Run the tasks in local worker processes, each pinned to ``n_cpus`` cpus."""
+    available_cpus = sorted(
+        os.sched_getaffinity(0)
+        if hasattr(os, "sched_getaffinity")
+        else range(os.cpu_count())
+    )
+    n_workers = n_workers or max(1, len(available_cpus) // n_cpus)
+    n_workers = min(n_workers, len(tasks))
+
+    # Each worker slot owns a fixed set of cpus
+    cpu_sets = queue.Queue()
+    for worker in range(n_workers):
+        start = (worker * n_cpus) % len(available_cpus)
+        cpu_sets.put(
+            {available_cpus[(start + i) % len(available_cpus)] for i in range(n_cpus)}
+        )
+
+    def run_pinned(task: list[str]) -> list[str]:
+        cpus = cpu_sets.get()
+        try:
+            return _run_task(
+                data_path=data_path,
+                gamma_args=_gamma_args(gamma, signal_name),
+                task=task,
+                output_dir=output_dir,
+                n_cpus=n_cpus,
+                constraints=constraints,
+                cpus=cpus,
+            )
+        finally:
+            cpu_sets.put(cpus)
+
+    # Workers are separate python processes rather than forks, since Polars'
+    # thread pool does not survive a fork
+    print(f"Running {len(tasks)} tasks on {n_workers} local workers")
+    with ThreadPoolExecutor(max_workers=n_workers) as executor:
+        futures = [executor.submit(run_pinned, task) for task in tasks]
+
+        for future in as_completed(futures):
+            print(f"Finished {' '.join(future.result())}")
+
+    if consolidate:
+        for gamma_dir in output_dirs:
+            consolidate_checkpoints(gamma_dir)
+
+
+def _balance_chunks(data: pl.DataFrame, n_chunks: int) -> list[tuple]:
+    """Split the dates of ``data`` into ``n_chunks`` contiguous chunks of equal cost.
+
+    The cost of a date is its number of assets, which drives the size of each
+    day's optimization. Chunk boundaries are placed where the cumulative cost
+    crosses each multiple of ``total_cost / n_chunks``.
+    """
+    costs = (
+        data.group_by("date")
+        .agg(pl.len().alias("cost"))
+        .sort("date")
+        .with_columns(pl.col("cost").cum_sum().alias("cumulative_cost"))
+    )
+    total_cost = costs["cumulative_cost"][-1]
+    n_chunks = min(n_chunks, costs.height)
+
+    chunks = (
+        costs.with_columns(
+            ((pl.col("cumulative_cost") - pl.col("cost")) * n_chunks // total_cost)
+            .clip(upper_bound=n_chunks - 1)
+            .alias("chunk")
+        )
+        .group_by("chunk")
+        .agg(
+            pl.col("date").min().alias("start"),
+            pl.col("date").max().alias("end"),
+        )
+        .sort("chunk")
+    )
+
+    return list(zip(chunks["start"], chunks["end"]))
+
+
+BACKENDS = {
+    "slurm": _submit_slurm,
+    "local": _run_local,
+}
+
+
+def run_backtest_parallel(
+    data: pl.DataFrame,
+    signal_name: str | list[str],
+    constraints: list[str],
+    gamma: float | list[float],
+    n_cpus: int,
+    backend: str = "slurm",
+    n_workers: int | None = None,
+    n_chunks: int | None = None,
+    resume: bool = False,
+    warm_start: bool = False,
+    target_risk: float | None = None,
+):
+    """Run an MVO backtest for each year of ``data``.
+
+    ``backend="slurm"`` submits a SLURM array job, ``backend="local"`` runs the
+    years as ``n_workers`` local ``mvo.py`` processes (as many as fit in the
+    machine's cpus by default), each pinned to ``n_cpus`` cpus. With
+    ``n_cpus=1`` each year is solved sequentially without Ray. Both write
+    ``weights/{signal_name}/{gamma}/{year}.parquet``. The alphas are written
+    to a new ``temp/alphas_*`` directory per run, partitioned by year, so each
+    task reads only its own years and concurrent runs never share an input.
+
+    With ``n_chunks`` set, the dates are split into ``n_chunks`` contiguous
+    chunks of about equal total asset count instead of calendar years, so
+    tasks finish at about the same time. The chunk outputs are consolidated
+    into the same yearly files once every chunk has finished.
+
+    Tasks checkpoint their weights every few dates. With ``resume=True`` only
+    the missing years (or, with ``n_chunks``, the missing dates) are
+    resubmitted and each task skips the dates it already checkpointed.
+
+    With ``warm_start=True`` each task solves its dates sequentially, starting
+    every date's QP from the previous date's solution, instead of with Ray.
+
+    A list of gammas runs a sweep in the same job: each date is set up and
+    solved once and the weights of every gamma are written to
+    ``weights/{signal_name}/{gamma}``. See :func:`summarize_gamma_sweep`.
+
+    With ``target_risk`` (annualized, e.g. ``0.05``) each date's gamma is
+    calibrated so the ex-ante volatility of the weights, which are active,
+    hits the target, and the weights are written to
+    ``weights/{signal_name}/risk_{target_risk}``.
+
+    Tasks log per-date metrics to ``weights/{signal_name}/{gamma}/metrics``,
+    or for a sweep or several signals to a ``runs/{key}`` directory of their
+    own (see :func:`research.utils.metrics.run_dir`); summarize them with
+    ``python -m research.utils.metrics --output_dir ...``.
+
+    A list of signal names backtests several signals in the same job. ``data``
+    then has one alpha column per signal, named after it, and ``gamma`` is
+    either shared or a list with one gamma per signal. Each date's covariance
+    is loaded once, each signal is solved once and its weights are written to
+    ``weights/{signal}/{gamma}``, so the cost scales with dates rather than
+    dates times signals. See :func:`combine_alphas`.
+    """
+    if backend not in BACKENDS:
+        raise ValueError(f"Unknown backend: {backend}. Options: {list(BACKENDS)}")
+    if target_risk is not None and (
+        isinstance(gamma, list) or isinstance(signal_name, list)
+    ):
+        raise ValueError("target_risk calibrates gamma and cannot be swept")
+    if isinstance(signal_name, list):
+        gamma = gamma if isinstance(gamma, list) else [gamma] * len(signal_name)
+        if len(gamma) != len(signal_name):
+            raise ValueError("Pass one gamma per signal, or a single shared gamma")
+
+    # Get job paths
+    project_root = os.getenv("PROJECT_ROOT") or os.getcwd()
+    temp_dir = f"{project_root}/temp"
+    if isinstance(signal_name, list):
+        output_dir = f"{project_root}/weights"
+        output_dirs = [f"{output_dir}/{s}/{g}" for s, g in zip(signal_name, gamma)]
+    elif isinstance(gamma, list):
+        output_dir = f"{project_root}/weights/{signal_name}"
+        output_dirs = [f"{output_dir}/{g}" for g in gamma]
+    elif target_risk is not None:
+        output_dir = f"{project_root}/weights/{signal_name}/risk_{target_risk}"
+        output_dirs = [output_dir]
+    else:
+        output_dir = f"{project_root}/weights/{signal_name}/{gamma}"
+        output_dirs = [output_dir]
+
+    # Dates that already have weights for every gamma or signal
+    done = (
+        set.intersection(*(completed_dates(d) for d in output_dirs))
+        if resume
+        else set()
+    )
+
+    # One task per year, or per balanced date chunk
+    if n_chunks is None:
+        years = sorted(
+            data.select(pl.col("date").dt.year()).unique().to_series().to_list()
+        )
+        if resume:
+            years = [
+                year
+                for year in years
+                if not all(
+                    os.path.exists(f"{gamma_dir}/{year}.parquet")
+                    for gamma_dir in output_dirs
+                )
+            ]
+        tasks = [["--year", str(year)] for year in years]
+        spans = [(dt.date(year, 1, 1), dt.date(year, 12, 31)) for year in years]
+    else:
+        data = data.filter(~pl.col("date").is_in(list(done)))
+        chunks = _balance_chunks(data, n_chunks) if not data.is_empty() else []
+        tasks = [["--start", str(start), "--end", str(end)] for start, end in chunks]
+        spans = chunks
+
+    if not tasks:
+        print(f"Nothing left to run in {output_dir}")
+        for gamma_dir in output_dirs:
+            consolidate_checkpoints(gamma_dir)
+        return
+
+    if resume:
+        tasks = [task + ["--resume"] for task in tasks]
+    if warm_start:
+        tasks = [task + ["--warm_start"] for task in tasks]
+    if target_risk is not None:
+        tasks = [task + ["--target_risk", str(target_risk)] for task in tasks]
+
+    # Create directories
+    os.makedirs(temp_dir, exist_ok=True)
+    for gamma_dir in output_dirs:
+        os.makedirs(gamma_dir, exist_ok=True)
+
+    # Work left in each task, for research.utils.metrics projections. Tasks
+    # skip the dates they already checkpointed, so those are not planned
+    remaining = data.filter(~pl.col("date").is_in(list(done)))
+    metrics_dir = run_dir(output_dir, output_dirs)
+    print(f"Logging metrics to {metrics_dir}/metrics")
+    write_manifest(
+        metrics_dir,
+        pl.concat(
+            remaining.filter(pl.col("date").is_between(start, end)).select(
+                pl.lit(task_key(start, end)).alias("task"),
+                pl.col("date").n_unique().alias("n_dates"),
+                pl.len().alias("n_assets"),
+            )
+            for start, end in spans
+        ),
+    )
+
+    # Save alphas to a directory unique to this run, partitioned by year
+    data_path = tempfile.mkdtemp(prefix="alphas_", dir=temp_dir)
+    data.with_columns(pl.col("date").dt.year().alias("year")).write_parquet(
+        data_path, partition_by="year"
+    )
+
+    try:
+        BACKENDS[backend](
+            data_path=data_path,
+            output_dir=output_dir,
+            output_dirs=output_dirs,
+            tasks=tasks,
+            signal_name=signal_name,
+            constraints=constraints,
+            gamma=gamma,
+            n_cpus=n_cpus,
+            n_workers=n_workers,
+            consolidate=n_chunks is not None,
+        )
+    finally:
+        # SLURM tasks read the input after submission, a dependent job deletes it
+        if backend == "local":
+            shutil.rmtree(data_path)
+
+
+def combine_alphas(alphas: dict[str, pl.DataFrame]) -> pl.DataFrame:
+    """Join per-signal alphas into one frame for a multi-signal backtest.
+
+    Each frame of ``alphas`` has ``date``, ``barrid``, ``alpha`` and
+    ``predicted_beta``. The result has one alpha column per signal, null where
+    the asset is outside that signal's universe.
+    """
+    combined = None
+    for signal_name, signal_alphas in alphas.items():
+        signal_alphas = signal_alphas.select(
+            "date", "barrid", pl.col("alpha").alias(signal_name), "predicted_beta"
+        )
+        combined = (
+            signal_alphas
+            if combined is None
+            else combined.join(
+                signal_alphas,
+                on=["date", "barrid"],
+                how="full",
+                coalesce=True,
+                suffix="_right",
+            )
+            .with_columns(
+                pl.coalesce("predicted_beta", "predicted_beta_right").alias(
+                    "predicted_beta"
+                )
+            )
+            .drop("predicted_beta_right")
+        )
+
+    return combined.sort("date", "barrid")
+
+
+def summarize_gamma_sweep(
+    signal_name: str,
+    gammas: list[float],
+    forward_returns: pl.DataFrame,
+) -> pl.DataFrame:
+    """Annualized realized return and active risk of each gamma of a sweep.
+
+    ``forward_returns`` has ``date``, ``barrid`` and ``fwd_return`` (the next
+    day's return, as built by ``research.pipelines.scan_alphas``). Because the
+    sweep's weights scale as ``1 / gamma``, the gamma for a target active risk
+    is about ``gamma * active_risk / target``.
+    """
+    analytics = portfolio_analytics(
+        scan_weights([(signal_name, gamma) for gamma in gammas]),
+        forward_returns.lazy().drop_nulls("fwd_return"),
+        returns="fwd_return",
+    )
+
+    return (
+        summarize_portfolios(analytics)
+        .select(
+            pl.col("gamma").cast(pl.Float64),
+            "n_dates",
+            "mean_return",
+            pl.col("volatility").alias("active_risk"),
+            "sharpe",
+        )
+        .sort("gamma")
+    )
@@ -0,0 +1,186 @@
+import datetime as dt
+import os
+from dataclasses import dataclass
+from functools import lru_cache
+from pathlib import Path
+
+import numpy as np
+import polars as pl
+import sf_quant.data as sfd
+from dotenv import load_dotenv
+
+load_dotenv()
+
+# Number of full-universe dates kept in memory
+MEMORY_CACHE_SIZE = 16
+
+
+def get_cache_dir() -> Path:
+    """Root directory of the on-disk covariance cache."""
+    project_root = os.getenv("PROJECT_ROOT") or "."
+    return Path(project_root) / "cache" / "covariances"
+
+
+@dataclass(frozen=True)
+class FactorCovariance:
+    """Barra covariance ``X @ F @ X.T + diag(d)`` kept in factor form.
+
+    Holds the ``n x k`` exposures ``X``, the ``k x k`` factor covariance ``F``
+    and the ``n`` specific variances ``d`` separately, so products and risks
+    cost O(n * k) instead of the O(n^2) of the dense matrix built by
+    ``sfd.construct_covariance_matrix``. Values are in decimal space, like the
+    dense matrix.
+    """
+
+    barrids: list[str]
+    exposures: np.ndarray
+    factor_covariance: np.ndarray
+    specific_variance: np.ndarray
+
+    @classmethod
+    def load(
+        cls, date_: dt.date, barrids: list[str], cache_dir: Path | None = None
+    ) -> "FactorCovariance":
+        """Load the factor model for ``barrids`` on ``date_``.
+
+        The full-universe model of each date is built once, then kept in an
+        in-memory LRU of ``MEMORY_CACHE_SIZE`` dates and on disk under
+        ``cache_dir``, so any later subset of barrids is an index selection.
+        Rows are aligned with ``barrids`` in the given order.
+        """
+        return _load_universe(date_, cache_dir or get_cache_dir()).subset(barrids)
+
+    def subset(self, barrids: list[str]) -> "FactorCovariance":
+        """Rows of ``barrids``; barrids without data get zero exposure and risk."""
+        index = {barrid: i for i, barrid in enumerate(self.barrids)}
+        missing = len(self.barrids)
+        rows = np.array([index.get(barrid, missing) for barrid in barrids], dtype=int)
+
+        # A trailing zero row stands in for missing barrids
+        exposures = np.vstack([self.exposures, np.zeros(self.exposures.shape[1])])
+        specific_variance = np.append(self.specific_variance, 0.0)
+
+        return FactorCovariance(
+            barrids=list(barrids),
+            exposures=exposures[rows],
+            factor_covariance=self.factor_covariance,
+            specific_variance=specific_variance[rows],
+        )
+
+    def matvec(self, weights: np.ndarray) -> np.ndarray:
+        """Covariance times ``weights`` without forming the covariance."""
+        factor_weights = self.exposures.T @ weights
+        return (
+            self.exposures @ (self.factor_covariance @ factor_weights)
+            + self.specific_variance * weights
+        )
+
+    def variance(self, weights: np.ndarray) -> float:
+        """Portfolio variance ``weights @ C @ weights``."""
+        factor_weights = self.exposures.T @ weights
+        return float(
+            factor_weights @ self.factor_covariance @ factor_weights
+            + self.specific_variance @ weights**2
+        )
+
+    def active_risk(self, active_weights: np.ndarray) -> float:
+        """Ex-ante active risk (tracking error) of ``active_weights``."""
+        return float(np.sqrt(self.variance(active_weights)))
+
+    def to_dense(self) -> np.ndarray:
+        """Dense ``n x n`` covariance matrix, for code that still needs one."""
+        return self.exposures @ self.factor_covariance @ self.exposures.T + np.diag(
+            self.specific_variance
+        )
+
+
+def _build_universe(date_: dt.date) -> FactorCovariance:
+    """Full-universe factor model of ``date_``, as ``sfd.construct_covariance_matrix`` builds it.
+
+    Missing exposures and specific risks are zero and the upper-triangular
+    factor covariance is symmetrized.
+    """
+    factors = sfd.get_factor_names()
+
+    # Exposures and specific risk of every barrid with either
+    assets = (
+        sfd.load_exposures_by_date(date_)
+        .select(["barrid"] + factors)
+        .join(
+            sfd.load_assets_by_date(
+                date_, in_universe=False, columns=["date", "barrid", "specific_risk"]
+            ).drop("date"),
+            on="barrid",
+            how="full",
+            coalesce=True,
+        )
+        .fill_null(0)
+        .sort("barrid")
+    )
+
+    # Factor covariance, from upper triangular to symmetric
+    upper = (
+        sfd.load_covariances_by_date(date_)
+        .filter(pl.col("factor_1").is_in(factors))
+        .sort("factor_1")
+        .select(factors)
+        .to_numpy()
+    )
+    factor_covariance = np.nan_to_num(np.where(np.isnan(upper), upper.T, upper))
+
+    # Put in decimal space
+    return FactorCovariance(
+        barrids=assets["barrid"].to_list(),
+        exposures=assets.select(factors).to_numpy(),
+        factor_covariance=factor_covariance / 100**2,
+        specific_variance=assets["specific_risk"].to_numpy() ** 2 / 100**2,
+    )
+
+
+@lru_cache(maxsize=MEMORY_CACHE_SIZE)
+def _load_universe(date_: dt.date, cache_dir: Path) -> FactorCovariance:
+    """Full-universe factor model from disk, building and persisting it on a miss."""
+    date_dir = cache_dir / str(date_.year) / str(date_)
+    assets_path = date_dir / "assets.parquet"
+    factors_path = date_dir / "factor_covariance.parquet"
+
+    if assets_path.exists():
+        assets = pl.read_parquet(assets_path)
+        factor_covariance = pl.read_parquet(factors_path)
+        return FactorCovariance(
+            barrids=assets["barrid"].to_list(),
+            exposures=assets.drop("barrid", "specific_variance").to_numpy(),
+            factor_covariance=factor_covariance.drop("factor_1").to_numpy(),
+            specific_variance=assets["specific_variance"].to_numpy(),
+        )
+
+    covariance = _build_universe(date_)
+    factors = sfd.get_factor_names()
+
+    # The assets file is written last and marks a complete entry
+    date_dir.mkdir(parents=True, exist_ok=True)
+    for frame, path in [
+        (
+            pl.DataFrame(
+                {
+                    "factor_1": factors,
+                    **dict(zip(factors, covariance.factor_covariance.T)),
+                }
+            ),
+            factors_path,
+        ),
+        (
+            pl.DataFrame(
+                {
+                    "barrid": covariance.barrids,
+                    **dict(zip(factors, covariance.exposures.T)),
+                    "specific_variance": covariance.specific_variance,
+                }
+            ),
+            assets_path,
+        ),
+    ]:
+        frame.write_parquet(f"{path}.tmp")
+        os.replace(f"{path}.tmp", path)
+
+    return covariance
@@ -0,0 +1,257 @@
+import argparse
+import datetime as dt
+import glob
+import hashlib
+import json
+import os
+import resource
+import socket
+import time
+
+import polars as pl
+
+
+def task_key(start: dt.date, end: dt.date) -> str:
+    """Name of the metrics file of the task covering ``[start, end]``."""
+    return f"{start}_{end}"
+
+
+def run_dir(output_dir: str, output_dirs: list[str]) -> str:
+    """Directory whose ``metrics`` subdirectory holds a run's records and manifest.
+
+    A run writing one portfolio logs to its weights directory. A sweep or
+    multi-signal run writes several portfolios under ``output_dir``, which
+    other runs share, so it logs to ``{output_dir}/runs/{key}``, keyed by the
+    portfolios it writes. Runs over different portfolios then never share
+    metrics, and a resumed run finds its own.
+    """
+    if output_dirs == [output_dir]:
+        return output_dir
+
+    portfolios = sorted(os.path.relpath(path, output_dir) for path in output_dirs)
+    key = hashlib.sha1(json.dumps(portfolios).encode()).hexdigest()[:16]
+    return f"{output_dir}/runs/{key}"
+
+
+def metrics_path(output_dir: str, start: dt.date, end: dt.date) -> str:
+    return f"{output_dir}/metrics/{task_key(start, end)}.jsonl"
+
+
+def peak_rss_mb() -> float:
+    """Memory high-water mark of this process in MB (``ru_maxrss`` is in KB on Linux)."""
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+
+def log_metrics(path: str | None, event: str, **fields) -> None:
+    """Append one JSON-lines record to ``path``, doing nothing without a path.
+
+    Every record carries the event name, the wall-clock time, the task's
+    host and SLURM ids, and the process' peak RSS so far.
+    """
+    if path is None:
+        return
+
+    record = {
+        "event": event,
+        "time": time.time(),
+        "host": socket.gethostname(),
+        "job_id": os.getenv("SLURM_ARRAY_JOB_ID") or os.getenv("SLURM_JOB_ID"),
+        "array_task_id": os.getenv("SLURM_ARRAY_TASK_ID"),
+        "peak_rss_mb": peak_rss_mb(),
+        **fields,
+    }
+
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with open(path, "a") as f:
+        f.write(json.dumps(record, default=str) + "\n")
+
+
+def write_manifest(output_dir: str, tasks: pl.DataFrame) -> None:
+    """Record the planned tasks (``task``, ``n_dates``, ``n_assets``) of a run.
+
+    Each run, including a resumed one, replaces the manifest with its own
+    tasks, stamped with the time they were planned.
+    """
+    os.makedirs(f"{output_dir}/metrics", exist_ok=True)
+    tasks.with_columns(pl.lit(time.time()).alias("planned_time")).write_parquet(
+        f"{output_dir}/metrics/tasks.parquet"
+    )
+
+
+def load_metrics(output_dir: str) -> pl.DataFrame:
+    """Every record logged by the tasks writing to ``output_dir``, with a ``task`` column."""
+    records = []
+    for path in sorted(glob.glob(f"{output_dir}/metrics/*.jsonl")):
+        task = os.path.basename(path).removesuffix(".jsonl")
+        with open(path) as f:
+            records.extend({"task": task, **json.loads(line)} for line in f)
+
+    if not records:
+        return pl.DataFrame()
+
+    return pl.DataFrame(records, infer_schema_length=None)
+
+
+def summarize_metrics(output_dir: str, n_slowest: int = 10) -> dict[str, pl.DataFrame]:
+    """Summarize the metrics of a backtest run across its tasks.
+
+    Returns frames keyed by ``tasks`` (progress, solve time and peak RSS of each
+    task), ``slowest`` (the ``n_slowest`` slowest dates, or batches for runs
+    that did not log dates), ``failures`` and ``projection``. The
+    projection prices the asset-dates left in the latest run's task manifest,
+    less those its records have logged since it was planned, at the observed
+    seconds per asset-date.
+    """
+    metrics = load_metrics(output_dir)
+    if metrics.is_empty():
+        return {}
+
+    def events(name: str) -> pl.DataFrame:
+        return metrics.filter(pl.col("event").eq(name))
+
+    batches = events("batch")
+    dates = events("date")
+    failures = events("failure")
+
+    tasks = (
+        metrics.group_by("task")
+        .agg(
+            pl.col("event").last().alias("status"),
+            pl.col("time").max().alias("last_time"),
+            pl.col("peak_rss_mb").max(),
+        )
+        .with_columns(
+            pl.col("status").replace(
+                {
+                    "start": "running",
+                    "batch": "running",
+                    "date": "running",
+                    "end": "complete",
+                    "failure": "failed",
+                }
+            ),
+        )
+        .join(
+            # Longest single run of each task, since resumed runs append
+            metrics.with_columns(
+                pl.col("event").eq("start").cum_sum().over("task").alias("run")
+            )
+            .group_by("task", "run")
+            .agg((pl.col("time").max() - pl.col("time").min()).alias("elapsed"))
+            .group_by("task")
+            .agg(pl.col("elapsed").max()),
+            on="task",
+        )
+    )
+    if not batches.is_empty():
+        tasks = tasks.join(
+            batches.group_by("task").agg(
+                pl.col("n_dates").sum().alias("dates_done"),
+                pl.col("n_assets").sum().alias("assets_done"),
+                pl.col("solve_time").sum(),
+            ),
+            on="task",
+            how="left",
+        ).with_columns(
+            pl.col("solve_time").truediv(pl.col("dates_done")).alias("time_per_date")
+        )
+    tasks = tasks.sort("task")
+
+    # Individual dates, or batch averages for runs that did not log them
+    slowest = (
+        dates.select("task", "date", "n_assets", "solve_time", "iterations")
+        if not dates.is_empty()
+        else batches.select(
+            "task",
+            "first_date",
+            "last_date",
+            "n_assets",
+            pl.col("solve_time").truediv(pl.col("n_dates")).alias("solve_time"),
+        )
+        if not batches.is_empty()
+        else pl.DataFrame()
+    )
+    if not slowest.is_empty():
+        slowest = slowest.sort("solve_time", descending=True).head(n_slowest)
+
+    failures = (
+        pl.DataFrame()
+        if failures.is_empty()
+        else failures.select(
+            "task",
+            "first_date",
+            "last_date",
+            "error",
+            "host",
+            "job_id",
+            "array_task_id",
+        )
+    )
+
+    summary = {"tasks": tasks, "slowest": slowest, "failures": failures}
+
+    manifest_path = f"{output_dir}/metrics/tasks.parquet"
+    if os.path.exists(manifest_path) and not batches.is_empty():
+        seconds_per_asset = batches["solve_time"].sum() / batches["n_assets"].sum()
+        manifest = pl.read_parquet(manifest_path)
+
+        # Progress of the latest run only, since earlier runs' work is not planned
+        assets_done = (
+            batches.filter(pl.col("time").ge(manifest["planned_time"].min()))
+            .group_by("task")
+            .agg(pl.col("n_assets").sum().alias("assets_done"))
+        )
+        projection = (
+            manifest.drop("planned_time")
+            .join(assets_done, on="task", how="left")
+            .with_columns(
+                (pl.col("n_assets") - pl.col("assets_done").fill_null(0))
+                .clip(lower_bound=0)
+                .alias("assets_left")
+            )
+            .with_columns(
+                pl.col("assets_left").mul(seconds_per_asset).alias("time_left")
+            )
+        )
+        summary["projection"] = projection.select(
+            pl.len().alias("n_tasks"),
+            pl.col("assets_left").gt(0).sum().alias("tasks_left"),
+            pl.col("assets_left").sum(),
+            pl.col("time_left").sum().alias("cpu_time_left"),
+            pl.col("time_left").max().alias("wall_time_left"),
+        )
+
+    return summary
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(
+        description="Summarize the per-task metrics of a backtest run."
+    )
+
+    parser.add_argument(
+        "--output_dir",
+        help="Weights directory of the run, e.g. weights/{signal}/{gamma}",
+    )
+    parser.add_argument(
+        "--n_slowest", type=int, default=10, help="Number of slowest dates to list"
+    )
+
+    args = parser.parse_args()
+
+    summary = summarize_metrics(args.output_dir, n_slowest=args.n_slowest)
+    if not summary:
+        print(f"No metrics in {args.output_dir}/metrics")
+
+    with pl.Config(tbl_rows=-1, tbl_cols=-1):
+        for name, frame in summary.items():
+            print(f"\n{name}:")
+            print(frame if not frame.is_empty() else "none")
+
+    if summary:
+        # Sizing for the sbatch --mem and --time of the next run
+        tasks = summary["tasks"]
+        print(
+            f"\nLargest peak RSS: {tasks['peak_rss_mb'].max() / 1024:.1f} GB, "
+            f"longest task: {tasks['elapsed'].max() / 3600:.2f} h"
+        )
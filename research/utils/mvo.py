@@ -1,10 +1,32 @@
 import argparse
 import datetime as dt
+import glob
+import os
+import shutil
+import time
+from typing import Callable
 
+import cvxpy as cp
+import numpy as np
+import osqp
 import polars as pl
-import sf_quant.backtester as sfb
+import ray
+import scipy.sparse as sp
+import sf_quant.data as sfd
 import sf_quant.optimizer as sfo
 
+from research.utils.covariance import FactorCovariance
+from research.utils.metrics import log_metrics, metrics_path, peak_rss_mb, run_dir
+
+# Same tolerances sfo.mve_optimizer gets from cvxpy's OSQP interface
+OSQP_SETTINGS = {
+    "eps_abs": 1e-5,
+    "eps_rel": 1e-5,
+    "max_iter": 10000,
+    "polishing": True,
+    "verbose": False,
+}
+
 
 def get_constraints_from_names(constraint_names: list[str]) -> list:
     """Convert constraint names to sfo.constraints objects."""
@@ -16,6 +38,693 @@ def get_constraints_from_names(constraint_names: list[str]) -> list:
     return [constraint_map[name]() for name in constraint_names]
 
 
+def _constraint_rows(
+    constraint_names: list[str], betas: np.ndarray | None, n_assets: int
+) -> np.ndarray:
+    """Coefficient rows of the equality constraints ``row @ weights == 0``."""
+    constraint_map = {
+        "ZeroBeta": lambda: betas,
+        "ZeroInvestment": lambda: np.ones(n_assets),
+    }
+
+    return np.array([constraint_map[name]() for name in constraint_names]).reshape(
+        -1, n_assets
+    )
+
+
+def _upper_triangle(matrix: np.ndarray) -> sp.csc_matrix:
+    """Dense upper triangle of ``matrix`` in CSC form, keeping explicit zeros.
+
+    The sparsity pattern only depends on the size of the matrix, so the data
+    array of one date can update a solver set up on another date.
+    """
+    n = matrix.shape[0]
+    indptr = np.concatenate([[0], np.cumsum(np.arange(1, n + 1))])
+    indices = np.concatenate([np.arange(j + 1) for j in range(n)])
+    data = matrix[np.tril_indices(n)]
+
+    return sp.csc_matrix((data, indices, indptr), shape=(n, n))
+
+
+def _dense_csc(matrix: np.ndarray) -> sp.csc_matrix:
+    """``matrix`` in CSC form with every entry stored, zeros included."""
+    rows, cols = np.indices(matrix.shape)
+    return sp.csc_matrix(
+        (matrix.ravel(), (rows.ravel(), cols.ravel())), shape=matrix.shape
+    )
+
+
+def _qp_matrices(
+    gamma: float,
+    covariance: np.ndarray | FactorCovariance,
+    constraint_rows: np.ndarray,
+) -> tuple[sp.csc_matrix, sp.csc_matrix]:
+    """OSQP ``P`` and ``A`` matrices of one date's problem.
+
+    A dense covariance gives ``P = gamma * C`` over the weights. A
+    :class:`FactorCovariance` adds the factor exposures ``f = X.T @ w`` as
+    variables, giving a block diagonal ``P = gamma * diag(d, F)`` and the
+    extra equality rows ``X.T @ w - f == 0``, so the n x n matrix is never
+    formed.
+    """
+    if not isinstance(covariance, FactorCovariance):
+        return _upper_triangle(gamma * covariance), _dense_csc(constraint_rows)
+
+    n_assets, n_factors = covariance.exposures.shape
+    specific = sp.csc_matrix(
+        (
+            gamma * covariance.specific_variance,
+            (np.arange(n_assets), np.arange(n_assets)),
+        ),
+        shape=(n_assets, n_assets),
+    )
+    P = sp.block_diag(
+        [specific, _upper_triangle(gamma * covariance.factor_covariance)],
+        format="csc",
+    )
+    A = sp.bmat(
+        [
+            [
+                _dense_csc(constraint_rows),
+                sp.csc_matrix((constraint_rows.shape[0], n_factors)),
+            ],
+            [_dense_csc(covariance.exposures.T), -sp.identity(n_factors)],
+        ],
+        format="csc",
+    )
+
+    return P, A
+
+
+class WarmStartedMVO:
+    """Sequential mean-variance optimizer that starts each date from the last.
+
+    Solves ``max alpha @ w - gamma / 2 * w @ C @ w`` under the named equality
+    constraints with OSQP, the same problem and tolerances as
+    ``sfo.mve_optimizer``. ``C`` is either a dense matrix or a
+    :class:`FactorCovariance`, which is solved in factor form. The previous
+    date's primal and dual solutions are remapped by barrid (new barrids start
+    at zero) and used as the starting point. When the universe is unchanged
+    the OSQP workspace is updated in place, reusing its KKT structure and
+    symbolic factorization.
+
+    With ``target_risk`` each date's gamma is calibrated so the ex-ante
+    volatility of the optimized weights equals the target. The backtest's
+    weights are active (``ZeroInvestment``), so this is their active risk.
+    Every constraint is a homogeneous equality, so the solution scales as
+    ``1 / gamma`` and the calibrated gamma is exactly
+    ``gamma * risk / target_risk``.
+    """
+
+    def __init__(
+        self,
+        gamma: float,
+        constraints: list[str],
+        warm_start: bool = True,
+        target_risk: float | None = None,
+    ) -> None:
+        self.gamma = gamma
+        self.constraints = constraints
+        self.warm_start = warm_start
+        self.target_risk = target_risk
+        self.barrids: list[str] = []
+        self.weights = np.zeros(0)
+        self.duals = np.zeros(0)
+        self.solver: osqp.OSQP | None = None
+
+        # Diagnostics of the last solve
+        self.iterations = 0
+        self.solve_time = 0.0
+        self.calibrated_gamma = gamma
+
+    def solve(
+        self,
+        barrids: list[str],
+        alphas: np.ndarray,
+        covariance: np.ndarray | FactorCovariance,
+        betas: np.ndarray | None = None,
+    ) -> np.ndarray:
+        """Optimal weights for one date, aligned with ``barrids``."""
+        start_time = time.perf_counter()
+        constraint_rows = _constraint_rows(self.constraints, betas, len(barrids))
+        P, A = _qp_matrices(self.gamma, covariance, constraint_rows)
+        q = np.concatenate([-alphas, np.zeros(P.shape[0] - len(barrids))])
+        bounds = np.zeros(A.shape[0])
+
+        if self.warm_start and self.solver is not None and barrids == self.barrids:
+            # Same universe: new data in the existing workspace
+            self.solver.update(q=q, Px=P.data, Ax=A.data)
+            self.solver.warm_start(
+                x=self._start(self.weights, covariance), y=self.duals
+            )
+        else:
+            solver = osqp.OSQP()
+            solver.setup(P, q, A, bounds, bounds, **OSQP_SETTINGS)
+            if self.warm_start and self.solver is not None:
+                previous = dict(zip(self.barrids, self.weights))
+                weights = np.array([previous.get(barrid, 0.0) for barrid in barrids])
+                solver.warm_start(x=self._start(weights, covariance), y=self.duals)
+            self.solver = solver
+
+        results = self.solver.solve()
+
+        self.barrids = barrids
+        self.weights = results.x[: len(barrids)]
+        self.duals = results.y
+        self.iterations = results.info.iter
+
+        weights = self.weights
+        if self.target_risk is not None:
+            risk = _risk(weights, covariance)
+            if risk > 0:
+                self.calibrated_gamma = self.gamma * risk / self.target_risk
+                weights = weights * self.target_risk / risk
+
+        self.solve_time = time.perf_counter() - start_time
+
+        return weights
+
+    @staticmethod
+    def _start(
+        weights: np.ndarray, covariance: np.ndarray | FactorCovariance
+    ) -> np.ndarray:
+        """Starting point for the solver's variables from asset weights."""
+        if isinstance(covariance, FactorCovariance):
+            return np.concatenate([weights, covariance.exposures.T @ weights])
+        return weights
+
+
+def _risk(weights: np.ndarray, covariance: np.ndarray | FactorCovariance) -> float:
+    """Ex-ante volatility of ``weights``."""
+    if isinstance(covariance, FactorCovariance):
+        return float(np.sqrt(covariance.variance(weights)))
+    return float(np.sqrt(weights @ covariance @ weights))
+
+
+def _factor_problem(
+    alphas: np.ndarray,
+    covariance: FactorCovariance,
+    constraints: list,
+    betas: np.ndarray | None = None,
+) -> Callable[[float], np.ndarray]:
+    """Build the factor-form MVO once and return a function solving it for a gamma.
+
+    Gamma is a cvxpy parameter, so re-solving for another gamma reuses the
+    canonicalized problem and warm-starts OSQP's cached workspace.
+    """
+    weights = cp.Variable(len(alphas))
+    factor_weights = cp.Variable(covariance.factor_covariance.shape[0])
+    gamma = cp.Parameter(nonneg=True)
+
+    portfolio_return = weights @ alphas
+    portfolio_variance = cp.quad_form(
+        factor_weights, cp.psd_wrap(covariance.factor_covariance)
+    ) + cp.sum(cp.multiply(covariance.specific_variance, cp.square(weights)))
+
+    problem = cp.Problem(
+        cp.Maximize(portfolio_return - 0.5 * gamma * portfolio_variance),
+        [factor_weights == covariance.exposures.T @ weights]
+        + [constraint(weights, betas=betas) for constraint in constraints],
+    )
+
+    def solve(value: float) -> np.ndarray:
+        gamma.value = value
+        problem.solve(solver="OSQP", warm_start=True)
+        return weights.value
+
+    return solve
+
+
+def _bisect_gamma(
+    solve: Callable[[float], np.ndarray],
+    covariance: FactorCovariance,
+    target_risk: float,
+    gamma: float,
+    tolerance: float,
+    max_iterations: int,
+) -> float:
+    """Gamma at which the solution's ex-ante volatility is ``target_risk``.
+
+    The risk of the optimal portfolio is nonincreasing in gamma. The first
+    guess rescales ``gamma`` by ``risk / target``, which is exact when every
+    constraint is a homogeneous equality, then the target is bracketed by
+    factors of 10 and bisected in log space. Raises a ``ValueError`` if the
+    target cannot be bracketed or is not reached in ``max_iterations``.
+    """
+
+    def error(value: float) -> float:
+        return _risk(solve(value), covariance) / target_risk - 1
+
+    initial_error = error(gamma)
+    if abs(initial_error) <= tolerance:
+        return gamma
+
+    guess = gamma * (initial_error + 1)
+    guess_error = error(guess)
+    if abs(guess_error) <= tolerance:
+        return guess
+
+    # Bracket the target between a riskier lower and a safer upper gamma,
+    # widening by factors of 10 up to 8 times
+    (lower, lower_error), (upper, upper_error) = sorted(
+        [(gamma, initial_error), (guess, guess_error)]
+    )
+    widenings = 0
+    while not (lower_error > 0 > upper_error):
+        if widenings == 8:
+            raise ValueError(
+                f"target_risk={target_risk} is not reachable "
+                f"for gamma between {lower} and {upper}"
+            )
+        widenings += 1
+        if upper_error > 0:
+            lower, lower_error = upper, upper_error
+            upper = upper * 10
+            upper_error = error(upper)
+        else:
+            upper, upper_error = lower, lower_error
+            lower = lower / 10
+            lower_error = error(lower)
+
+    for _ in range(max_iterations):
+        middle = float(np.sqrt(lower * upper))
+        middle_error = error(middle)
+        if abs(middle_error) <= tolerance:
+            return middle
+        if middle_error > 0:
+            lower = middle
+        else:
+            upper = middle
+
+    raise ValueError(
+        f"target_risk={target_risk} not reached within a relative tolerance of "
+        f"{tolerance} after {max_iterations} bisections, gamma is between "
+        f"{lower} and {upper}"
+    )
+
+
+def calibrate_gamma(
+    alphas: np.ndarray,
+    covariance: FactorCovariance,
+    constraints: list,
+    target_risk: float,
+    gamma: float = 2,
+    betas: np.ndarray | None = None,
+    tolerance: float = 1e-3,
+    max_iterations: int = 50,
+) -> float:
+    """Gamma whose optimal portfolio has ex-ante volatility ``target_risk``.
+
+    Solves the :func:`factor_mve_optimizer` problem starting from ``gamma``
+    until the risk is within a relative ``tolerance`` of the target. The risk
+    is that of the optimized weights, so it is the active risk only when they
+    are active weights; a portfolio with a benchmark (e.g. ``FullInvestment``)
+    is calibrated on its total volatility.
+    """
+    solve = _factor_problem(alphas, covariance, constraints, betas)
+    return _bisect_gamma(
+        solve, covariance, target_risk, gamma, tolerance, max_iterations
+    )
+
+
+def factor_mve_optimizer(
+    ids: list[str],
+    alphas: np.ndarray,
+    covariance: FactorCovariance,
+    constraints: list,
+    gamma: float = 2,
+    betas: np.ndarray | None = None,
+    target_risk: float | None = None,
+) -> pl.DataFrame:
+    """``sfo.mve_optimizer`` on a :class:`FactorCovariance`.
+
+    Takes the same ``sfo`` constraint objects. The factor exposures
+    ``f = X.T @ w`` are extra variables, so the problem handed to OSQP has
+    O(n * k) nonzeros instead of the n x n covariance. With
+    ``target_risk`` gamma is calibrated first, starting from ``gamma``
+    (see :func:`calibrate_gamma`).
+    """
+    solve = _factor_problem(alphas, covariance, constraints, betas)
+
+    if target_risk is not None:
+        gamma = _bisect_gamma(
+            solve, covariance, target_risk, gamma, 1e-3, max_iterations=50
+        )
+
+    return pl.DataFrame({"barrid": ids, "weight": solve(gamma)})
+
+
+def backtest_warm_started(
+    data: pl.DataFrame,
+    gamma: float,
+    constraints: list[str],
+    optimizer: WarmStartedMVO | None = None,
+    metrics: str | None = None,
+) -> pl.DataFrame:
+    """Solve the dates of ``data`` in order, warm-starting each from the last.
+
+    Pass an ``optimizer`` to carry its state across calls. Each date's solve
+    is logged to the ``metrics`` JSON-lines file, if given.
+    """
+    optimizer = optimizer or WarmStartedMVO(gamma=gamma, constraints=constraints)
+
+    portfolios = []
+    for subset in data.sort("date", "barrid").partition_by("date", maintain_order=True):
+        date_ = subset["date"][0]
+        barrids = subset["barrid"].to_list()
+
+        covariance = FactorCovariance.load(date_, barrids)
+
+        weights = optimizer.solve(
+            barrids=barrids,
+            alphas=subset["alpha"].to_numpy(),
+            covariance=covariance,
+            betas=subset["predicted_beta"].to_numpy()
+            if "predicted_beta" in subset.columns
+            else None,
+        )
+        log_metrics(
+            metrics,
+            "date",
+            date=date_,
+            n_assets=len(barrids),
+            solve_time=optimizer.solve_time,
+            iterations=optimizer.iterations,
+        )
+
+        portfolios.append(
+            pl.DataFrame({"date": date_, "barrid": barrids, "weight": weights})
+        )
+
+    return pl.concat(portfolios)
+
+
+def backtest_signals(
+    data: pl.DataFrame,
+    optimizers: dict[str, WarmStartedMVO],
+    metrics: str | None = None,
+) -> pl.DataFrame:
+    """Solve several alpha columns of ``data`` date by date, one optimizer each.
+
+    Each date's factor covariance is loaded once for every barrid of the date
+    and subset to each column's universe, the rows where its alpha is not
+    null. Returns ``date``, ``barrid``, ``signal`` and ``weight``.
+    """
+    portfolios = []
+    for subset in data.sort("date", "barrid").partition_by("date", maintain_order=True):
+        date_ = subset["date"][0]
+        covariance = FactorCovariance.load(date_, subset["barrid"].to_list())
+
+        for signal, optimizer in optimizers.items():
+            universe = subset.filter(pl.col(signal).is_not_null())
+            if universe.is_empty():
+                continue
+            barrids = universe["barrid"].to_list()
+
+            weights = optimizer.solve(
+                barrids=barrids,
+                alphas=universe[signal].to_numpy(),
+                covariance=covariance.subset(barrids),
+                betas=universe["predicted_beta"].to_numpy(),
+            )
+            log_metrics(
+                metrics,
+                "date",
+                date=date_,
+                signal=signal,
+                n_assets=len(barrids),
+                solve_time=optimizer.solve_time,
+                iterations=optimizer.iterations,
+            )
+
+            portfolios.append(
+                pl.DataFrame(
+                    {
+                        "date": date_,
+                        "barrid": barrids,
+                        "signal": signal,
+                        "weight": weights,
+                    }
+                )
+            )
+
+    if not portfolios:
+        return pl.DataFrame(
+            schema={
+                "date": pl.Date,
+                "barrid": pl.String,
+                "signal": pl.String,
+                "weight": pl.Float64,
+            }
+        )
+
+    return pl.concat(portfolios)
+
+
+def _solve_date(
+    subset: pl.DataFrame, constraints: list[str], gamma: float
+) -> tuple[pl.DataFrame, dict]:
+    """Weights of one date's rows and the metrics of building and solving them.
+
+    Builds the same factor model as ``sf_quant.backtester.backtest_sequential``
+    does for each date and solves it cold, the same problem and tolerances as
+    ``sfo.mve_optimizer``. The metrics are measured by the process that
+    solves, so a Ray worker reports its own iterations and peak RSS.
+    """
+    start_time = time.perf_counter()
+    date_ = subset["date"][0]
+    barrids = subset["barrid"].to_list()
+
+    # sf_quant's specific "risk" component is the specific variance
+    factor_exposures, factor_covariance, specific_variance = (
+        sfd.construct_factor_model_components(date_, barrids)
+    )
+    optimizer = WarmStartedMVO(gamma=gamma, constraints=constraints, warm_start=False)
+    weights = optimizer.solve(
+        barrids=barrids,
+        alphas=subset["alpha"].to_numpy(),
+        covariance=FactorCovariance(
+            barrids=barrids,
+            exposures=factor_exposures,
+            factor_covariance=factor_covariance,
+            specific_variance=specific_variance,
+        ),
+        betas=subset["predicted_beta"].to_numpy()
+        if "predicted_beta" in subset.columns
+        else None,
+    )
+
+    return (
+        pl.DataFrame({"date": date_, "barrid": barrids, "weight": weights}),
+        {
+            "date": date_,
+            "n_assets": len(barrids),
+            "solve_time": time.perf_counter() - start_time,
+            "iterations": optimizer.iterations,
+            "peak_rss_mb": peak_rss_mb(),
+        },
+    )
+
+
+def _solve(
+    data: pl.DataFrame,
+    gamma: float,
+    n_cpus: int,
+    constraints: list[str],
+    optimizer: WarmStartedMVO | None = None,
+    metrics: str | None = None,
+) -> pl.DataFrame:
+    """Optimize weights for every date in ``data``, logging each date to ``metrics``.
+
+    With an ``optimizer`` the dates are solved sequentially with warm starts.
+    Otherwise each date is solved cold as in ``sf_quant.backtester``, on
+    ``n_cpus`` Ray workers, and measured where it is solved.
+    """
+    if optimizer is not None:
+        return backtest_warm_started(
+            data=data,
+            gamma=gamma,
+            constraints=constraints,
+            optimizer=optimizer,
+            metrics=metrics,
+        )
+
+    subsets = data.sort("date", "barrid").partition_by("date", maintain_order=True)
+
+    # A single cpu does not need a Ray cluster
+    if n_cpus == 1:
+        results = [_solve_date(subset, constraints, gamma) for subset in subsets]
+    else:
+        ray.init(ignore_reinit_error=True, num_cpus=min(n_cpus, len(subsets)))
+        solve_date = ray.remote(_solve_date)
+        results = ray.get(
+            [solve_date.remote(subset, constraints, gamma) for subset in subsets]
+        )
+
+    for _, fields in results:
+        log_metrics(metrics, "date", **fields)
+
+    return pl.concat(portfolio for portfolio, _ in results)
+
+
+def _write_atomic(df: pl.DataFrame, path: str) -> None:
+    """Write a parquet file so readers never see a partial file."""
+    df.write_parquet(f"{path}.tmp")
+    os.replace(f"{path}.tmp", path)
+
+
+def _checkpoints_between(output_dir: str, start: dt.date, end: dt.date) -> list[str]:
+    """Checkpoint files whose dates all lie in ``[start, end]``."""
+    paths = []
+    for path in sorted(glob.glob(f"{output_dir}/checkpoints/*.parquet")):
+        first, last = os.path.basename(path).removesuffix(".parquet").split("_")
+        if start <= dt.date.fromisoformat(first) and dt.date.fromisoformat(last) <= end:
+            paths.append(path)
+
+    return paths
+
+
+def scan_input(
+    data_path: str, start: dt.date | None = None, end: dt.date | None = None
+) -> pl.LazyFrame:
+    """Scan the alphas of ``[start, end]`` from a parquet file or year-partitioned directory.
+
+    ``run_backtest_parallel`` writes its input hive-partitioned by year, so a
+    task only opens the partitions of its own years.
+    """
+    if not os.path.isdir(data_path):
+        return pl.scan_parquet(data_path)
+
+    df = pl.scan_parquet(f"{data_path}/**/*.parquet", hive_partitioning=True)
+    if start is not None and end is not None:
+        df = df.filter(pl.col("year").is_between(start.year, end.year))
+
+    return df.drop("year")
+
+
+def completed_dates(output_dir: str) -> set[dt.date]:
+    """Dates that already have weights in ``output_dir``, as year files or checkpoints."""
+    paths = glob.glob(f"{output_dir}/*.parquet") + glob.glob(
+        f"{output_dir}/checkpoints/*.parquet"
+    )
+    if not paths:
+        return set()
+
+    return set(pl.scan_parquet(paths).select("date").unique().collect()["date"])
+
+
+def _solve_batches(
+    data: pl.DataFrame,
+    dates: list[dt.date],
+    checkpoint_size: int,
+    metrics: str,
+    solve_batch: Callable[[pl.DataFrame, list[dt.date]], None],
+) -> None:
+    """Call ``solve_batch`` on each batch of ``checkpoint_size`` dates of ``data``.
+
+    The task's start and end, the time to solve and checkpoint each batch and
+    any failure (before it is raised) are logged to the ``metrics`` file.
+    """
+    log_metrics(
+        metrics,
+        "start",
+        n_dates=len(dates),
+        n_assets=data.filter(pl.col("date").is_in(dates)).height,
+    )
+
+    for i in range(0, len(dates), checkpoint_size):
+        batch = dates[i : i + checkpoint_size]
+        batch_data = data.filter(pl.col("date").is_in(batch))
+
+        start_time = time.perf_counter()
+        try:
+            solve_batch(batch_data, batch)
+        except Exception as e:
+            log_metrics(
+                metrics,
+                "failure",
+                first_date=batch[0],
+                last_date=batch[-1],
+                error=repr(e),
+            )
+            raise
+
+        log_metrics(
+            metrics,
+            "batch",
+            first_date=batch[0],
+            last_date=batch[-1],
+            n_dates=len(batch),
+            n_assets=batch_data.height,
+            solve_time=time.perf_counter() - start_time,
+        )
+
+    log_metrics(metrics, "end")
+
+
+def run_backtest_by_dates(
+    df: pl.LazyFrame,
+    gamma: float,
+    start: dt.date,
+    end: dt.date,
+    output_dir: str,
+    n_cpus: int,
+    constraints: list[str],
+    resume: bool = False,
+    checkpoint_size: int = 21,
+    warm_start: bool = False,
+    target_risk: float | None = None,
+) -> None:
+    """Optimize weights for every date in ``[start, end]``, checkpointing as it goes.
+
+    Dates are solved in batches of ``checkpoint_size`` and each batch is written
+    atomically to ``{output_dir}/checkpoints/{first}_{last}.parquet``. With
+    ``resume=True`` dates that already have weights are skipped, otherwise
+    existing checkpoints in the range are discarded first. With
+    ``warm_start=True`` dates are solved sequentially by a
+    :class:`WarmStartedMVO` instead of ``sf_quant.backtester``, which is also
+    used to calibrate each date's gamma to ``target_risk``.
+
+    Per-batch and per-date timings and peak RSS are appended to
+    ``{output_dir}/metrics/{start}_{end}.jsonl``, see :mod:`research.utils.metrics`.
+    """
+    filtered = (
+        df.filter(pl.col("date").is_between(start, end))
+        .select(["date", "barrid", "alpha", "predicted_beta"])
+        .collect()
+    )
+    dates = filtered["date"].unique().sort().to_list()
+
+    if resume:
+        done = completed_dates(output_dir)
+        dates = [date_ for date_ in dates if date_ not in done]
+        print(f"Resuming with {len(dates)} dates left between {start} and {end}")
+    else:
+        for path in _checkpoints_between(output_dir, start, end):
+            os.remove(path)
+
+    optimizer = (
+        WarmStartedMVO(
+            gamma=gamma,
+            constraints=constraints,
+            target_risk=target_risk,
+        )
+        if warm_start or target_risk is not None
+        else None
+    )
+
+    metrics = metrics_path(output_dir, start, end)
+
+    def solve_batch(data: pl.DataFrame, batch: list[dt.date]) -> None:
+        weights = _solve(data, gamma, n_cpus, constraints, optimizer, metrics)
+        _write_atomic(
+            weights, f"{output_dir}/checkpoints/{batch[0]}_{batch[-1]}.parquet"
+        )
+
+    os.makedirs(f"{output_dir}/checkpoints", exist_ok=True)
+    _solve_batches(filtered, dates, checkpoint_size, metrics, solve_batch)
+
+
 def run_backtest_by_year(
     df: pl.LazyFrame,
     gamma: float,
@@ -23,23 +732,254 @@ def run_backtest_by_year(
     output_dir: str,
     n_cpus: int,
     constraints: list[str],
+    resume: bool = False,
+    checkpoint_size: int = 21,
+    warm_start: bool = False,
+    target_risk: float | None = None,
 ) -> None:
     year_start = dt.date(year, 1, 1)
     year_end = dt.date(year, 12, 31)
+    year_path = f"{output_dir}/{year}.parquet"
+
+    if resume and os.path.exists(year_path):
+        print(f"Skipping year={year}, {year_path} already exists")
+        return
+
+    run_backtest_by_dates(
+        df=df,
+        gamma=gamma,
+        start=year_start,
+        end=year_end,
+        output_dir=output_dir,
+        n_cpus=n_cpus,
+        constraints=constraints,
+        resume=resume,
+        checkpoint_size=checkpoint_size,
+        warm_start=warm_start,
+        target_risk=target_risk,
+    )
 
+    _write_year(output_dir, year)
+
+
+def _write_year(output_dir: str, year: int) -> None:
+    """Combine the year's checkpoints into the year file."""
+    checkpoint_paths = _checkpoints_between(
+        output_dir, dt.date(year, 1, 1), dt.date(year, 12, 31)
+    )
+    if not checkpoint_paths:
+        return
+
+    weights = pl.read_parquet(checkpoint_paths).sort("date", "barrid")
+    _write_atomic(weights, f"{output_dir}/{year}.parquet")
+
+    for path in checkpoint_paths:
+        os.remove(path)
+
+
+def _output_dirs(
+    output_dir: str, gammas: list[str] | None, signals: list[str] | None = None
+) -> list[str]:
+    """Weights directory of each portfolio of a sweep, or ``output_dir`` itself.
+
+    Portfolios are ``{output_dir}/{gamma}``, or ``{output_dir}/{signal}/{gamma}``
+    when each gamma is paired with a signal.
+    """
+    if gammas is None:
+        return [output_dir]
+    if signals is None:
+        return [f"{output_dir}/{gamma}" for gamma in gammas]
+    return [f"{output_dir}/{signal}/{gamma}" for signal, gamma in zip(signals, gammas)]
+
+
+def run_sweep_by_dates(
+    df: pl.LazyFrame,
+    gammas: list[str],
+    start: dt.date,
+    end: dt.date,
+    output_dir: str,
+    constraints: list[str],
+    resume: bool = False,
+    checkpoint_size: int = 21,
+    signals: list[str] | None = None,
+) -> None:
+    """Optimize weights for every gamma in ``gammas`` with one solve per date.
+
+    Every constraint in ``_constraint_rows`` is a homogeneous equality, so the
+    optimal weights scale exactly as ``w(gamma) = w(1) / gamma``. Each date's
+    alphas, covariance and constraints are built once, solved once at
+    ``gamma=1`` by a warm-started :class:`WarmStartedMVO` and rescaled for
+    every gamma. Checkpoints go to ``{output_dir}/{gamma}/checkpoints`` as in
+    :func:`run_backtest_by_dates`.
+
+    With ``signals``, each gamma is paired with the alpha column of the same
+    position and written to ``{output_dir}/{signal}/{gamma}``. Every date's
+    covariance is then loaded once for all signals and each signal is solved
+    once, however many gammas it is paired with (see :func:`backtest_signals`).
+    Metrics are logged to the run's own directory, see
+    :func:`research.utils.metrics.run_dir`.
+    """
+    columns = signals or ["alpha"] * len(gammas)
+    output_dirs = _output_dirs(output_dir, gammas, signals)
     filtered = (
-        df.filter(pl.col("date").is_between(year_start, year_end))
-        .select(["date", "barrid", "alpha", "predicted_beta"])
+        df.filter(pl.col("date").is_between(start, end))
+        .select(["date", "barrid", *dict.fromkeys(columns), "predicted_beta"])
         .collect()
     )
+    dates = filtered["date"].unique().sort().to_list()
+
+    if resume:
+        done = {gamma_dir: completed_dates(gamma_dir) for gamma_dir in output_dirs}
+        dates = [
+            date_
+            for date_ in dates
+            if any(date_ not in done[gamma_dir] for gamma_dir in output_dirs)
+        ]
+        print(f"Resuming with {len(dates)} dates left between {start} and {end}")
+    else:
+        done = {gamma_dir: set() for gamma_dir in output_dirs}
+        for gamma_dir in output_dirs:
+            for path in _checkpoints_between(gamma_dir, start, end):
+                os.remove(path)
+
+    # One optimizer per alpha column, each carrying its own warm start
+    optimizers = {
+        column: WarmStartedMVO(gamma=1.0, constraints=constraints)
+        for column in dict.fromkeys(columns)
+    }
+
+    metrics = metrics_path(run_dir(output_dir, output_dirs), start, end)
+
+    def solve_batch(data: pl.DataFrame, batch: list[dt.date]) -> None:
+        unit_weights = backtest_signals(data, optimizers, metrics)
+
+        for column, gamma, gamma_dir in zip(columns, gammas, output_dirs):
+            # Only the dates this portfolio is missing
+            missing = [date_ for date_ in batch if date_ not in done[gamma_dir]]
+            if not missing:
+                continue
+            _write_atomic(
+                unit_weights.filter(
+                    pl.col("signal").eq(column) & pl.col("date").is_in(missing)
+                )
+                .drop("signal")
+                .with_columns(pl.col("weight").truediv(float(gamma))),
+                f"{gamma_dir}/checkpoints/{missing[0]}_{missing[-1]}.parquet",
+            )
+
+    for gamma_dir in output_dirs:
+        os.makedirs(f"{gamma_dir}/checkpoints", exist_ok=True)
+    _solve_batches(filtered, dates, checkpoint_size, metrics, solve_batch)
+
+
+def run_sweep_by_year(
+    df: pl.LazyFrame,
+    gammas: list[str],
+    year: int,
+    output_dir: str,
+    constraints: list[str],
+    resume: bool = False,
+    checkpoint_size: int = 21,
+    signals: list[str] | None = None,
+) -> None:
+    output_dirs = _output_dirs(output_dir, gammas, signals)
+
+    if resume and all(
+        os.path.exists(f"{gamma_dir}/{year}.parquet") for gamma_dir in output_dirs
+    ):
+        print(f"Skipping year={year}, every portfolio already has a year file")
+        return
+
+    run_sweep_by_dates(
+        df=df,
+        gammas=gammas,
+        start=dt.date(year, 1, 1),
+        end=dt.date(year, 12, 31),
+        output_dir=output_dir,
+        constraints=constraints,
+        resume=resume,
+        checkpoint_size=checkpoint_size,
+        signals=signals,
+    )
+
+    for gamma_dir in output_dirs:
+        _write_year(gamma_dir, year)
+
+
+def consolidate_checkpoints(output_dir: str) -> None:
+    """Rewrite the checkpoints in ``output_dir`` as ``{year}.parquet`` files.
+
+    Dates of an existing year file that the checkpoints do not cover, e.g.
+    from before a resumed run, are kept.
+    """
+    checkpoint_paths = sorted(glob.glob(f"{output_dir}/checkpoints/*.parquet"))
+    if not checkpoint_paths:
+        return
+
+    weights = pl.read_parquet(checkpoint_paths).with_columns(
+        pl.col("date").dt.year().alias("year")
+    )
+
+    for (year,), year_weights in weights.partition_by(
+        "year", as_dict=True, include_key=False
+    ).items():
+        year_path = f"{output_dir}/{year}.parquet"
+        if os.path.exists(year_path):
+            year_weights = pl.concat(
+                [
+                    pl.read_parquet(year_path)
+                    .select(year_weights.columns)
+                    .filter(~pl.col("date").is_in(year_weights["date"].implode())),
+                    year_weights,
+                ]
+            )
+        _write_atomic(year_weights.sort("date", "barrid"), year_path)
+
+    shutil.rmtree(f"{output_dir}/checkpoints")
+
 
-    constraint_objects = get_constraints_from_names(constraints)
+def benchmark_warm_start(
+    df: pl.LazyFrame,
+    gamma: float,
+    start: dt.date,
+    end: dt.date,
+    constraints: list[str],
+) -> pl.DataFrame:
+    """Per-date solve time and iterations of cold and warm-started solves.
 
-    weights = sfb.backtest_parallel(
-        data=filtered, constraints=constraint_objects, gamma=gamma, n_cpus=n_cpus
+    Both optimizers see the same factor covariances, which are loaded once per
+    date outside the timings.
+    """
+    data = (
+        df.filter(pl.col("date").is_between(start, end))
+        .select(["date", "barrid", "alpha", "predicted_beta"])
+        .sort("date", "barrid")
+        .collect()
     )
 
-    weights.write_parquet(f"{output_dir}/{year}.parquet")
+    cold = WarmStartedMVO(gamma=gamma, constraints=constraints, warm_start=False)
+    warm = WarmStartedMVO(gamma=gamma, constraints=constraints, warm_start=True)
+
+    rows = []
+    for subset in data.partition_by("date", maintain_order=True):
+        date_ = subset["date"][0]
+        barrids = subset["barrid"].to_list()
+        covariance = FactorCovariance.load(date_, barrids)
+
+        row = {"date": date_, "n_assets": len(barrids)}
+        for name, optimizer in [("cold", cold), ("warm", warm)]:
+            optimizer.solve(
+                barrids=barrids,
+                alphas=subset["alpha"].to_numpy(),
+                covariance=covariance,
+                betas=subset["predicted_beta"].to_numpy(),
+            )
+            row[f"{name}_time"] = optimizer.solve_time
+            row[f"{name}_iterations"] = optimizer.iterations
+        row["max_weight_difference"] = np.abs(cold.weights - warm.weights).max()
+        rows.append(row)
+
+    return pl.DataFrame(rows)
 
 
 if __name__ == "__main__":
@@ -49,22 +989,145 @@ if __name__ == "__main__":
 
     parser.add_argument("--data_path", help="Path to parquet file containing the data")
     parser.add_argument("--gamma", type=float, help="Gamma parameter for MVO")
+    parser.add_argument(
+        "--gammas",
+        nargs="+",
+        help="Gammas to sweep, written to output_dir/{gamma} (replaces --gamma)",
+    )
+    parser.add_argument(
+        "--signals",
+        nargs="+",
+        help="Alpha columns paired with --gammas, written to output_dir/{signal}/{gamma}",
+    )
     parser.add_argument("--year", type=int, help="Year to process")
+    parser.add_argument(
+        "--start", type=dt.date.fromisoformat, help="First date of a chunk to process"
+    )
+    parser.add_argument(
+        "--end", type=dt.date.fromisoformat, help="Last date of a chunk to process"
+    )
     parser.add_argument("--output_dir", help="Directory to write output parquet file")
     parser.add_argument("--n_cpus", type=int, help="Number of cpus to use")
     parser.add_argument("--constraints", nargs="+", help="List of constraint names")
+    parser.add_argument(
+        "--consolidate",
+        action="store_true",
+        help="Combine checkpoints in output_dir into yearly files",
+    )
+    parser.add_argument(
+        "--checkpoint_size",
+        type=int,
+        default=21,
+        help="Number of dates solved between checkpoints",
+    )
+    parser.add_argument(
+        "--warm_start",
+        action="store_true",
+        help="Solve dates sequentially, warm-starting each from the previous date",
+    )
+    parser.add_argument(
+        "--target_risk",
+        type=float,
+        help="Calibrate each date's gamma to this annualized ex-ante volatility",
+    )
+    parser.add_argument(
+        "--benchmark",
+        action="store_true",
+        help="Compare cold and warm-started solve times between --start and --end",
+    )
+    parser.add_argument(
+        "--resume",
+        action="store_true",
+        help="Skip dates that already have weights in output_dir",
+    )
 
     args = parser.parse_args()
 
-    # Load parquet into polars DataFrame
-    df = pl.scan_parquet(args.data_path)
+    if args.signals is not None and (
+        args.gammas is None or len(args.signals) != len(args.gammas)
+    ):
+        parser.error("--signals needs one --gammas value per signal")
 
-    # Run the signal weights calculation
-    run_backtest_by_year(
-        df=df,
-        gamma=args.gamma,
-        year=args.year,
-        output_dir=args.output_dir,
-        n_cpus=args.n_cpus,
-        constraints=args.constraints,
-    )
+    if args.consolidate:
+        for output_dir in _output_dirs(args.output_dir, args.gammas, args.signals):
+            consolidate_checkpoints(output_dir)
+
+    elif args.benchmark:
+        benchmark = benchmark_warm_start(
+            df=scan_input(args.data_path, args.start, args.end),
+            gamma=args.gamma,
+            start=args.start,
+            end=args.end,
+            constraints=args.constraints,
+        )
+        print(benchmark)
+        print(
+            benchmark.select(
+                pl.col("cold_time", "warm_time", "cold_iterations", "warm_iterations")
+                .mean()
+                .name.prefix("mean_"),
+                pl.col("max_weight_difference").max(),
+            )
+        )
+
+    else:
+        # Scan only this task's years
+        if args.year is not None:
+            df = scan_input(
+                args.data_path, dt.date(args.year, 1, 1), dt.date(args.year, 12, 31)
+            )
+        else:
+            df = scan_input(args.data_path, args.start, args.end)
+
+        # Run the signal weights calculation
+        if args.gammas is not None and args.year is not None:
+            run_sweep_by_year(
+                df=df,
+                gammas=args.gammas,
+                year=args.year,
+                output_dir=args.output_dir,
+                constraints=args.constraints,
+                resume=args.resume,
+                checkpoint_size=args.checkpoint_size,
+                signals=args.signals,
+            )
+        elif args.gammas is not None:
+            run_sweep_by_dates(
+                df=df,
+                gammas=args.gammas,
+                start=args.start,
+                end=args.end,
+                output_dir=args.output_dir,
+                constraints=args.constraints,
+                resume=args.resume,
+                checkpoint_size=args.checkpoint_size,
+                signals=args.signals,
+            )
+        elif args.year is not None:
+            run_backtest_by_year(
+                df=df,
+                gamma=args.gamma,
+                year=args.year,
+                output_dir=args.output_dir,
+                n_cpus=args.n_cpus,
+                constraints=args.constraints,
+                resume=args.resume,
+                checkpoint_size=args.checkpoint_size,
+                warm_start=args.warm_start,
+                target_risk=args.target_risk,
+            )
+        else:
+            # Chunks only checkpoint, --consolidate writes the year files
+            run_backtest_by_dates(
+                df=df,
+                gamma=args.gamma,
+                start=args.start,
+                end=args.end,
+                output_dir=args.output_dir,
+                n_cpus=args.n_cpus,
+                constraints=args.constraints,
+                resume=args.resume,
+                checkpoint_size=args.checkpoint_size,
+                warm_start=args.warm_start,
+                target_risk=args.target_risk,
+            )
@@ -0,0 +1,79 @@
+import datetime as dt
+
+import numpy as np
+import polars as pl
+import pytest
+import sf_quant.data as sfd
+
+from research.data.assets import scan_assets
+
+COLUMNS = ["date", "barrid", "return"]
+TODAY = dt.date.today()
+FIRST_DATE = dt.date(TODAY.year - 1, 7, 1)
+
+
+@pytest.fixture
+def fetches(tmp_path, monkeypatch) -> list[tuple[dt.date, dt.date, list[str]]]:
+    """Windows fetched from a database that has published up to yesterday."""
+    monkeypatch.setenv("PROJECT_ROOT", str(tmp_path))
+    rng = np.random.default_rng(0)
+    dates = pl.date_range(FIRST_DATE, TODAY - dt.timedelta(1), eager=True)
+    n_dates, n_barrids = len(dates), 5
+    panel = pl.DataFrame(
+        {
+            "date": dates.gather(np.repeat(np.arange(n_dates), n_barrids)),
+            "barrid": [f"B{i:03d}" for i in range(n_barrids)] * n_dates,
+            "return": rng.normal(0, 2, n_dates * n_barrids),
+            "price": rng.uniform(5, 100, n_dates * n_barrids),
+        }
+    )
+
+    fetches = []
+
+    def load_assets(start, end, columns, in_universe):
+        fetches.append((start, end, sorted(columns)))
+        return panel.filter(pl.col("date").is_between(start, end)).select(columns)
+
+    monkeypatch.setattr(sfd, "load_assets", load_assets)
+    return fetches
+
+
+def test_current_year_is_fresh_for_the_day(fetches) -> None:
+    start, end = dt.date(TODAY.year, 1, 1), dt.date(TODAY.year, 12, 31)
+    first = scan_assets(start, end, COLUMNS, verbose=False).collect()
+    second = scan_assets(start, end, COLUMNS, verbose=False).collect()
+
+    assert len(fetches) == 1
+    assert first["date"].max() == TODAY - dt.timedelta(1)
+    assert first.sort("barrid", "date").equals(second.sort("barrid", "date"))
+
+
+def test_unpublished_window_is_empty(fetches) -> None:
+    scan_assets(FIRST_DATE, TODAY, COLUMNS, verbose=False).collect()
+
+    # A year before the first published date has no rows at all
+    empty = scan_assets(
+        dt.date(FIRST_DATE.year - 1, 1, 1),
+        dt.date(FIRST_DATE.year - 1, 12, 31),
+        COLUMNS,
+        verbose=False,
+    ).collect()
+
+    assert empty.is_empty()
+    assert empty.schema == pl.Schema(
+        {"date": pl.Date, "barrid": pl.String, "return": pl.Float64}
+    )
+
+
+def test_superset_entry_without_hits_is_not_extended(fetches) -> None:
+    last_year = (dt.date(FIRST_DATE.year, 1, 1), dt.date(FIRST_DATE.year, 12, 31))
+    this_year = (dt.date(TODAY.year, 1, 1), dt.date(TODAY.year, 12, 31))
+    scan_assets(*last_year, [*COLUMNS, "price"], verbose=False).collect()
+
+    # The wide entry holds none of this year, so it gets its own narrow entry
+    scan_assets(*this_year, COLUMNS, verbose=False).collect()
+    assert fetches[-1][2] == sorted(COLUMNS)
+
+    # It still serves the years it holds
+    scan_assets(*last_year, COLUMNS, verbose=False).collect()
+    assert len(fetches) == 2
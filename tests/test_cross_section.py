@@ -0,0 +1,75 @@
+import datetime as dt
+from functools import partial
+
+import numpy as np
+import polars as pl
+import pytest
+
+from research.signals import chain, clip, cross_sectional, rank, winsorize, zscore
+
+
+@pytest.fixture
+def panel() -> pl.DataFrame:
+    """Shuffled synthetic panel with null signals and dates of different sizes."""
+    rng = np.random.default_rng(0)
+    dates = pl.date_range(dt.date(2020, 1, 1), dt.date(2020, 3, 31), eager=True)
+    n_dates, n_barrids = len(dates), 50
+    n = n_dates * n_barrids
+
+    return (
+        pl.DataFrame(
+            {
+                "date": dates.gather(np.repeat(np.arange(n_dates), n_barrids)),
+                "barrid": [f"B{i:03d}" for i in range(n_barrids)] * n_dates,
+                "signal": rng.normal(0, 1, n),
+                "draw": rng.random((n, 2)),
+            }
+        )
+        .with_columns(pl.col("draw").arr.to_struct(["missing", "null"]))
+        .unnest("draw")
+        .filter(pl.col("missing").gt(0.1))
+        .with_columns(pl.when(pl.col("null").gt(0.1)).then(pl.col("signal")))
+        .drop("missing", "null")
+        .sample(fraction=1.0, shuffle=True, seed=1)
+    )
+
+
+def over_date(panel: pl.DataFrame) -> pl.DataFrame:
+    """The same transforms as chained ``.over("date")`` windows."""
+    return (
+        panel.with_columns(
+            pl.col("signal")
+            .sub(pl.col("signal").mean())
+            .truediv(pl.col("signal").std())
+            .over("date")
+            .alias("score")
+        )
+        .with_columns(
+            pl.col("score")
+            .clip(
+                lower_bound=pl.col("score").quantile(0.025),
+                upper_bound=pl.col("score").quantile(0.975),
+            )
+            .over("date")
+        )
+        .with_columns(pl.col("score").rank().over("date"))
+        .with_columns(
+            pl.col("signal").clip(lower_bound=-1.0, upper_bound=1.0).alias("signal")
+        )
+    )
+
+
+@pytest.mark.parametrize("lazy", [False, True])
+def test_matches_over(panel: pl.DataFrame, lazy: bool) -> None:
+    exprs = [
+        chain("signal", zscore, winsorize, rank, alias="score"),
+        # Replaces the input column
+        chain("signal", partial(clip, lower=-1.0, upper=1.0)),
+    ]
+    result = cross_sectional(panel.lazy() if lazy else panel, exprs)
+    if lazy:
+        result = result.collect()
+
+    expected = over_date(panel).select(result.columns)
+    assert sorted(result.columns) == ["barrid", "date", "score", "signal"]
+    assert result.sort("date", "barrid").equals(expected.sort("date", "barrid"))
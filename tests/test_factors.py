@@ -0,0 +1,150 @@
+import datetime as dt
+
+import numpy as np
+import polars as pl
+import pytest
+import statsmodels.formula.api as smf
+
+from research.performance import (
+    FF5_FACTORS,
+    factor_regressions,
+    rolling_factor_regressions,
+)
+
+FORMULA = f"return_rf ~ {' + '.join(FF5_FACTORS)}"
+
+
+@pytest.fixture
+def panel() -> pl.DataFrame:
+    """Synthetic factor panel of several portfolios, some with missing dates."""
+    rng = np.random.default_rng(0)
+    n_dates, n_bins = 400, 5
+    dates = pl.date_range(dt.date(2020, 1, 1), dt.date(2021, 2, 3), eager=True)
+    assert len(dates) == n_dates
+
+    factors = pl.DataFrame(
+        {"date": dates, **{f: rng.normal(0, 1, n_dates) for f in FF5_FACTORS}}
+    )
+    loadings = rng.normal(0, 1, (n_bins, len(FF5_FACTORS)))
+    returns = factors.select(FF5_FACTORS).to_numpy() @ loadings.T + rng.normal(
+        0, 1, (n_dates, n_bins)
+    )
+    # Autocorrelated noise so the HAC correction matters
+    returns[1:] += 0.5 * returns[:-1]
+
+    panel = pl.DataFrame(
+        {
+            "date": dates.gather(np.repeat(np.arange(n_dates), n_bins)),
+            "bin": [str(b) for b in range(n_bins)] * n_dates,
+            "return_rf": returns.ravel(),
+        }
+    ).join(factors, on="date")
+
+    # Bins 3 and 4 miss different dates
+    return panel.filter(
+        ~(pl.col("bin").eq("3") & pl.col("date").dt.day().eq(1)),
+        ~(pl.col("bin").eq("4") & pl.col("date").dt.weekday().eq(7)),
+    )
+
+
+def statsmodels_fits(panel: pl.DataFrame, **fit_kwargs) -> pl.DataFrame:
+    fits = []
+    for (bin,), portfolio in panel.partition_by("bin", as_dict=True).items():
+        fit = smf.ols(FORMULA, portfolio).fit(**fit_kwargs)
+        fits.append(
+            pl.DataFrame(
+                {
+                    "bin": bin,
+                    "variable": list(fit.params.index),
+                    "expected_coefficient": fit.params.values,
+                    "expected_tstat": fit.tvalues.values,
+                }
+            )
+        )
+    return pl.concat(fits)
+
+
+def assert_matches(results: pl.DataFrame, expected: pl.DataFrame) -> None:
+    joined = results.join(expected, on=["bin", "variable"])
+    assert joined.height == expected.height == results.height
+
+    for column in ["coefficient", "tstat"]:
+        np.testing.assert_allclose(
+            joined[column].to_numpy(),
+            joined[f"expected_{column}"].to_numpy(),
+            rtol=1e-9,
+            atol=1e-12,
+        )
+
+
+def test_ols_matches_statsmodels(panel: pl.DataFrame) -> None:
+    assert_matches(
+        factor_regressions(panel, returns="return_rf", by=["bin"]),
+        statsmodels_fits(panel),
+    )
+
+
+def test_hac_matches_statsmodels(panel: pl.DataFrame) -> None:
+    assert_matches(
+        factor_regressions(panel, returns="return_rf", by=["bin"], maxlags=5),
+        statsmodels_fits(panel, cov_type="HAC", cov_kwds={"maxlags": 5}),
+    )
+
+
+@pytest.mark.parametrize("window", [60, None])
+def test_rolling_matches_refit(panel: pl.DataFrame, window: int | None) -> None:
+    min_periods = 60
+    rolling = rolling_factor_regressions(
+        panel, returns="return_rf", by=["bin"], window=window, min_periods=min_periods
+    )
+
+    for (bin,), portfolio in (
+        panel.sort("date").partition_by("bin", as_dict=True).items()
+    ):
+        windows = rolling.filter(pl.col("bin").eq(bin))
+        dates = portfolio["date"]
+        assert windows["date"].n_unique() == len(dates) - min_periods + 1
+
+        # A sample of window ends, including the first and last
+        for end in [min_periods - 1, 150, 257, len(dates) - 1]:
+            start = max(end + 1 - window, 0) if window is not None else 0
+            expected = statsmodels_fits(portfolio.slice(start, end + 1 - start))
+            fit = windows.filter(pl.col("date").eq(dates[end]))
+            assert fit["n"].unique().to_list() == [end + 1 - start]
+            assert_matches(fit, expected)
+
+
+def test_expanding_ends_at_full_sample(panel: pl.DataFrame) -> None:
+    portfolio = panel.filter(pl.col("bin").eq("4")).drop("bin")
+
+    expanding = rolling_factor_regressions(
+        portfolio, returns="return_rf", window=None, min_periods=60
+    )
+    last = expanding.filter(pl.col("date").eq(portfolio["date"].max()))
+    full = factor_regressions(portfolio, returns="return_rf")
+
+    assert last["n"].unique().to_list() == [portfolio.height]
+    assert last["variable"].to_list() == full["variable"].to_list()
+    for column in ["coefficient", "std_error", "tstat"]:
+        np.testing.assert_allclose(last[column], full[column], rtol=1e-9)
+
+
+def test_rolling_skips_short_windows(panel: pl.DataFrame) -> None:
+    assert rolling_factor_regressions(
+        panel, returns="return_rf", by=["bin"], min_periods=1000
+    ).is_empty()
+
+
+@pytest.mark.parametrize("window, min_periods", [(252, 5), (3, None)])
+def test_rolling_needs_a_period_per_regressor(
+    panel: pl.DataFrame, window: int, min_periods: int | None
+) -> None:
+    # An intercept and five factors cannot be fit on fewer than six dates
+    with pytest.raises(ValueError, match="min_periods"):
+        rolling_factor_regressions(
+            panel,
+            returns="return_rf",
+            by=["bin"],
+            window=window,
+            min_periods=min_periods,
+        )
@@ -0,0 +1,111 @@
+import datetime as dt
+
+import numpy as np
+import polars as pl
+import pytest
+import sf_quant.performance as sfp
+from scipy import stats
+
+from research.data import forward_return_exprs
+from research.performance import compute_ics
+
+SIGNALS = ["signal_a", "signal_b"]
+HORIZONS = [1, 5]
+
+
+@pytest.fixture
+def panel() -> pl.DataFrame:
+    """Synthetic panel with signals and returns missing on different rows."""
+    rng = np.random.default_rng(0)
+    dates = pl.date_range(dt.date(2020, 1, 1), dt.date(2020, 4, 30), eager=True)
+    n_dates, n_barrids = len(dates), 40
+    n = n_dates * n_barrids
+
+    return (
+        pl.DataFrame(
+            {
+                "date": dates.gather(np.repeat(np.arange(n_dates), n_barrids)),
+                "barrid": [f"B{i:03d}" for i in range(n_barrids)] * n_dates,
+                "return": rng.normal(0, 0.02, n),
+                "signal_a": rng.normal(0, 1, n),
+                # Coarse values so ranks have ties
+                "signal_b": rng.normal(0, 1, n).round(1),
+                "draw": rng.random((n, 3)),
+            }
+        )
+        .with_columns(pl.col("draw").arr.to_struct(["a", "b", "return"]))
+        .unnest("draw", separator="_")
+        .with_columns(
+            # Null returns and signals, and non-finite signals
+            pl.when(pl.col("draw_return").gt(0.05)).then(pl.col("return")),
+            pl.when(pl.col("draw_a").gt(0.1)).then(pl.col("signal_a")),
+            pl.when(pl.col("draw_b").gt(0.02))
+            .then(pl.col("signal_b"))
+            .otherwise(float("inf")),
+        )
+        .drop("draw_a", "draw_b", "draw_return")
+        .sort("barrid", "date")
+        .with_columns(forward_return_exprs(HORIZONS))
+    )
+
+
+@pytest.mark.parametrize("horizon", HORIZONS)
+@pytest.mark.parametrize("signal", SIGNALS)
+def test_matches_generate_alpha_ics(
+    panel: pl.DataFrame, signal: str, horizon: int
+) -> None:
+    ics = compute_ics(panel, signals=SIGNALS, horizons=HORIZONS).filter(
+        pl.col("signal").eq(signal), pl.col("horizon").eq(horizon)
+    )
+
+    # generate_alpha_ics compounds returns from ``date`` on, so it is given each
+    # barrid's next-day return. Its window shift runs across barrids, so the
+    # last dates of the sample are left out.
+    alphas = panel.select("date", "barrid", pl.col(signal).alias("alpha"))
+    rets = panel.select(
+        "date", "barrid", pl.col("return").shift(-1).over("barrid").alias("return")
+    )
+    last_date = panel["date"].unique().sort()[-horizon - 1]
+    expected = [
+        sfp.generate_alpha_ics(alphas, rets, method=method, window=horizon)
+        .filter(pl.col("date").le(last_date))
+        .select("date", "n", pl.col("ic").alias(f"expected_{method}_ic"))
+        for method in ["pearson", "rank"]
+    ]
+    joined = (
+        expected[0]
+        .join(expected[1], on=["date", "n"])
+        .join(ics, on="date", suffix="_ics")
+    )
+    assert joined.height == expected[0].height > 0
+
+    np.testing.assert_array_equal(joined["n_ics"], joined["n"])
+    for method in ["pearson", "rank"]:
+        np.testing.assert_allclose(
+            joined[f"{method}_ic"],
+            joined[f"expected_{method}_ic"],
+            rtol=1e-9,
+            atol=1e-12,
+        )
+
+
+def test_masks_pairs_jointly() -> None:
+    signal = [1.0, 2.0, None, 4.0, 5.0, 6.0, float("nan")]
+    forward_return = [0.3, None, 0.1, 0.5, 0.2, 0.6, 0.4]
+    data = pl.DataFrame(
+        {
+            "date": [dt.date(2020, 1, 2)] * len(signal),
+            "signal": signal,
+            "fwd_return_1": forward_return,
+        }
+    )
+
+    ics = compute_ics(data, signals=["signal"], horizons=[1])
+
+    # Only rows 0, 3, 4 and 5 have both a finite signal and a return
+    rows = [0, 3, 4, 5]
+    x = [signal[i] for i in rows]
+    y = [forward_return[i] for i in rows]
+    assert ics["n"].to_list() == [len(rows)]
+    assert ics["pearson_ic"][0] == pytest.approx(stats.pearsonr(x, y).statistic)
+    assert ics["rank_ic"][0] == pytest.approx(stats.spearmanr(x, y).statistic)
@@ -0,0 +1,142 @@
+import datetime as dt
+
+import numpy as np
+import polars as pl
+import pytest
+
+from research.signals import IncrementalSignals, barra_reversal, dollar_volume_score
+
+COLUMNS = ["barra_reversal", "dollar_volume_score"]
+
+
+@pytest.fixture
+def panel() -> pl.DataFrame:
+    """Synthetic panel with nulls, missing days, and barrids that enter and leave."""
+    rng = np.random.default_rng(0)
+    dates = pl.date_range(dt.date(2020, 1, 1), dt.date(2021, 6, 30), eager=True)
+    n_dates, n_barrids = len(dates), 30
+
+    panel = (
+        pl.DataFrame(
+            {
+                "date": dates.gather(np.repeat(np.arange(n_dates), n_barrids)),
+                "barrid": [f"B{i:03d}" for i in range(n_barrids)] * n_dates,
+                "day": np.repeat(np.arange(n_dates), n_barrids),
+                "specific_return": rng.normal(0, 2, n_dates * n_barrids),
+                "daily_volume": rng.lognormal(12, 1, n_dates * n_barrids),
+                "price": rng.uniform(5, 100, n_dates * n_barrids),
+                "draw": rng.random((n_dates * n_barrids, 3)),
+            }
+        )
+        .with_columns(
+            pl.col("draw").arr.to_struct(["missing", "no_return", "no_volume"])
+        )
+        .unnest("draw")
+    )
+
+    first_day = {f"B{i:03d}": i * 10 for i in range(20, 25)}
+    last_day = {f"B{i:03d}": 300 + i * 5 for i in range(25, 30)}
+    return (
+        panel
+        # Missing days
+        .filter(pl.col("missing").gt(0.05))
+        # Barrids that enter late or leave early
+        .filter(
+            pl.col("day").ge(pl.col("barrid").replace_strict(first_day, default=0)),
+            pl.col("day").le(
+                pl.col("barrid").replace_strict(last_day, default=n_dates)
+            ),
+        )
+        # Null returns and volumes
+        .with_columns(
+            pl.when(pl.col("no_return").gt(0.03))
+            .then(pl.col("specific_return"))
+            .alias("specific_return"),
+            pl.when(pl.col("no_volume").gt(0.03))
+            .then(pl.col("daily_volume"))
+            .alias("daily_volume"),
+        )
+        .drop("day", "missing", "no_return", "no_volume")
+    )
+
+
+def batch_signals(panel: pl.DataFrame) -> pl.DataFrame:
+    return (
+        panel.sort("barrid", "date")
+        .with_columns(
+            barra_reversal(),
+            pl.col("daily_volume").mul(pl.col("price")).log1p().alias("dollar_volume"),
+        )
+        .with_columns(dollar_volume_score())
+        .select("date", "barrid", *COLUMNS)
+    )
+
+
+def replay(state: IncrementalSignals, panel: pl.DataFrame) -> pl.DataFrame:
+    return pl.concat(
+        state.update(day).select("date", "barrid", *COLUMNS)
+        for day in panel.sort("date", "barrid").partition_by(
+            "date", maintain_order=True
+        )
+    )
+
+
+def assert_matches(incremental: pl.DataFrame, batch: pl.DataFrame) -> None:
+    joined = batch.join(incremental, on=["date", "barrid"], suffix="_incremental")
+    assert joined.height == batch.height
+
+    for column in COLUMNS:
+        expected = joined[column].to_numpy()
+        actual = joined[f"{column}_incremental"].to_numpy()
+        np.testing.assert_array_equal(np.isnan(expected), np.isnan(actual))
+        np.testing.assert_allclose(actual, expected, rtol=1e-9, atol=1e-12)
+
+
+def test_update_matches_batch(panel: pl.DataFrame) -> None:
+    assert_matches(replay(IncrementalSignals(), panel), batch_signals(panel))
+
+
+def test_save_load_round_trip(panel: pl.DataFrame, tmp_path) -> None:
+    split = dt.date(2020, 11, 1)
+    history = panel.filter(pl.col("date").lt(split))
+
+    path = tmp_path / "state.parquet"
+    IncrementalSignals.from_history(history).save(path)
+    state = IncrementalSignals.load(path)
+
+    assert_matches(
+        replay(state, panel.filter(pl.col("date").ge(split))),
+        batch_signals(panel).filter(pl.col("date").ge(split)),
+    )
+
+
+def test_score_matches_experiments(panel: pl.DataFrame) -> None:
+    # The volume z-score experiments 7a, 8, 12a and 13 computed inline
+    expected = (
+        panel.sort("barrid", "date")
+        .with_columns(
+            pl.col("daily_volume").mul(pl.col("price")).log1p().alias("dollar_volume")
+        )
+        .with_columns(
+            dollar_volume_mean=pl.col("dollar_volume")
+            .rolling_mean(window_size=252, min_samples=1)
+            .over("barrid"),
+            dollar_volume_std=pl.col("dollar_volume")
+            .rolling_std(window_size=252, min_samples=2)
+            .over("barrid"),
+        )
+        .with_columns(
+            (
+                (pl.col("dollar_volume") - pl.col("dollar_volume_mean"))
+                / pl.col("dollar_volume_std").fill_null(1.0).clip(lower_bound=0.0001)
+            )
+            .fill_null(0.0)
+            .alias("volume_score")
+        )
+    )
+
+    batch = batch_signals(panel).join(expected, on=["date", "barrid"])
+    assert batch.height == panel.height
+    np.testing.assert_allclose(
+        batch["dollar_volume_score"], batch["volume_score"], rtol=1e-12
+    )
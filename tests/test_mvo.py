@@ -0,0 +1,350 @@
+import datetime as dt
+import glob
+
+import numpy as np
+import polars as pl
+import pytest
+import sf_quant.data as sfd
+import sf_quant.optimizer as sfo
+
+from research.utils.covariance import FactorCovariance
+from research.utils.metrics import load_metrics, run_dir, summarize_metrics
+from research.utils.mvo import (
+    WarmStartedMVO,
+    consolidate_checkpoints,
+    factor_mve_optimizer,
+    get_constraints_from_names,
+    run_backtest_by_dates,
+    run_sweep_by_dates,
+)
+
+SIGNALS = ["signal_a", "signal_b"]
+GAMMAS = ["100", "50"]
+CONSTRAINTS = ["ZeroBeta", "ZeroInvestment"]
+FACTORS = ["factor_a", "factor_b", "factor_c"]
+START, END = dt.date(2020, 1, 2), dt.date(2020, 1, 15)
+
+
+@pytest.fixture
+def project_root(tmp_path, monkeypatch):
+    """Project root whose covariance cache holds a synthetic factor model per date."""
+    monkeypatch.setenv("PROJECT_ROOT", str(tmp_path))
+    rng = np.random.default_rng(0)
+    n_barrids = 40
+
+    for date_ in pl.date_range(START, END, eager=True):
+        date_dir = tmp_path / "cache" / "covariances" / str(date_.year) / str(date_)
+        date_dir.mkdir(parents=True)
+
+        loadings = rng.normal(0, 0.1, (len(FACTORS), len(FACTORS)))
+        factor_covariance = loadings @ loadings.T + 0.01 * np.eye(len(FACTORS))
+        pl.DataFrame(
+            {"factor_1": FACTORS, **dict(zip(FACTORS, factor_covariance.T))}
+        ).write_parquet(date_dir / "factor_covariance.parquet")
+        pl.DataFrame(
+            {
+                "barrid": [f"B{i:03d}" for i in range(n_barrids)],
+                **dict(zip(FACTORS, rng.normal(0, 1, (len(FACTORS), n_barrids)))),
+                "specific_variance": rng.uniform(0.01, 0.1, n_barrids),
+            }
+        ).write_parquet(date_dir / "assets.parquet")
+
+    return tmp_path
+
+
+@pytest.fixture
+def alphas(project_root) -> pl.DataFrame:
+    """Alphas of two signals with different universes, and predicted betas."""
+    rng = np.random.default_rng(1)
+    dates = pl.date_range(START, END, eager=True)
+    n_dates, n_barrids = len(dates), 40
+    n = n_dates * n_barrids
+
+    return (
+        pl.DataFrame(
+            {
+                "date": dates.gather(np.repeat(np.arange(n_dates), n_barrids)),
+                "barrid": [f"B{i:03d}" for i in range(n_barrids)] * n_dates,
+                "signal_a": rng.normal(0, 0.05, n),
+                "signal_b": rng.normal(0, 0.05, n),
+                "predicted_beta": rng.uniform(0.5, 1.5, n),
+                "draw": rng.random((n, 2)),
+            }
+        )
+        .with_columns(
+            pl.when(pl.col("draw").arr.get(0).gt(0.1)).then(pl.col("signal_a")),
+            pl.when(pl.col("draw").arr.get(1).gt(0.2)).then(pl.col("signal_b")),
+        )
+        .drop("draw")
+    )
+
+
+@pytest.fixture
+def barra(monkeypatch) -> dict:
+    """One date of factor model data in sf_quant's percent units.
+
+    Factor covariances are in percent squared and specific risks are
+    volatilities in percent, as the ``sfd`` loaders return them.
+    """
+    rng = np.random.default_rng(2)
+    barrids = [f"B{i:03d}" for i in range(60)]
+
+    loadings = rng.normal(0, 1, (len(FACTORS), len(FACTORS)))
+    factor_covariance = loadings @ loadings.T + np.eye(len(FACTORS))
+    upper = np.where(np.triu(np.ones_like(loadings)) > 0, factor_covariance, np.nan)
+
+    exposures = pl.DataFrame(
+        {
+            "barrid": barrids,
+            **dict(zip(FACTORS, rng.normal(0, 1, (len(FACTORS), len(barrids))))),
+        }
+    )
+    assets = pl.DataFrame(
+        {
+            "date": START,
+            "barrid": barrids,
+            "specific_risk": rng.uniform(1, 3, len(barrids)),
+        }
+    )
+    covariances = pl.DataFrame({"factor_1": FACTORS, **dict(zip(FACTORS, upper.T))})
+
+    monkeypatch.setattr(sfd, "get_factor_names", lambda: FACTORS)
+    monkeypatch.setattr(sfd, "load_exposures_by_date", lambda date_: exposures)
+    monkeypatch.setattr(
+        sfd,
+        "load_assets_by_date",
+        lambda date_, in_universe, columns: assets.select(columns),
+    )
+    monkeypatch.setattr(sfd, "load_covariances_by_date", lambda date_: covariances)
+
+    return {
+        "barrids": barrids,
+        "exposures": exposures,
+        "assets": assets,
+        "factor_covariance": factor_covariance,
+    }
+
+
+def mve_weights(
+    barra: dict, barrids: list[str], alphas: np.ndarray, betas: np.ndarray
+) -> np.ndarray:
+    """``sfo.mve_optimizer`` on the components ``sfd.construct_factor_model_components`` builds."""
+    rows = pl.DataFrame({"barrid": barrids})
+    return sfo.mve_optimizer(
+        ids=barrids,
+        alphas=alphas,
+        factor_exposures=rows.join(barra["exposures"], on="barrid", how="left")
+        .select(FACTORS)
+        .to_numpy(),
+        factor_covariance=barra["factor_covariance"] / 100**2,
+        specific_risk=rows.join(barra["assets"], on="barrid", how="left")[
+            "specific_risk"
+        ].to_numpy()
+        ** 2
+        / 100**2,
+        constraints=get_constraints_from_names(CONSTRAINTS),
+        gamma=100,
+        betas=betas,
+    )["weight"].to_numpy()
+
+
+def read_weights(output_dir: str) -> pl.DataFrame:
+    consolidate_checkpoints(output_dir)
+    return pl.read_parquet(glob.glob(f"{output_dir}/*.parquet")).sort("date", "barrid")
+
+
+def test_signals_match_separate_runs(project_root, alphas: pl.DataFrame) -> None:
+    run_sweep_by_dates(
+        df=alphas.lazy(),
+        gammas=GAMMAS,
+        start=START,
+        end=END,
+        output_dir=f"{project_root}/weights",
+        constraints=CONSTRAINTS,
+        checkpoint_size=4,
+        signals=SIGNALS,
+    )
+
+    for signal, gamma in zip(SIGNALS, GAMMAS):
+        single_dir = f"{project_root}/single/{signal}/{gamma}"
+        run_backtest_by_dates(
+            df=alphas.lazy()
+            .filter(pl.col(signal).is_not_null())
+            .rename({signal: "alpha"}),
+            gamma=float(gamma),
+            start=START,
+            end=END,
+            output_dir=single_dir,
+            n_cpus=1,
+            constraints=CONSTRAINTS,
+            checkpoint_size=4,
+            warm_start=True,
+        )
+
+        combined = read_weights(f"{project_root}/weights/{signal}/{gamma}")
+        single = read_weights(single_dir)
+
+        # Each signal is solved on its own universe
+        assert combined.select("date", "barrid").equals(single.select("date", "barrid"))
+        assert combined.height == alphas[signal].count()
+
+        # Same optimum, rescaled from the gamma=1 solve
+        scale = np.abs(single["weight"]).max()
+        np.testing.assert_allclose(
+            combined["weight"], single["weight"], atol=1e-6 * scale
+        )
+
+    # Anchor the first signal to sf_quant's optimizer, which shares no solver code
+    signal, gamma = SIGNALS[0], GAMMAS[0]
+    combined = read_weights(f"{project_root}/weights/{signal}/{gamma}")
+    for (date_,), universe in (
+        alphas.drop_nulls(signal)
+        .sort("date", "barrid")
+        .partition_by("date", as_dict=True, maintain_order=True)
+        .items()
+    ):
+        barrids = universe["barrid"].to_list()
+        covariance = FactorCovariance.load(date_, barrids)
+        expected = sfo.mve_optimizer(
+            ids=barrids,
+            alphas=universe[signal].to_numpy(),
+            factor_exposures=covariance.exposures,
+            factor_covariance=covariance.factor_covariance,
+            specific_risk=covariance.specific_variance,
+            constraints=get_constraints_from_names(CONSTRAINTS),
+            gamma=float(gamma),
+            betas=universe["predicted_beta"].to_numpy(),
+        )["weight"].to_numpy()
+        np.testing.assert_allclose(
+            combined.filter(pl.col("date").eq(date_))["weight"],
+            expected,
+            atol=1e-6 * np.abs(expected).max(),
+        )
+
+
+def test_default_path_logs_dates(project_root, alphas: pl.DataFrame, monkeypatch):
+    def factor_model_components(date_, barrids):
+        # sf_quant's "specific_risk" component is the decimal specific variance
+        covariance = FactorCovariance.load(date_, barrids)
+        return (
+            covariance.exposures,
+            covariance.factor_covariance,
+            covariance.specific_variance,
+        )
+
+    monkeypatch.setattr(
+        sfd, "construct_factor_model_components", factor_model_components
+    )
+
+    output_dir = f"{project_root}/weights/signal_a/100"
+    run_backtest_by_dates(
+        df=alphas.lazy().rename({"signal_a": "alpha"}).drop_nulls("alpha"),
+        gamma=100,
+        start=START,
+        end=END,
+        output_dir=output_dir,
+        n_cpus=1,
+        constraints=CONSTRAINTS,
+        checkpoint_size=4,
+    )
+
+    slowest = summarize_metrics(output_dir, n_slowest=100)["slowest"]
+    assert slowest["iterations"].gt(0).all()
+    weights = read_weights(output_dir)
+    assert (
+        slowest.sort("date")
+        .select("date", "n_assets")
+        .equals(
+            weights.group_by("date")
+            .agg(pl.len().cast(pl.Int64).alias("n_assets"))
+            .sort("date")
+        )
+    )
+
+
+def test_runs_log_to_their_own_metrics(project_root, alphas: pl.DataFrame) -> None:
+    output_dir = f"{project_root}/weights"
+    runs = [(SIGNALS, GAMMAS), (SIGNALS[:1], GAMMAS[:1])]
+    for signals, gammas in runs:
+        run_sweep_by_dates(
+            df=alphas.lazy(),
+            gammas=gammas,
+            start=START,
+            end=END,
+            output_dir=output_dir,
+            constraints=CONSTRAINTS,
+            signals=signals,
+        )
+
+    metrics_dirs = [
+        run_dir(output_dir, [f"{output_dir}/{s}/{g}" for s, g in zip(*run)])
+        for run in runs
+    ]
+    assert len(set(metrics_dirs)) == len(runs)
+    assert not glob.glob(f"{output_dir}/metrics/*")
+
+    # Each run's records cover only its own signals
+    for (signals, _), metrics_dir in zip(runs, metrics_dirs):
+        dates = summarize_metrics(metrics_dir, n_slowest=1000)["slowest"]
+        assert dates["date"].n_unique() == alphas["date"].n_unique()
+        assert (
+            load_metrics(metrics_dir)["signal"].drop_nulls().unique().sort().to_list()
+            == signals
+        )
+
+
+@pytest.mark.parametrize("dense", [True, False])
+def test_warm_started_matches_mve_optimizer(barra: dict, tmp_path, dense: bool):
+    rng = np.random.default_rng(3)
+    optimizer = WarmStartedMVO(gamma=100, constraints=CONSTRAINTS)
+    universe = barra["barrids"]
+
+    # A cold solve, a warm solve of the same universe and one of a changed universe
+    for barrids in [universe[:40], universe[:40], universe[10:50]]:
+        alphas = rng.normal(0, 1e-3, len(barrids))
+        betas = rng.uniform(0.5, 1.5, len(barrids))
+        covariance = FactorCovariance.load(
+            START, barrids, cache_dir=tmp_path / "covariances"
+        )
+
+        weights = optimizer.solve(
+            barrids=barrids,
+            alphas=alphas,
+            covariance=covariance.to_dense() if dense else covariance,
+            betas=betas,
+        )
+        expected = mve_weights(barra, barrids, alphas, betas)
+        np.testing.assert_allclose(
+            weights, expected, atol=1e-6 * np.abs(expected).max()
+        )
+
+
+def test_factor_form_matches_dense(barra: dict, tmp_path) -> None:
+    rng = np.random.default_rng(4)
+    barrids = barra["barrids"]
+    alphas = rng.normal(0, 1e-3, len(barrids))
+    betas = rng.uniform(0.5, 1.5, len(barrids))
+    covariance = FactorCovariance.load(START, barrids, cache_dir=tmp_path)
+
+    weights = factor_mve_optimizer(
+        ids=barrids,
+        alphas=alphas,
+        covariance=covariance,
+        constraints=get_constraints_from_names(CONSTRAINTS),
+        gamma=100,
+        betas=betas,
+    )["weight"].to_numpy()
+
+    # The dense covariance as a model with one factor per asset
+    expected = sfo.mve_optimizer(
+        ids=barrids,
+        alphas=alphas,
+        factor_exposures=np.eye(len(barrids)),
+        factor_covariance=covariance.to_dense(),
+        specific_risk=np.zeros(len(barrids)),
+        constraints=get_constraints_from_names(CONSTRAINTS),
+        gamma=100,
+        betas=betas,
+    )["weight"].to_numpy()
+
+    np.testing.assert_allclose(weights, expected, atol=1e-6 * np.abs(expected).max())
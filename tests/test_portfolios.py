@@ -0,0 +1,143 @@
+import datetime as dt
+
+import numpy as np
+import polars as pl
+import pytest
+
+from research.performance import portfolio_analytics, scan_weights
+
+PORTFOLIOS = [("signal_a", 100), ("signal_a", "risk_0.05"), ("signal_b", 100)]
+MIN_WEIGHT = 1e-6
+
+
+@pytest.fixture
+def forward_returns() -> pl.DataFrame:
+    """Synthetic next-day returns of every barrid, some null."""
+    rng = np.random.default_rng(0)
+    dates = pl.date_range(dt.date(2019, 11, 1), dt.date(2020, 2, 29), eager=True)
+    n_dates, n_barrids = len(dates), 30
+    n = n_dates * n_barrids
+
+    return pl.DataFrame(
+        {
+            "date": dates.gather(np.repeat(np.arange(n_dates), n_barrids)),
+            "barrid": [f"B{i:03d}" for i in range(n_barrids)] * n_dates,
+            "fwd_return_1": rng.normal(0, 0.02, n),
+            "missing": rng.random(n),
+        }
+    ).select(
+        "date",
+        "barrid",
+        pl.when(pl.col("missing").gt(0.05)).then(pl.col("fwd_return_1")),
+    )
+
+
+@pytest.fixture
+def weights_dir(forward_returns: pl.DataFrame, tmp_path) -> str:
+    """Weights store of several portfolios whose barrids enter and leave."""
+    rng = np.random.default_rng(1)
+    for signal, gamma in PORTFOLIOS:
+        # Each date holds a random subset of barrids
+        held = forward_returns.select("date", "barrid").filter(
+            pl.Series(rng.random(forward_returns.height) > 0.3)
+        )
+        weights = held.with_columns(
+            pl.Series("weight", rng.normal(0, 0.01, held.height))
+        ).with_columns(
+            # Weights the holdings count ignores
+            pl.when(pl.int_range(pl.len()).mod(11).eq(0))
+            .then(1e-9)
+            .otherwise(pl.col("weight"))
+            .alias("weight")
+        )
+
+        portfolio_dir = tmp_path / signal / str(gamma)
+        portfolio_dir.mkdir(parents=True)
+        for (year,), year_weights in (
+            weights.with_columns(pl.col("date").dt.year().alias("year"))
+            .partition_by("year", as_dict=True, include_key=False)
+            .items()
+        ):
+            year_weights.write_parquet(portfolio_dir / f"{year}.parquet")
+
+    return str(tmp_path)
+
+
+def pivot_analytics(
+    weights: pl.DataFrame, forward_returns: pl.DataFrame
+) -> pl.DataFrame:
+    """Analytics of one portfolio from dates × barrids matrices."""
+    wide = weights.pivot(on="barrid", index="date", values="weight").sort("date")
+    barrids = wide.columns[1:]
+    W = wide.select(barrids).fill_null(0).to_numpy()
+    R = (
+        wide.select("date")
+        .join(
+            forward_returns.pivot(on="barrid", index="date", values="fwd_return_1"),
+            on="date",
+            how="left",
+        )
+        .select(barrids)
+        .fill_null(0)
+        .to_numpy()
+    )
+
+    returns = (W * R).sum(axis=1)
+    log_wealth = np.log1p(returns).cumsum()
+    turnover = np.abs(np.diff(W, axis=0)).sum(axis=1)
+
+    return pl.DataFrame(
+        {
+            "date": wide["date"],
+            "expected_return": returns,
+            "expected_cumulative_return": log_wealth * 100,
+            "expected_drawdown": np.exp(log_wealth - np.maximum.accumulate(log_wealth))
+            - 1,
+            "expected_turnover": np.concatenate([[np.nan], turnover]),
+            "expected_holdings": (np.abs(W) > MIN_WEIGHT).sum(axis=1),
+        }
+    )
+
+
+def test_matches_pivot(weights_dir: str, forward_returns: pl.DataFrame) -> None:
+    weights = scan_weights(PORTFOLIOS, weights_dir=weights_dir)
+    analytics = portfolio_analytics(weights, forward_returns, min_weight=MIN_WEIGHT)
+
+    for signal, gamma in PORTFOLIOS:
+        portfolio = analytics.filter(
+            pl.col("signal").eq(signal), pl.col("gamma").eq(str(gamma))
+        )
+        expected = pivot_analytics(
+            weights.filter(pl.col("signal").eq(signal), pl.col("gamma").eq(str(gamma)))
+            .collect()
+            .drop("signal", "gamma"),
+            forward_returns,
+        )
+        joined = expected.join(portfolio, on="date")
+        assert joined.height == expected.height == portfolio.height
+
+        assert joined["turnover"][0] is None
+        np.testing.assert_array_equal(joined["holdings"], joined["expected_holdings"])
+        for column in ["return", "cumulative_return", "drawdown", "turnover"]:
+            np.testing.assert_allclose(
+                joined[column].fill_null(np.nan),
+                joined[f"expected_{column}"],
+                rtol=1e-9,
+                atol=1e-12,
+            )
+
+
+def test_scan_weights_filters_dates(weights_dir: str) -> None:
+    start, end = dt.date(2020, 1, 15), dt.date(2020, 2, 10)
+    weights = scan_weights(
+        PORTFOLIOS, start=start, end=end, weights_dir=weights_dir
+    ).collect()
+
+    assert weights["date"].min() >= start
+    assert weights["date"].max() <= end
+    assert sorted(weights.select("signal", "gamma").unique().rows()) == sorted(
+        (signal, str(gamma)) for signal, gamma in PORTFOLIOS
+    )
+
+    with pytest.raises(FileNotFoundError):
+        scan_weights([("signal_c", 100)], weights_dir=weights_dir)
@@ -0,0 +1,101 @@
+import datetime as dt
+
+import numpy as np
+import polars as pl
+import pytest
+
+from research.performance import quantile_returns
+
+SIGNALS = ["signal_a", "signal_b"]
+NUM_BINS = [5, 10]
+
+
+@pytest.fixture
+def panel() -> pl.DataFrame:
+    """Synthetic panel with tied and null signals and null returns."""
+    rng = np.random.default_rng(0)
+    dates = pl.date_range(dt.date(2020, 1, 1), dt.date(2020, 3, 31), eager=True)
+    n_dates, n_barrids = len(dates), 97
+    n = n_dates * n_barrids
+
+    return (
+        pl.DataFrame(
+            {
+                "date": dates.gather(np.repeat(np.arange(n_dates), n_barrids)),
+                "barrid": [f"B{i:03d}" for i in range(n_barrids)] * n_dates,
+                "return": rng.normal(0, 0.02, n),
+                "weight": rng.uniform(1, 10, n),
+                "signal_a": rng.normal(0, 1, n),
+                # Coarse values so ranks have ties
+                "signal_b": rng.normal(0, 1, n).round(1),
+                "draw": rng.random((n, 3)),
+            }
+        )
+        .with_columns(pl.col("draw").arr.to_struct(["a", "b", "return"]))
+        .unnest("draw", separator="_")
+        .with_columns(
+            pl.when(pl.col("draw_return").gt(0.05)).then(pl.col("return")),
+            pl.when(pl.col("draw_a").gt(0.1)).then(pl.col("signal_a")),
+            pl.when(pl.col("draw_b").gt(0.1)).then(pl.col("signal_b")),
+        )
+        .drop("draw_a", "draw_b", "draw_return")
+    )
+
+
+def qcut_returns(
+    panel: pl.DataFrame, signal: str, k: int, weight: str | None = None
+) -> pl.DataFrame:
+    """Bin returns the way the experiments did, one qcut per date."""
+    if weight is None:
+        bin_return = pl.col("return").mean()
+    else:
+        held = pl.col("return").is_not_null() & pl.col(weight).is_not_null()
+        bin_return = (pl.col("return") * pl.col(weight)).sum() / pl.col(weight).filter(
+            held
+        ).sum()
+
+    return (
+        panel.with_columns(
+            pl.col(signal)
+            .qcut(k, labels=[str(i) for i in range(k)])
+            .over("date")
+            .cast(pl.String)
+            .alias("bin")
+        )
+        .drop_nulls("bin")
+        .group_by("date", "bin")
+        .agg(bin_return.alias("expected_return"))
+    )
+
+
+@pytest.mark.parametrize("weight", [None, "weight"])
+def test_bins_match_qcut(panel: pl.DataFrame, weight: str | None) -> None:
+    returns = quantile_returns(panel, signals=SIGNALS, num_bins=NUM_BINS, weight=weight)
+
+    for signal in SIGNALS:
+        for k in NUM_BINS:
+            expected = qcut_returns(panel, signal, k, weight)
+            portfolio = returns.filter(
+                pl.col("signal").eq(signal),
+                pl.col("num_bins").eq(k),
+                pl.col("bin").ne("spread"),
+            )
+            joined = expected.join(portfolio, on=["date", "bin"], how="full")
+            assert joined.height == expected.height == portfolio.height
+
+            np.testing.assert_allclose(
+                joined["return"], joined["expected_return"], rtol=1e-9, atol=1e-12
+            )
+
+
+def test_spread_is_top_minus_bottom(panel: pl.DataFrame) -> None:
+    returns = quantile_returns(panel, signals=SIGNALS, num_bins=NUM_BINS)
+
+    wide = returns.pivot(
+        on="bin", index=["date", "signal", "num_bins"], values="return"
+    )
+    for k in NUM_BINS:
+        portfolio = wide.filter(pl.col("num_bins").eq(k))
+        np.testing.assert_allclose(
+            portfolio["spread"], portfolio[str(k - 1)] - portfolio["0"]
+        )
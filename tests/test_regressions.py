@@ -0,0 +1,95 @@
+import datetime as dt
+
+import numpy as np
+import polars as pl
+import pytest
+import statsmodels.formula.api as smf
+
+from research.performance import grouped_regressions
+
+QUANTILES = [str(i) for i in range(10)]
+
+
+@pytest.fixture
+def regression_data() -> pl.DataFrame:
+    """Synthetic alphas and forward returns binned by date, as in experiment 11."""
+    rng = np.random.default_rng(0)
+    dates = pl.date_range(dt.date(2019, 12, 1), dt.date(2020, 1, 31), eager=True)
+    n_dates, n_barrids = len(dates), 50
+    n = n_dates * n_barrids
+
+    alpha = rng.normal(0, 1, n)
+    return (
+        pl.DataFrame(
+            {
+                "date": dates.gather(np.repeat(np.arange(n_dates), n_barrids)),
+                "alpha": alpha,
+                "fwd_return": 0.01 * alpha + rng.normal(0, 0.05, n),
+                "missing": rng.random(n),
+            }
+        )
+        .with_columns(
+            pl.col("alpha")
+            .qcut(len(QUANTILES), labels=QUANTILES)
+            .over("date")
+            .alias("quantile"),
+            # Null returns, which the regressions drop
+            pl.when(pl.col("missing").gt(0.05)).then(pl.col("fwd_return")),
+        )
+        .drop("missing")
+    )
+
+
+def statsmodels_fits(
+    regression_data: pl.DataFrame, by: list[str], confidence: float
+) -> pl.DataFrame:
+    """The per-group ``smf.ols`` loop experiment 11 used to run."""
+    fits = []
+    for keys, subset in regression_data.partition_by(by, as_dict=True).items():
+        fit = smf.ols("fwd_return ~ alpha", subset).fit()
+        ci = fit.conf_int(alpha=1 - confidence)
+        fits.append(
+            {
+                **dict(zip(by, keys)),
+                "expected_n": int(fit.nobs),
+                "expected_intercept": fit.params["Intercept"],
+                "expected_intercept_std_error": fit.bse["Intercept"],
+                "expected_slope": fit.params["alpha"],
+                "expected_slope_std_error": fit.bse["alpha"],
+                "expected_slope_tstat": fit.tvalues["alpha"],
+                "expected_ci_lower": ci.loc["alpha", 0],
+                "expected_ci_upper": ci.loc["alpha", 1],
+            }
+        )
+    return pl.DataFrame(fits)
+
+
+@pytest.mark.parametrize("confidence", [0.95, 0.9])
+@pytest.mark.parametrize("by", [["quantile"], ["month", "quantile"]])
+def test_matches_statsmodels(
+    regression_data: pl.DataFrame, by: list[str], confidence: float
+) -> None:
+    regression_data = regression_data.with_columns(
+        pl.col("quantile").cast(pl.String), pl.col("date").dt.month().alias("month")
+    )
+    results = grouped_regressions(
+        regression_data, y="fwd_return", x="alpha", by=by, confidence=confidence
+    )
+    expected = statsmodels_fits(regression_data, by, confidence)
+
+    joined = results.join(expected, on=by)
+    assert joined.height == results.height == expected.height
+
+    np.testing.assert_array_equal(joined["n"], joined["expected_n"])
+    for column in [
+        "intercept",
+        "intercept_std_error",
+        "slope",
+        "slope_std_error",
+        "slope_tstat",
+        "ci_lower",
+        "ci_upper",
+    ]:
+        np.testing.assert_allclose(
+            joined[column], joined[f"expected_{column}"], rtol=1e-9, atol=1e-12
+        )
@@ -0,0 +1,100 @@
+import datetime as dt
+import json
+
+import numpy as np
+import polars as pl
+import pytest
+
+from research.data.assets import _cache_key
+from research.pipelines import scan_alphas
+from research.signals.store import load_signals
+
+COLUMNS = ["date", "barrid", "return", "specific_return", "daily_volume", "price"]
+START, END = dt.date(2020, 1, 1), dt.date(2020, 6, 30)
+
+
+def write_entry(cache_dir, panel: pl.DataFrame, columns: list[str]) -> None:
+    """Cache entry of ``columns`` covering 2020 from ``START``."""
+    entry_dir = cache_dir / _cache_key(columns, True)
+    (entry_dir / "year=2020").mkdir(parents=True)
+    panel.select(columns).write_parquet(entry_dir / "year=2020" / "part-0.parquet")
+
+    manifest = {
+        "columns": sorted(columns),
+        "in_universe": True,
+        "partitions": {
+            "2020": {
+                "start": START.isoformat(),
+                "end": dt.date(2020, 12, 31).isoformat(),
+                "files": ["part-0.parquet"],
+            }
+        },
+    }
+    with open(entry_dir / "manifest.json", "w") as f:
+        json.dump(manifest, f)
+
+
+@pytest.fixture
+def project_root(tmp_path, monkeypatch):
+    """Project root with a wide asset cache entry and a narrower one."""
+    monkeypatch.setenv("PROJECT_ROOT", str(tmp_path))
+    rng = np.random.default_rng(0)
+    dates = pl.date_range(START, END, eager=True)
+    n_dates, n_barrids = len(dates), 20
+    n = n_dates * n_barrids
+
+    panel = pl.DataFrame(
+        {
+            "date": dates.gather(np.repeat(np.arange(n_dates), n_barrids)),
+            "barrid": [f"B{i:03d}" for i in range(n_barrids)] * n_dates,
+            "return": rng.normal(0, 2, n),
+            "specific_return": rng.normal(0, 2, n),
+            "daily_volume": rng.lognormal(12, 1, n),
+            "price": rng.uniform(5, 100, n),
+        }
+    ).sort("barrid", "date")
+
+    # A narrow load is served by the narrow entry, a wide one by the wide entry
+    cache_dir = tmp_path / "cache" / "assets"
+    write_entry(cache_dir, panel, COLUMNS)
+    write_entry(cache_dir, panel, ["date", "barrid", "specific_return"])
+
+    return tmp_path
+
+
+def entries(project_root, name: str) -> list[str]:
+    return sorted(
+        path.name for path in (project_root / "cache" / "signals" / name).iterdir()
+    )
+
+
+def test_entry_does_not_depend_on_companions(project_root) -> None:
+    alone = load_signals(START, END, ["barra_reversal"], verbose=False).collect()
+    assert len(entries(project_root, "barra_reversal")) == 1
+
+    together = load_signals(
+        START,
+        END,
+        ["reversal", "barra_reversal", "volume_adjusted_barra_reversal"],
+        verbose=False,
+    ).collect()
+
+    # The second request reads the stored entry instead of writing another one
+    assert len(entries(project_root, "barra_reversal")) == 1
+    assert alone.sort("date", "barrid").equals(
+        together.select(alone.columns).sort("date", "barrid")
+    )
+
+
+def test_values_match_pipeline(project_root) -> None:
+    stored = load_signals(START, END, ["reversal"], verbose=False).collect()
+    assert stored["reversal"].drop_nulls().is_finite().all()
+
+    # The pipeline's alpha is the raw signal on its filtered universe
+    alphas, _ = scan_alphas(
+        START, END, "reversal", columns=[], alpha=pl.col("reversal")
+    )
+    alphas = alphas.collect()
+    joined = alphas.join(stored, on=["date", "barrid"])
+    assert joined.height == alphas.height > 0
+    np.testing.assert_allclose(joined["alpha"], joined["reversal"], rtol=1e-12)